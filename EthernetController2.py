@@ -2,6 +2,9 @@ import os
 import sys
 import time
 import socket
+import scpi_completion
+import scpi_reader
+import scpi_recorder
 
 #print('The number of args is: {}'.format(len(sys.argv)))
 #print('args values are: {}'.format(sys.argv))
@@ -19,6 +22,8 @@ class EthernetControl:
         self.ADDR = (self.HOST, self.PORT)
         self.timeout = 60
         self.gpibAdd = gpib
+        self.waiter = scpi_completion.CompletionWaiter(self.ask, self.write, name=ip, timeout=self.timeout)
+        self.connection = scpi_recorder.connectionLabel(self.ADDR)
         #print(self.ADDR, self.gpibAdd, self.BUFSIZ)
         try:
             self.prolSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)   # Create socket
@@ -26,6 +31,7 @@ class EthernetControl:
             self.prolSock.connect(self.ADDR)                    # connect a socket    
         except socket.error as e:
             print("Error conecting: " + str(e))
+        self.reader = scpi_reader.ResponseReader(self.prolSock, self.BUFSIZ)
         #self.set_defaults()
         
     def sockClose(self):
@@ -52,6 +58,14 @@ class EthernetControl:
         """
         self.connection_write(command)
 
+    def complete(self, command):
+        """ Sends the command and returns as soon as the instrument reports
+        the operation has finished, instead of sleeping for a fixed time.
+
+        :param command: SCPI command string to be sent to the instrument
+        """
+        return self.waiter.waitOpc(command)
+
     def read(self, command):
         """ Reads the response of the instrument until timeout
 
@@ -67,9 +81,10 @@ class EthernetControl:
         #    print("Error conecting: " + str(e))
         try:
             #print(('send '+cmd).strip())
+            start = time.time()
             sendData = cmd + "\n"
             self.prolSock.send(sendData.encode())                        # Send the command with end charater
-            time.sleep(0.1)
+            scpi_recorder.record(self.connection, scpi_recorder.WRITE, cmd, None, start)
             #self.prolSock.close()                          # Close the socket
         except socket.error as e:
             print("Error sending data: " + str(e))
@@ -99,12 +114,12 @@ class EthernetControl:
         #except socket.error as e:
         #    print("Error conecting: " + str(e))
         mesg = ""
+        start = time.time()
         try:
             #print(('send '+cmd).strip())
             sendData = cmd + "\n"
-            time.sleep(0.1)
             self.prolSock.send(sendData.encode())                        # Send the command with end charaters
-            mesg = self.prolSock.recv(self.BUFSIZ)              # Read the response
+            mesg = self.reader.readline() + b"\n"             # Read the response up to the terminator
             #time.sleep(0.5)
             #self.prolSock.close()                          # Close the socket
         except socket.timeout:
@@ -114,12 +129,14 @@ class EthernetControl:
             print("Error sending data: " + str(e))
         if mesg != "":
             mesg = mesg.decode()
+        scpi_recorder.record(self.connection, scpi_recorder.QUERY, cmd, mesg, start)
         return mesg
 
-eCon = EthernetControl(sys.argv[1], sys.argv[2], sys.argv[3])
-if "?" in sys.argv[4]:
-    #print("Sir, I have a question: "+sys.argv[4])
-    print('{}'.format(eCon.ask(sys.argv[4]).strip()))
-else:
-    eCon.write(sys.argv[4])
-eCon.sockClose()
\ No newline at end of file
+if __name__ == '__main__':
+    eCon = EthernetControl(sys.argv[1], sys.argv[2], sys.argv[3])
+    if "?" in sys.argv[4]:
+        #print("Sir, I have a question: "+sys.argv[4])
+        print('{}'.format(eCon.ask(sys.argv[4]).strip()))
+    else:
+        eCon.write(sys.argv[4])
+    eCon.sockClose()
\ No newline at end of file
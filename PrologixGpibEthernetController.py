@@ -2,6 +2,10 @@ import os
 import sys
 import time
 import socket
+import threading
+import scpi_completion
+import scpi_reader
+import scpi_recorder
 
 #print('The number of args is: {}'.format(len(sys.argv)))
 #print('args values are: {}'.format(sys.argv))
@@ -19,9 +23,12 @@ class PrologixControl:
         self.ADDR = (self.HOST, self.PORT)
         self.timeout = 1
         self.gpibAdd = gpib
+        self.waiter = scpi_completion.CompletionWaiter(self.ask, self.write, name="{}:{}".format(ip, gpib))
+        self.connection = scpi_recorder.connectionLabel(self.ADDR)
         #print(self.ADDR, self.gpibAdd, self.BUFSIZ)
         try:
             self.prolSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)   # Create socket
+            self.prolSock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # ++read must not wait behind the command
             self.prolSock.settimeout(self.timeout)
             self.prolSock.connect(self.ADDR)                    # connect a socket    
         except socket.error as e:
@@ -50,9 +57,20 @@ class PrologixControl:
         :param command: SCPI command string to be sent to instrument
         """
 
+        if "*OPC?" in command:
+            return self.connection_read(command)
         self.write(command)
         return self.read()
 
+    def wait_srq(self, command):
+        """ Sends the command and waits for the instrument to assert SRQ on completion.
+
+        :param command: SCPI command string to be sent to instrument
+        :returns: status byte read by the serial poll
+        """
+        return self.waiter.waitSrq(command, lambda: self.connection_read("++srq"),
+                                   lambda: self.connection_read("++spoll %d" % int(self.gpibAdd)))
+
     def write(self, command):
         """ Writes the command to the GPIB address stored in the
         :attr:`.address`
@@ -60,7 +78,10 @@ class PrologixControl:
         :param command: SCPI command string to be sent to the instrument
         """
         if self.gpibAdd is not None:
-            address_command = "++addr %d\n" % int(self.gpibAdd)
+            # the selected address belongs to the bridge, not to this object: another
+            # PrologixControl or process may have changed it, so it is always sent.
+            # Use PrologixMultiplexer to share one connection and skip repeats.
+            address_command = "++addr %d" % int(self.gpibAdd)
             self.connection_write(address_command)
         self.connection_write(command)
 
@@ -79,9 +100,10 @@ class PrologixControl:
         #    print("Error conecting: " + str(e))
         try:
             #print(('send '+cmd).strip())
+            start = time.time()
             sendData = cmd + "\n"
             self.prolSock.send(sendData.encode())                        # Send the command with end charater
-            time.sleep(0.1)
+            scpi_recorder.record(self.connection, scpi_recorder.WRITE, cmd, None, start)
             #self.prolSock.close()                          # Close the socket
         except socket.error as e:
             return "Python Error sending data: " + str(e)
@@ -91,6 +113,7 @@ class PrologixControl:
     def read_poll(self, repeat):
         start_time = time.time()
         mesg = ""
+        delays = self.waiter.delays()
         for _ in range(repeat):
             try:
                 sendData = "++read\n"
@@ -98,7 +121,7 @@ class PrologixControl:
                 mesg = self.prolSock.recv(self.BUFSIZ)
                 break
             except socket.timeout:
-                time.sleep(1)
+                scpi_recorder.sleep(next(delays), self.connection, 'read poll')
             except socket.error as e:
                 return "Python Error sending data: " + str(e)
         #print("read poll operation took {:.0f} seconds".format(time.time() - start_time))
@@ -115,41 +138,176 @@ class PrologixControl:
         try:
             #print(('send '+cmd).strip())
             if "*OPC?" in cmd:
-                sendData = cmd.replace("?", "")
-                self.write(sendData)
-                for _ in range(30):
-                    ask_dmm = dmm.ask("*ESR?").strip()
-                    if '+1' == ask_dmm:
-                        return ask_dmm
-                    time.sleep(1)
+                sendData = cmd.replace(";*OPC?", "").replace("*OPC?", "")
+                esr = self.waiter.waitEsr(sendData)
+                return "+{}".format(esr)
             else:
+                start = time.time()
                 sendData = cmd + "\n"
-                time.sleep(0.1)
                 self.prolSock.send(sendData.encode())                        # Send the command with end charaters
                 mesg = self.prolSock.recv(self.BUFSIZ)              # Read the response
                 #time.sleep(0.5)
                 #self.prolSock.close()                          # Close the socket
         except socket.timeout:
             mesg = self.read_poll(30)
+        except scpi_completion.CompletionTimeout as e:
+            return "Python Error waiting for completion: " + str(e)
         except socket.error as e:
             return "Python Error sending data: " + str(e)
         #print('recieve: {}'.format(mesg.strip()))
         if mesg != "":
             mesg = mesg.decode()
+        scpi_recorder.record(self.connection, scpi_recorder.QUERY, cmd, mesg, start)
         return mesg
 
-prol = PrologixControl(sys.argv[1], sys.argv[2], sys.argv[3])
-if "?" in sys.argv[4]:
-    #print("Sir, I have a question: "+sys.argv[4])
-    try:
-        mesg = '{}'.format(prol.ask(sys.argv[4]).strip())
-        if 'Python Error' not in mesg:
-            print(mesg)
-    except:
+
+class GpibInstrument:
+    def __init__(self, mux, gpib):
+        """ Handle for one GPIB address on a shared PrologixMultiplexer.
+        Has the same ask/write/read interface as PrologixControl.
+        """
+        self.mux = mux
+        self.gpibAdd = int(gpib)
+
+    def ask(self, command):
+        return self.mux.ask(self.gpibAdd, command)
+
+    def write(self, command):
+        self.mux.write(self.gpibAdd, command)
+
+    def read(self):
+        return self.mux.read(self.gpibAdd)
+
+    def queue(self, command, barrier=False):
+        """ Queues a write to be sent by the next :meth:`PrologixMultiplexer.flush` """
+        self.mux.queue(self.gpibAdd, command, barrier)
+
+
+class PrologixMultiplexer:
+    def __init__(self, ip, port=1234, timeout=1):
+        """ Owns the single socket to a Prologix bridge and shares it between
+        every GPIB instrument on the bus. The selected address is tracked so
+        ++addr is only sent when it changes, and a lock serialises access so
+        handles can be used from several threads.
+        """
+        self.BUFSIZ = 1024
+        self.HOST = ip
+        self.PORT = int(port)
+        self.ADDR = (self.HOST, self.PORT)
+        self.timeout = timeout
+        self.current_addr = None
+        self.lock = threading.RLock()
+        self.pending = []
+        self.stats = {'commands': 0, 'addr_switches': 0}
+        self.prolSock = socket.create_connection(self.ADDR, self.timeout)
+        self.prolSock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # ++read must not wait behind the command
+        self.prolSock.settimeout(self.timeout)
+        self.reader = scpi_reader.ResponseReader(self.prolSock, self.BUFSIZ)
+        for setting in ("++mode 1", "++auto 0", "++eoi 1", "++eos 2", "++read_tmo_ms 500"):
+            self._send(setting)
+
+    def sockClose(self):
+        self.prolSock.close()
+
+    def instrument(self, gpib):
+        """ Returns a handle for the instrument at a GPIB address """
+        return GpibInstrument(self, gpib)
+
+    def _send(self, cmd):
+        self.prolSock.sendall((cmd + "\n").encode())
+
+    def _select(self, gpib):
+        if gpib != self.current_addr:
+            self._send("++addr %d" % gpib)
+            self.current_addr = gpib
+            self.stats['addr_switches'] += 1
+
+    def write(self, gpib, command):
+        """ Writes the command to a GPIB address, flushing any queued writes first
+
+        :param command: SCPI command string to be sent to the instrument
+        """
+        with self.lock:
+            self.flush()
+            self._select(int(gpib))
+            self._send(command)
+            self.stats['commands'] += 1
+
+    def read(self, gpib):
+        """ Reads the response of the instrument at a GPIB address, flushing
+        any queued writes first so the reply is to the latest command
+
+        :returns: String ASCII response of the instrument
+        """
+        with self.lock:
+            self.flush()
+            self._select(int(gpib))
+            self._send("++read eoi")
+            return self.reader.readline().decode()
+
+    def ask(self, gpib, command):
+        """ Writes the command and reads the response from a GPIB address
+
+        :param command: SCPI command string to be sent to instrument
+        """
+        with self.lock:
+            self.write(gpib, command)
+            return self.read(gpib)
+
+    def queue(self, gpib, command, barrier=False):
+        """ Queues a write. Queued writes are grouped by address when flushed
+        so the bridge switches address as few times as possible. Commands to
+        the same address always keep their order; a barrier command (e.g. a
+        trigger that must follow the set-up of other instruments) is never
+        moved past, in either direction.
+        """
+        with self.lock:
+            self.pending.append((int(gpib), command, barrier))
+
+    def flush(self):
+        """ Sends the queued writes grouped by address """
+        with self.lock:
+            pending, self.pending = self.pending, []
+            for segment in self._segments(pending):
+                groups = {}
+                for gpib, command in segment:
+                    groups.setdefault(gpib, []).append(command)
+                # the current address goes first as it needs no ++addr
+                order = sorted(groups, key=lambda gpib: gpib != self.current_addr)
+                for gpib in order:
+                    self._select(gpib)
+                    for command in groups[gpib]:
+                        self._send(command)
+                        self.stats['commands'] += 1
+
+    def _segments(self, pending):
+        """ Splits the queue at barrier commands, which form their own segment """
+        segment = []
+        for gpib, command, barrier in pending:
+            if barrier:
+                if segment:
+                    yield segment
+                yield [(gpib, command)]
+                segment = []
+            else:
+                segment.append((gpib, command))
+        if segment:
+            yield segment
+
+
+if __name__ == '__main__':
+    prol = PrologixControl(sys.argv[1], sys.argv[2], sys.argv[3])
+    if "?" in sys.argv[4]:
+        #print("Sir, I have a question: "+sys.argv[4])
         try:
-            print('{}'.format(prol.ask(sys.argv[4]).strip()))
+            mesg = '{}'.format(prol.ask(sys.argv[4]).strip())
+            if 'Python Error' not in mesg:
+                print(mesg)
         except:
-            print('second error')
-else:
-    prol.write(sys.argv[4])
-prol.sockClose()
\ No newline at end of file
+            try:
+                print('{}'.format(prol.ask(sys.argv[4]).strip()))
+            except:
+                print('second error')
+    else:
+        prol.write(sys.argv[4])
+    prol.sockClose()
\ No newline at end of file
@@ -6,6 +6,10 @@
 
 
 import socket
+import struct
+import scpi_reader
+
+_readers = {}   # one buffered reader per session so no received data is lost between queries
 
 def SCPI_sock_connect(ipaddress,port=5025):
     """ Opens up a socket connection between an instrument and your PC
@@ -18,7 +22,7 @@ def SCPI_sock_connect(ipaddress,port=5025):
     try:
         session=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
         session.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
-        session.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, 0)
+        session.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 0, 0))  # struct linger, Linux rejects a plain int
         session.connect((ipaddress,port))
     except IOError:
 	print "Failed to connect to the instrument, pleace check your IP address"
@@ -70,8 +74,20 @@ def SCPI_sock_close(session):
         Argument:
         session -> TCPIP socket connection"""
     
+    _readers.pop(session, None)
     session.close()
 
+def getReader(session):
+    """Returns the buffered reader for a session
+
+        Argument:
+        session -> TCPIP socket"""
+
+    reader = _readers.get(session)
+    if reader is None:
+        reader = _readers[session] = scpi_reader.ResponseReader(session)
+    return reader
+
 def getDataFromSocket(session):
     """Reads from a socket until a newline is read
         Returns the data read
@@ -79,15 +95,18 @@ def getDataFromSocket(session):
         Argument:
         session -> TCPIP socket"""
     
-    dat = ""
-    while 1:
-        message = session.recv(4096)
-        last=len(message)
-        if message[last-1] == "\n":
-            dat=dat+message[:-1]
-            return dat
-        else:
-            dat=dat+message
+    return getReader(session).readline()
+
+def SCPI_sock_query_block(session,command):
+    """Sends a query whose reply is an IEEE 488.2 binary block
+        Returns the block payload as a bytearray
+
+        Arguments:
+        session -> TCPIP socket connection
+        command -> text containing an instrument command"""
+
+    session.sendall(command + "\n")
+    return getReader(session).readBlock()
 
 def get_error(session, command):
     """Checks an instrument for errors and print them out
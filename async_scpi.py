@@ -0,0 +1,238 @@
+"""
+Asyncio SCPI client.
+
+Lets one station drive several instruments at once (SFU, DMM, GPIB kit
+behind a Prologix bridge) so commands to different instruments overlap
+instead of running in series. Each ip:port has one connection and request
+worker, shared by every instrument behind it (several GPIB addresses on
+one Prologix bridge), so commands to it are still sent strictly in order.
+SyncInstrument is a blocking wrapper with the same ask/write/read interface
+as EthernetControl and PrologixControl for existing callers.
+
+    async def main():
+        sfu = AsyncInstrument("10.0.0.5", 5025)
+        dmm = AsyncInstrument("10.0.0.6", 5025)
+        freq, volts = await asyncio.gather(sfu.ask(":FREQ?"), dmm.ask("READ?"))
+"""
+import asyncio
+import threading
+
+
+class InstrumentTimeout(Exception):
+    """Raised when an instrument does not answer within the request timeout"""
+
+
+class _Link:
+    """ One connection and request worker per (ip, port) and event loop.
+
+    Every AsyncInstrument behind the same Prologix bridge (or the same LAN
+    instrument) queues on the same link, so the ++addr, command and ++read
+    of one request are never interleaved with another instrument's.
+    """
+    _links = {}
+
+    @classmethod
+    def get(cls, host, port):
+        loop = asyncio.get_running_loop()
+        key = (loop, host, port)
+        if key not in cls._links:
+            cls._links[key] = cls(host, port)
+        return cls._links[key]
+
+    def __init__(self, host, port):
+        self.HOST = host
+        self.PORT = port
+        self.users = set()
+        self._reader = None
+        self._writer = None
+        self._queue = None
+        self._worker = None
+        self._current = None        # future of the request the worker is in the middle of
+        self._prologix = False      # ++auto/++eoi/++eos sent on this connection
+        self._connect_lock = asyncio.Lock()
+        self._generation = 0        # counts connections, so a request only closes the one it was sent on
+
+    async def connect(self, connect_timeout):
+        async with self._connect_lock:
+            if self._writer is not None:
+                return self._generation
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.HOST, self.PORT), connect_timeout)
+            self._prologix = False
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run())
+            self._generation += 1
+            return self._generation
+
+    async def close(self, generation=None):
+        async with self._connect_lock:
+            if generation is None or generation == self._generation:
+                await self._close()
+
+    async def _close(self):
+        error = ConnectionError("{}:{} connection closed".format(self.HOST, self.PORT))
+        current = self._current
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if current is not None and not current.done():
+            current.set_exception(error)
+        while self._queue is not None and not self._queue.empty():
+            _, _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(error)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def put(self, gpib, command, reply):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((gpib, command, reply, future))
+        return future
+
+    async def _send(self, command):
+        self._writer.write(command.encode() + b"\n")
+        await self._writer.drain()
+
+    async def _run(self):
+        """ Worker that sends queued requests one at a time """
+        while True:
+            gpib, command, reply, future = await self._queue.get()
+            if future.cancelled():
+                continue
+            self._current = future
+            try:
+                if gpib is not None:
+                    if not self._prologix:
+                        for setting in ("++auto 0", "++eoi 1", "++eos 2"):
+                            await self._send(setting)
+                        self._prologix = True
+                    await self._send("++addr %d" % int(gpib))
+                await self._send(command)
+                mesg = ""
+                if reply:
+                    if gpib is not None:
+                        await self._send("++read eoi")
+                    mesg = (await self._reader.readline()).decode().strip()
+                if not future.done():
+                    future.set_result(mesg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            finally:
+                self._current = None
+
+
+class AsyncInstrument:
+    def __init__(self, ip, port=5025, gpib=None, timeout=10, connect_timeout=5):
+        """
+        :param ip: instrument or Prologix bridge address
+        :param port: socket port (5025 for SCPI raw, 1234 for Prologix)
+        :param gpib: GPIB address when talking through a Prologix bridge, else None
+        :param timeout: default seconds to wait for each request
+        """
+        self.HOST = ip
+        self.PORT = int(port)
+        self.gpibAdd = gpib
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._link = None
+
+    async def connect(self):
+        """ Opens the shared connection to ip:port if it is not open yet
+
+        :returns: generation of the open connection
+        """
+        if self._link is None:
+            self._link = _Link.get(self.HOST, self.PORT)
+        self._link.users.add(self)
+        return await self._link.connect(self.connect_timeout)
+
+    async def close(self):
+        """ Stops using the connection. The last instrument on a connection
+        stops the worker, fails anything still queued and closes it.
+        """
+        if self._link is None:
+            return
+        self._link.users.discard(self)
+        if not self._link.users:
+            await self._link.close()
+
+    async def write(self, command, timeout=None):
+        """ Queues a command that has no reply
+
+        :param command: SCPI command string to be sent to the instrument
+        """
+        return await self._request(command, False, timeout)
+
+    async def ask(self, command, timeout=None):
+        """ Queues a query and returns the reply
+
+        :param command: SCPI command string to be sent to the instrument
+        :returns: String ASCII response of the instrument
+        """
+        return await self._request(command, True, timeout)
+
+    async def _request(self, command, reply, timeout):
+        generation = await self.connect()
+        future = await self._link.put(self.gpibAdd, command, reply)
+        try:
+            return await asyncio.wait_for(future, (timeout, self.timeout)[timeout is None])
+        except asyncio.TimeoutError:
+            # a late reply would be read as the answer to the next request, so start afresh
+            await self._link.close(generation)
+            raise InstrumentTimeout("{}:{} did not answer '{}'".format(self.HOST, self.PORT, command))
+
+
+class _LoopThread:
+    """ A single event loop running in a daemon thread, shared by every SyncInstrument """
+    _lock = threading.Lock()
+    _loop = None
+
+    @classmethod
+    def get(cls):
+        with cls._lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(target=cls._loop.run_forever, name="scpi-asyncio", daemon=True).start()
+            return cls._loop
+
+
+class SyncInstrument:
+    def __init__(self, ip, port, gpib=None, timeout=10):
+        """ Blocking wrapper around AsyncInstrument with the EthernetControl interface.
+        Several threads can use different SyncInstruments at once and their
+        commands overlap on the shared event loop.
+        """
+        self.instrument = AsyncInstrument(ip, port, gpib, timeout)
+        self._loop = _LoopThread.get()
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def ask(self, command):
+        return self._call(self.instrument.ask(command))
+
+    def write(self, command):
+        self._call(self.instrument.write(command))
+
+    def read(self, command):
+        return self.ask(command)
+
+    def sockClose(self):
+        self._call(self.instrument.close())
+
+
+async def ask_all(requests):
+    """ Sends one query to each instrument concurrently
+
+    :param requests: list of (AsyncInstrument, command) pairs
+    :returns: list of replies in the same order
+    """
+    return await asyncio.gather(*(instrument.ask(command) for instrument, command in requests))
@@ -10,6 +10,7 @@ from decimal import Decimal
 import logging
 import log_test
 from pymeasure.instruments import Instrument
+from dmm_data import DmmDataManager
     
 FORMATTER = logging.Formatter("%(asctime)s — %(name)s — %(levelname)s — %(message)s")
 
@@ -54,82 +55,6 @@ class EndMe:
         '''
         self.finish_him = True
 
-class DmmDataManager:
-    '''
-    I am a doc string
-    '''
-    def __init__(self):
-        '''
-        I am a doc string
-        '''
-        self.list_smpl_cnt = []
-        self.all_data = []
-        self.start_time = 0
-        self.total_time = 0
-        
-    def dmm_time_convert(self, dmm_time):
-        '''
-            convert the time from the DMM
-        '''
-        list_of_time = dmm_time.strip().split(',')
-        hours = Decimal(list_of_time[0])*60*60
-        minutes = Decimal(list_of_time[1])*60
-        seconds = Decimal(list_of_time[2])
-        dmm_time_seconds = hours + minutes + seconds
-        return dmm_time_seconds
-
-    def begin_time(self, dmm_time):
-        '''
-        record the start time
-        '''
-        self.total_time = 0
-        self.start_time = self.dmm_time_convert(dmm_time)
-
-    def current_run_time(self, dmm_time):
-        '''
-        record the total time from the start
-        '''
-        self.total_time = self.dmm_time_convert(dmm_time) - self.start_time
-
-    def add_data(self, raw_data):
-        '''
-        append the new data to the current data
-        '''
-        index_num = raw_data[1]
-        data_samples = raw_data[int(index_num)+2:].strip().split(',')
-        self.list_smpl_cnt.append(len(data_samples))
-        for sample_point in data_samples:
-            self.all_data.append(sample_point)
-
-    def sample_rate(self):
-        '''
-        calculate the sample rate
-        '''
-        if Decimal(self.total_time) > 0:
-            return sum(self.list_smpl_cnt)/Decimal(self.total_time)
-        else:
-            return Decimal('1')
-
-    def display_data(self):
-        '''
-        display the info about the data rate, total time and number of samples
-        '''
-        log.info('')
-        log.info('total time = {:.2f}'.format(self.total_time))
-        log.info('sample count = {}'.format(sum(self.list_smpl_cnt)))
-        log.info('average sample rate = {:.2f}sps'.format(self.sample_rate()))
-        log.info('average sample time = {:.6f}ms'.format(Decimal('1000')/self.sample_rate()))
-        log.info('')
-     
-    def interpolate_data(self):
-        '''
-        display the info about the data rate, total time and number of samples
-        '''
-        data_points = int(round((1/self.sample_rate())/Decimal('0.0001')))
-        log.info('points factor = %s' % data_points)
-        interpolate_data = list(np.repeat(self.all_data, data_points))
-        return interpolate_data
-
 class DMMLogging:
     '''
     DMM logging class
@@ -139,6 +64,8 @@ class DMMLogging:
         #self.FGEN = e_cnrtl.EthernetControl("10.45.26.154", 5025, 18)
         self.FINISH_READING = EndMe()
         self.DMM_DATA = DmmDataManager()
+        self.transfer = 'ASCII'
+        self.byte_order = 'SWAP'
 
     def setup(self, *args, **kwargs):
         '''
@@ -148,9 +75,13 @@ class DMMLogging:
         sample_count = kwargs.get('sample_count', '1000000')
         trigger_count = kwargs.get('trigger_count', '1')
         trigger_delay = kwargs.get('trigger_delay', '0.000091')
+        transfer = kwargs.get('transfer', 'ASCII')      # 'ASCII' or 'REAL' for binary REAL,64 readout
+        byte_order = kwargs.get('byte_order', 'SWAP')   # 'SWAP' little endian (PC native) or 'NORM'
+        self.transfer = transfer
+        self.byte_order = byte_order
         
         setup_dict = {}
-        for setting in ('nplc', 'sample_count', 'trigger_count', 'trigger_delay'):
+        for setting in ('nplc', 'sample_count', 'trigger_count', 'trigger_delay', 'transfer', 'byte_order'):
             setup_dict[setting] = locals()[setting]
             log.info('Setting: %s = %s' % (setting, setup_dict[setting]))
         
@@ -167,14 +98,32 @@ class DMMLogging:
                 ":SAMP:COUN {};*OPC?".format(sample_count))
         self.DMM.ask(":TRIG:SOUR BUS;:TRIG:COUN {};"
                 ":TRIG:DEL {};*OPC?".format(trigger_count, trigger_delay)) #:AUTO ON / 0.000092
+        if transfer == 'REAL':
+            self.DMM.ask(":FORM:DATA REAL,64;:FORM:BORD {};*OPC?".format(byte_order))
+        else:
+            self.DMM.ask(":FORM:DATA ASCII;*OPC?")
         log.info('NPLC = %s' % self.DMM.ask(":SENS:VOLT:DC:NPLC {};:SENS:VOLT:DC:NPLC?".format(nplc)))
         log.info('Error = %s' % self.DMM.ask("SYST:ERROR?"))
         
+    def read_samples(self):
+        '''
+        read and store the samples waiting in the dmm memory
+        '''
+        if self.transfer == 'REAL':
+            self.DMM.write("R?")
+            self.DMM_DATA.add_binary_data(self.DMM.adapter.connection.read_raw(), self.byte_order)
+        else:
+            self.DMM_DATA.add_data(self.DMM.ask("R?"))
+
     def run(self, run_time=60, print_rate=1):
         '''
         collects the data from the dmm and records the start and stop time.
         '''
-        self.DMM.ask("R?")
+        if self.transfer == 'REAL':
+            self.DMM.write("R?")
+            self.DMM.adapter.connection.read_raw()
+        else:
+            self.DMM.ask("R?")
         #freq = decimal.Decimal('999.3478')
         #fcount = decimal.Decimal('0')
         #FGEN.ask("SOUR1:FREQ {} HZ;*OPC?".format(freq))
@@ -194,7 +143,7 @@ class DMMLogging:
                 time.sleep(1)
                 #self.DMM_DATA.current_run_time()
                 continue
-            self.DMM_DATA.add_data(self.DMM.ask("R?"))
+            self.read_samples()
             self.DMM_DATA.current_run_time(self.DMM.ask("SYSTem:TIME?"))
             if time.time()-print_time > print_rate:
                 #log.info('freq = {}, {}'.format(freq+fcount, decimal.Decimal(FGEN.ask("SOUR1:FREQ?"))-freq-fcount+decimal.Decimal('0.000001')))
@@ -229,8 +178,8 @@ class DMMLogging:
         log.info(sample_num)
         x = np.arange(0, sample_num, 1) 
         #print(x)
-        #print(DMM_DATA.all_data[:100])
-        y = np.asarray(self.DMM_DATA.all_data[:len(x)], dtype=np.float)
+        #print(self.DMM_DATA.samples()[:100])
+        y = self.DMM_DATA.samples()[:len(x)]
         #lt.title("sine wave form") 
 
         # Plot the points using matplotlib 
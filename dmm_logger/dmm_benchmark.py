@@ -0,0 +1,107 @@
+'''
+Compare the ASCII and binary REAL,64 readout paths of DmmDataManager
+against the DMM of scpi_simulator, reporting samples per second for each.
+
+What is timed is the whole R? readout over a loopback TCP connection: the
+query, the simulator formatting the reply, the transfer and the decoding
+into the float64 array both paths have to produce. The readings are taken
+by the simulator before the clock starts. A real meter formats and sends
+at its own speed over the network, so the rates are only comparable with
+each other, not with a 34465A.
+'''
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+from dmm_data import DmmDataManager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scpi_reader
+import scpi_simulator
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class LoopbackDmm:
+    '''
+    a connection to a simulated DMM with the ask / write / read_raw calls
+    DMMLogging makes through pyvisa
+    '''
+    def __init__(self, samples, transfer, byte_order='SWAP'):
+        self.server = scpi_simulator.startSimulator('dmm', rate=10 ** 12)     # every reading is due at *TRG
+        self.sock = socket.create_connection(self.server.server_address)
+        self.reader = scpi_reader.ResponseReader(self.sock)
+        if transfer == 'REAL':
+            self.write(':FORM:DATA REAL,64;:FORM:BORD {}'.format(byte_order))
+        else:
+            self.write(':FORM:DATA ASCII')
+        self.write(':SAMP:COUN {};:TRIG:COUN 1;INIT;*TRG'.format(samples))
+        self.ask('DATA:POIN?')          # the simulator takes the readings now, outside the timing
+
+    def write(self, command):
+        self.sock.sendall(command.encode() + b'\n')
+
+    def ask(self, command):
+        '''
+        text reply, decoded to str as pyvisa does for ask/query
+        '''
+        self.write(command)
+        return self.reader.readline().decode()
+
+    def read_raw(self):
+        '''
+        binary block reply with its header, as returned by pyvisa read_raw
+        '''
+        payload = self.reader.readBlock()
+        length = str(len(payload)).encode()
+        return b'#' + str(len(length)).encode() + length + bytes(payload)
+
+    def close(self):
+        self.sock.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_path(transfer, samples, per_read):
+    '''
+    time reading every sample through one path, ending with the float64
+    array both paths have to produce for plotting and saving
+    '''
+    dmm = LoopbackDmm(samples, transfer)
+    data = DmmDataManager()
+    try:
+        start = time.perf_counter()
+        while sum(data.list_smpl_cnt) < samples:
+            if transfer == 'REAL':
+                dmm.write('R? {}'.format(per_read))
+                data.add_binary_data(dmm.read_raw())
+            else:
+                data.add_data(dmm.ask('R? {}'.format(per_read)))
+        count = len(data.samples())
+        elapsed = time.perf_counter() - start
+    finally:
+        dmm.close()
+    return count, elapsed
+
+
+def main():
+    '''
+    run both paths and log the samples per second
+    '''
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=1000000, help='total samples per path')
+    parser.add_argument('--per-read', type=int, default=50000, help='samples asked for by each R?')
+    args = parser.parse_args()
+    results = {}
+    for transfer in ('ASCII', 'REAL'):
+        count, elapsed = run_path(transfer, args.samples, args.per_read)
+        results[transfer] = count / elapsed
+        log.info('%-5s %d samples in %.3f s = %.0f samples/s, R? over loopback TCP', transfer, count, elapsed, results[transfer])
+    log.info('binary readout is %.1fx faster', results['REAL'] / results['ASCII'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+'''
+DMM sample storage and R? reply decoding, kept apart from the instrument
+control in dmm.py so it can be used without pymeasure
+'''
+from decimal import Decimal
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class DmmDataManager:
+    '''
+    I am a doc string
+    '''
+    def __init__(self):
+        '''
+        I am a doc string
+        '''
+        self.list_smpl_cnt = []
+        self.data_blocks = []
+        self.start_time = 0
+        self.total_time = 0
+        
+    def dmm_time_convert(self, dmm_time):
+        '''
+            convert the time from the DMM
+        '''
+        list_of_time = dmm_time.strip().split(',')
+        hours = Decimal(list_of_time[0])*60*60
+        minutes = Decimal(list_of_time[1])*60
+        seconds = Decimal(list_of_time[2])
+        dmm_time_seconds = hours + minutes + seconds
+        return dmm_time_seconds
+
+    def begin_time(self, dmm_time):
+        '''
+        record the start time
+        '''
+        self.total_time = 0
+        self.start_time = self.dmm_time_convert(dmm_time)
+
+    def current_run_time(self, dmm_time):
+        '''
+        record the total time from the start
+        '''
+        self.total_time = self.dmm_time_convert(dmm_time) - self.start_time
+
+    def add_data(self, raw_data):
+        '''
+        append the new data to the current data
+        '''
+        index_num = raw_data[1]
+        data_samples = raw_data[int(index_num)+2:].strip().split(',')
+        self.list_smpl_cnt.append(len(data_samples))
+        self.data_blocks.append(data_samples)
+
+    def add_binary_data(self, raw_data, byte_order='SWAP'):
+        '''
+        append a FORM REAL,64 block to the current data.
+        the payload is decoded in place with np.frombuffer, no per sample strings are made
+        '''
+        raw_data = memoryview(raw_data)
+        header_len = 2 + int(bytes(raw_data[1:2]))
+        if header_len == 2:     # indefinite length block, ends with a line feed
+            payload_len = (len(raw_data) - header_len) // 8 * 8
+        else:
+            payload_len = int(bytes(raw_data[2:header_len]))
+        dtype = ('>f8', '<f8')[byte_order == 'SWAP']
+        samples = np.frombuffer(raw_data, dtype=dtype, count=payload_len // 8, offset=header_len)
+        self.list_smpl_cnt.append(len(samples))
+        self.data_blocks.append(samples)
+
+    def samples(self):
+        '''
+        return every sample collected so far as one float64 array, in the order the reads arrived.
+        ASCII reads are kept as strings and converted here, binary reads are already float64
+        '''
+        if not self.data_blocks:
+            return np.empty(0, dtype=np.float64)
+        return np.concatenate([np.asarray(block, dtype=np.float64) for block in self.data_blocks])
+
+    def sample_rate(self):
+        '''
+        calculate the sample rate
+        '''
+        if Decimal(self.total_time) > 0:
+            return sum(self.list_smpl_cnt)/Decimal(self.total_time)
+        else:
+            return Decimal('1')
+
+    def display_data(self):
+        '''
+        display the info about the data rate, total time and number of samples
+        '''
+        log.info('')
+        log.info('total time = {:.2f}'.format(self.total_time))
+        log.info('sample count = {}'.format(sum(self.list_smpl_cnt)))
+        log.info('average sample rate = {:.2f}sps'.format(self.sample_rate()))
+        log.info('average sample time = {:.6f}ms'.format(Decimal('1000')/self.sample_rate()))
+        log.info('')
+     
+    def interpolate_data(self):
+        '''
+        display the info about the data rate, total time and number of samples
+        '''
+        data_points = int(round((1/self.sample_rate())/Decimal('0.0001')))
+        log.info('points factor = %s' % data_points)
+        interpolate_data = np.repeat(self.samples(), data_points)
+        return interpolate_data
@@ -0,0 +1,219 @@
+# Python instrument broker daemon
+# EthernetController2.py and PrologixGpibEthernetController.py are run as
+# scripts, one process and one connection per command. The broker keeps the
+# instrument connections open and takes commands over a local Unix domain
+# socket, so a command costs a round trip instead of an interpreter start and
+# a connect. instrument_client.py has the same argv interface as the scripts.
+# Requests and replies are single line JSON:
+#   {"ip": "10.0.0.5", "port": 5025, "gpib": 0, "command": "FREQ?"}
+#   {"reply": "474000000"}  or  {"error": "..."}
+# Port 1234 (or "prologix": true) goes through one PrologixMultiplexer per
+# bridge so instruments on the same bus share its socket.
+# Works with both Python 2 and Python 3.
+#
+#   python instrument_broker.py --socket /tmp/instrument_broker.sock --idle 600
+
+import os
+import sys
+import json
+import time
+import socket
+import select
+import signal
+import argparse
+import threading
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+import EthernetController
+import PrologixGpibEthernetController
+
+DEFAULT_SOCKET = os.environ.get('INSTRUMENT_BROKER', '/tmp/instrument_broker.sock')
+PROLOGIX_PORT = 1234
+
+
+class BrokerConnection:
+    '''One open instrument (or Prologix bridge) connection and its lock'''
+    def __init__(self, key, prologix, timeout):
+        self.key = key
+        self.prologix = prologix
+        self.lock = threading.Lock()
+        self.lastUsed = time.time()
+        ip, port = key
+        if prologix:
+            self.client = PrologixGpibEthernetController.PrologixMultiplexer(ip, port, timeout)
+        else:
+            self.client = EthernetController.EthernetControl(ip, port, None)
+            self.client.prolSock.getpeername()      # EthernetControl only prints a failed connect
+            self.client.prolSock.settimeout(timeout)
+
+    def healthy(self):
+        '''False if the instrument has closed the connection or sent data
+        nobody asked for, either way the connection can't be trusted'''
+        try:
+            return not select.select([self.client.prolSock], [], [], 0)[0]
+        except (socket.error, ValueError):
+            return False
+
+    def execute(self, gpib, command):
+        '''Sends the command, returning the reply for a query or "" for a write'''
+        self.lastUsed = time.time()
+        target = self.client.instrument(gpib) if self.prologix else self.client
+        if "?" in command:
+            reply = target.ask(command)
+            if not reply:
+                # EthernetControl returns nothing on a timeout or socket error
+                raise socket.timeout('No reply to {}'.format(command))
+            return reply.strip()
+        target.write(command)
+        return ""
+
+    def close(self):
+        try:
+            self.client.sockClose()
+        except socket.error:
+            pass
+
+
+class InstrumentBroker:
+    '''Holds the open connections, keyed by (ip, port)'''
+    def __init__(self, timeout=10, idle=600):
+        self.timeout = timeout
+        self.idle = idle
+        self.lock = threading.Lock()            # guards connections and opening, never held while connecting
+        self.connections = {}
+        self.opening = {}                       # (ip, port) -> lock held while that instrument connects
+        self.stats = {'requests': 0, 'errors': 0, 'opened': 0, 'closed': 0}
+        self.started = time.time()
+
+    def connection(self, ip, port, prologix):
+        '''Returns the open connection for (ip, port), connecting if there is
+        none. A slow connect only holds up requests for the same instrument.'''
+        key = (ip, int(port))
+        with self.lock:
+            opening = self.opening.setdefault(key, threading.Lock())
+        with opening:
+            with self.lock:
+                conn = self.connections.get(key)
+            if conn is not None and not conn.healthy():
+                self.discard(conn)
+                conn = None
+            if conn is None:
+                conn = BrokerConnection(key, prologix, self.timeout)
+                with self.lock:
+                    self.connections[key] = conn
+                    self.stats['opened'] += 1
+            return conn
+
+    def discard(self, conn):
+        '''Drops a connection after an error so the next request reconnects
+        rather than reading a late reply'''
+        with self.lock:
+            if self.connections.get(conn.key) is conn:
+                del self.connections[conn.key]
+                self.stats['closed'] += 1
+        conn.close()
+
+    def handle(self, request):
+        '''Runs one request and returns the reply dictionary'''
+        if request.get('stats'):
+            return {'reply': self.report()}
+        self.stats['requests'] += 1
+        port = int(request['port'])
+        prologix = request.get('prologix', port == PROLOGIX_PORT)
+        conn = None
+        try:
+            conn = self.connection(request['ip'], port, prologix)
+            with conn.lock:
+                return {'reply': conn.execute(request.get('gpib'), request['command'])}
+        except Exception as e:
+            self.stats['errors'] += 1
+            if conn is not None:
+                self.discard(conn)
+            return {'error': '{}: {}'.format(type(e).__name__, e)}
+
+    def closeIdle(self):
+        '''Closes connections unused for longer than the idle limit'''
+        now = time.time()
+        for conn in list(self.connections.values()):
+            if now - conn.lastUsed > self.idle and conn.lock.acquire(False):
+                try:
+                    self.discard(conn)
+                finally:
+                    conn.lock.release()
+
+    def closeAll(self):
+        for conn in list(self.connections.values()):
+            self.discard(conn)
+
+    def report(self):
+        return "Requests = {requests}, Errors = {errors}, Connections opened = {opened}, closed = {closed}, open = {open}, Uptime = {uptime:.0f} s".format(
+            open=len(self.connections), uptime=time.time() - self.started, **self.stats)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    '''One client, which may send any number of requests'''
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            try:
+                reply = self.server.broker.handle(json.loads(line.decode()))
+            except (ValueError, KeyError) as e:
+                reply = {'error': 'Bad request: {}'.format(e)}
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+            self.wfile.flush()
+
+
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, broker):
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise RuntimeError('A broker is already listening on {}'.format(path))
+            except socket.error:
+                os.unlink(path)     # left behind by a broker that didn't shut down cleanly
+            finally:
+                probe.close()
+        socketserver.UnixStreamServer.__init__(self, path, _Handler)
+        self.broker = broker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keeps instrument connections open for instrument_client.py')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix domain socket path')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds to wait for an instrument reply')
+    parser.add_argument('--idle', type=float, default=600, help='seconds before an unused connection is closed')
+    args = parser.parse_args()
+    broker = InstrumentBroker(args.timeout, args.idle)
+    server = BrokerServer(args.socket, broker)
+    stop = threading.Event()
+
+    def reaper():
+        while not stop.wait(min(args.idle, 60)):
+            broker.closeIdle()
+    thread = threading.Thread(target=reaper, name='broker-idle')
+    thread.daemon = True
+    thread.start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))   # clean up the socket file on kill too
+    print('Instrument broker listening on {}'.format(args.socket))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        broker.closeAll()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
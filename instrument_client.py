@@ -0,0 +1,106 @@
+# Python instrument broker client
+# Same argv interface as EthernetController2.py and
+# PrologixGpibEthernetController.py, but the command is passed to a running
+# instrument_broker.py which already has the instrument connection open:
+#
+#   python instrument_client.py <ip> <port> <gpib> <command>
+#
+# Port 1234 is taken to be a Prologix bridge, --prologix or --ethernet before
+# the arguments overrides that.
+# Queries print the reply, anything else is a write. If no broker is running
+# the command is sent directly, as the original scripts would.
+# Tools that send many commands should keep a BrokerClient open instead of
+# starting a process per command.
+# Works with both Python 2 and Python 3.
+
+import os
+import sys
+import json
+import socket
+
+DEFAULT_SOCKET = os.environ.get('INSTRUMENT_BROKER', '/tmp/instrument_broker.sock')
+
+
+class BrokerError(Exception):
+    '''Raised when the broker reports an instrument or request error'''
+
+
+class BrokerClient:
+    '''A connection to the broker, reused for any number of commands'''
+    def __init__(self, path=DEFAULT_SOCKET):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.rfile = self.sock.makefile('rb')
+
+    def request(self, **request):
+        self.sock.sendall((json.dumps(request) + '\n').encode())
+        line = self.rfile.readline()
+        if not line:
+            raise BrokerError('Broker closed the connection')
+        reply = json.loads(line.decode())
+        if 'error' in reply:
+            raise BrokerError(reply['error'])
+        return reply['reply']
+
+    def send(self, ip, port, gpib, command, prologix=None):
+        '''Returns the reply to a query, or "" for a write.
+        prologix defaults to True for port 1234'''
+        request = dict(ip=ip, port=int(port), gpib=gpib, command=command)
+        if prologix is not None:
+            request['prologix'] = prologix
+        return self.request(**request)
+
+    def stats(self):
+        return self.request(stats=True)
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+def direct(ip, port, gpib, command, prologix=None):
+    '''Sends the command without the broker'''
+    if prologix or (prologix is None and int(port) == 1234):
+        from PrologixGpibEthernetController import PrologixControl as Control
+    else:
+        from EthernetController import EthernetControl as Control
+    eCon = Control(ip, port, gpib)
+    try:
+        if "?" in command:
+            return eCon.ask(command).strip()
+        eCon.write(command)
+        return ""
+    finally:
+        eCon.sockClose()
+
+
+def main(argv):
+    if len(argv) == 2 and argv[1] == '--stats':
+        print(BrokerClient().stats())
+        return 0
+    prologix = None
+    if len(argv) > 1 and argv[1] in ('--prologix', '--ethernet'):
+        prologix = argv.pop(1) == '--prologix'
+    if len(argv) != 5:
+        print('usage: instrument_client.py [--prologix | --ethernet] <ip> <port> <gpib> <command>')
+        return 2
+    ip, port, gpib, command = argv[1:]
+    try:
+        client = BrokerClient()
+    except socket.error:
+        mesg = direct(ip, port, gpib, command, prologix)
+    else:
+        try:
+            mesg = client.send(ip, port, gpib, command, prologix)
+        except BrokerError as e:
+            sys.stderr.write('{}\n'.format(e))
+            return 1
+        finally:
+            client.close()
+    if "?" in command and 'Python Error' not in mesg:
+        print(mesg)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
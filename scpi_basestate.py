@@ -0,0 +1,87 @@
+# Python base configuration fingerprints
+# Loading a base settings file (MMEM:LOAD:STAT and *RCL) takes up to 30 s,
+# and most tests load the same one the test before them did. After a load
+# the instrument's settings are read back in one snapshot and hashed with
+# the identity of the settings file, and the fingerprint is kept per
+# instrument in a small JSON file shared by every test run on this machine.
+# When the same file is asked for again, the settings are read back and
+# hashed once more: if nothing has changed since the load the instrument is
+# already in that state and the load is skipped. The first setting made
+# after a load, by any SfuClass, drops the stored fingerprint, so settings
+# no snapshot reads still force the next load. The time a load took is
+# kept with the fingerprint, so every skip can report the time it saved.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+#
+#   states = getBaseStates()
+#   stored = states.lookup(host)
+#   if stored and stored['fingerprint'] == fingerprint(values, fileId): ...
+
+import os
+import json
+import time
+import hashlib
+import threading
+import scpi_statefile
+
+DEFAULT_PATH = os.environ.get('SCPI_BASE_STATES', os.path.expanduser('~/.scpi_base_states.json'))
+
+
+def fingerprint(values, fileId):
+    '''Hash of a settings snapshot {setting: reply} and the identity of the
+    settings file that was loaded'''
+    text = json.dumps({'values': values, 'file': fileId}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class BaseStates:
+    '''The base file last loaded on every instrument used from this machine,
+    with the fingerprint of the state it left the instrument in'''
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self):
+        return scpi_statefile.load(self.path, {})
+
+    def save(self, data):
+        scpi_statefile.save(self.path, data)      # without the file every base file is loaded again
+
+    def lookup(self, host):
+        '''Returns {'profile', 'fingerprint', 'loadTime', 'saved', 'skips'}
+        for the base file last loaded on host, or None'''
+        with self.lock:
+            return self.load().get(host)
+
+    def store(self, host, profile, fingerprint, loadTime):
+        '''Records a base file just loaded on host'''
+        with self.lock:
+            data = self.load()
+            data[host] = {'profile': profile, 'fingerprint': fingerprint, 'loadTime': loadTime,
+                          'saved': 0.0, 'skips': 0, 'time': time.time()}
+            self.save(data)
+
+    def skipped(self, host, saved):
+        '''Adds a skipped load and the seconds it saved to host's totals'''
+        with self.lock:
+            data = self.load()
+            if host in data:
+                data[host]['skips'] += 1
+                data[host]['saved'] += saved
+                self.save(data)
+
+    def forget(self, host):
+        '''Drops host, so its next base file is loaded whatever state it is in'''
+        with self.lock:
+            data = self.load()
+            if data.pop(host, None) is not None:
+                self.save(data)
+
+
+_states = {}
+
+
+def getBaseStates(path=DEFAULT_PATH):
+    '''Returns the shared BaseStates for path'''
+    if path not in _states:
+        _states[path] = BaseStates(path)
+    return _states[path]
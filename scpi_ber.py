@@ -0,0 +1,144 @@
+# Python BER pass/fail decisions with early termination
+# A BER check only needs to know whether the bit error rate is above or below
+# a limit, not its value to the accuracy the meter's gate is set for. Bit
+# errors are counted as a Poisson process and the counts are judged with
+# Wald's sequential probability ratio test (SPRT) of a BER of limit / ratio
+# (pass) against limit * ratio (fail): a point well inside the limit passes
+# after a few errors, or none, and a point well outside fails as soon as the
+# errors pile up, long before the gate would have finished.
+# The test can be applied after every poll of the meter: a BER at or below
+# limit / ratio fails, and one at or above limit * ratio passes, with a
+# probability of at most 1 - confidence however often the counts are looked
+# at. Between the two either decision can be made. A fixed confidence bound
+# checked after every poll would be wrong far more often than 1 - confidence,
+# so the exact Poisson bounds (berBounds) are only reported, not decided on.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+#
+#   decision = berDecision(errors, bits, 1e-7, 0.95)     # 'PASS', 'FAIL' or None
+#   bitsToPass(0, 1e-7, 0.95)                            # 2.0e7 error free bits
+
+import math
+
+PASS = 'PASS'
+FAIL = 'FAIL'
+DEFAULT_RATIO = 2.0         # BERs within a factor of this of the limit may be judged either way
+
+
+def gammaP(a, x):
+    '''Regularised lower incomplete gamma function P(a, x)'''
+    if x <= 0:
+        return 0.0
+    scale = math.exp(-x + a * math.log(x) - math.lgamma(a))
+    if x < a + 1:
+        # series
+        term = total = 1.0 / a
+        n = a
+        while abs(term) > abs(total) * 1e-15:
+            n += 1
+            term *= x / n
+            total += term
+        return total * scale
+    # continued fraction for Q(a, x), modified Lentz
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = (d, tiny)[abs(d) < tiny]
+        c = b + an / c
+        c = (c, tiny)[abs(c) < tiny]
+        d = 1 / d
+        h *= d * c
+        if abs(d * c - 1) < 1e-15:
+            break
+    return 1 - h * scale
+
+
+def poissonCdf(k, mean):
+    '''Probability of k or fewer events when mean are expected'''
+    if k < 0:
+        return 0.0
+    return 1 - gammaP(k + 1, mean)
+
+
+def solveMean(k, probability):
+    '''Returns the Poisson mean for which P(X <= k) = probability, by bisection'''
+    low, high = 0.0, k + 10.0
+    while poissonCdf(k, high) > probability:
+        high *= 2
+    for _ in range(200):
+        middle = (low + high) / 2
+        if poissonCdf(k, middle) > probability:
+            low = middle
+        else:
+            high = middle
+        if high - low <= high * 1e-12:
+            break
+    return (low + high) / 2
+
+
+def upperMean(errors, confidence):
+    '''One sided upper confidence bound on the expected errors after observing errors'''
+    return solveMean(errors, 1 - confidence)
+
+
+def lowerMean(errors, confidence):
+    '''One sided lower confidence bound on the expected errors after observing errors'''
+    if errors == 0:
+        return 0.0
+    return solveMean(errors - 1, confidence)
+
+
+def berBounds(errors, bits, confidence=0.95):
+    '''Returns the one sided (lower, upper) confidence bounds on the BER for
+    a fixed number of bits. They don't hold for a count stopped early.'''
+    if bits <= 0:
+        return 0.0, 1.0
+    return lowerMean(errors, confidence) / bits, min(upperMean(errors, confidence) / bits, 1.0)
+
+
+def sprtRates(limit, ratio=DEFAULT_RATIO):
+    '''Returns the BERs the SPRT tells apart, (pass rate, fail rate)'''
+    return limit / ratio, limit * ratio
+
+
+def sprtThresholds(confidence=0.95):
+    '''Returns the log likelihood ratios at or below which the SPRT passes
+    and at or above which it fails. By Ville's inequality the likelihood
+    ratio reaches 1 / risk under the other rate with a probability of at
+    most risk, so each decision is wrong at most 1 - confidence of the time
+    (Wald's usual log((1 - risk) / risk) only holds approximately).'''
+    risk = 1 - confidence
+    return math.log(risk), -math.log(risk)
+
+
+def logLikelihoodRatio(errors, bits, limit, ratio=DEFAULT_RATIO):
+    '''Log of how much more likely errors in bits are at the fail rate than
+    at the pass rate'''
+    good, bad = sprtRates(limit, ratio)
+    return errors * math.log(bad / good) - bits * (bad - good)
+
+
+def berDecision(errors, bits, limit, confidence=0.95, ratio=DEFAULT_RATIO):
+    '''PASS once the counts show the BER is below limit, FAIL once they show
+    it is above, or None while they could still be either. Safe to call
+    after every poll, see the module notes.'''
+    if bits <= 0:
+        return None
+    low, high = sprtThresholds(confidence)
+    llr = logLikelihoodRatio(errors, bits, limit, ratio)
+    if llr <= low:
+        return PASS
+    if llr >= high:
+        return FAIL
+    return None
+
+
+def bitsToPass(errors, limit, confidence=0.95, ratio=DEFAULT_RATIO):
+    '''Bits that have to be evaluated for a pass if no more errors occur'''
+    good, bad = sprtRates(limit, ratio)
+    return (errors * math.log(bad / good) - sprtThresholds(confidence)[0]) / (bad - good)
@@ -0,0 +1,209 @@
+# Python SCPI instrument state cache
+# A write-through shadow of instrument settings keyed by SCPI node, so that a
+# getter for a value set a moment ago doesn't need a network round trip.
+# Only settings written through this process are cached: a set command
+# marks its node as written, and the readback of a written node (normally in
+# the same message, "FREQ 474 MHz;*WAI;FREQ?") fills the cache. Nodes that
+# were never set, such as measurements and status, always go to the
+# instrument. *RST, *RCL, MMEM:LOAD and a few mode changes invalidate
+# everything, any other set invalidates its own node, parents and children.
+# There is one cache per (host, port), shared by every object controlling
+# that instrument like the scpi_pool connections, so a set made through one
+# object is seen by all of them. Another process or the front panel is not
+# seen: use fresh=True reads where that can happen.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+
+import weakref
+import threading
+
+# set commands after which nothing cached can be trusted
+WHOLESALE = ('*RST', '*RCL', 'MMEM:LOAD', 'SYST:PRES', 'DM:TRAN', 'DM:SOUR', 'FSIM:PRES', 'FSIM:LOAD', 'FSIM:STAN')
+# settings whose value follows another one
+COUPLED = {
+    'NOIS:COUP': ('NOIS:BAND', ),
+    'FSIM:REF': ('FSIM:CFD', 'FSIM:CSP'),
+}
+FAILED = ('Error', 'Timeout', '*****')
+KEY_CACHE = 4096        # headers whose node keys are remembered
+_keys = {}
+
+
+def splitScpi(text):
+    '''Splits a compound command or reply on ';' outside quoted strings'''
+    if '"' not in text and "'" not in text:
+        return [part.strip() for part in text.split(';')]
+    parts = []
+    quote = None
+    start = 0
+    for i, c in enumerate(text):
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == ';':
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+def absoluteParts(text):
+    '''Splits a compound command like splitScpi, with relative headers made
+    absolute: after ":FSIM:DEL:GRO1:PATH1:LOSS 0" a following "ADEL 0.5" is
+    ":FSIM:DEL:GRO1:PATH1:ADEL 0.5". Common commands leave the path as it is.'''
+    parts = []
+    parent = ''
+    for part in splitScpi(text):
+        if part and part[0] not in ':*&':
+            part = parent + part
+        if part and part[0] not in '*&':
+            header = part.split(' ')[0]
+            parent = header[:header.rfind(':') + 1]
+        parts.append(part)
+    return parts
+
+
+def shortNode(node):
+    '''Reduces one header node to its SCPI short form, so that ":NOISe:PHAS",
+    ":NOIS:PHASE" and "noise:phas" all address the same setting. A numeric
+    suffix of 1 is the default and is dropped.'''
+    node = node.upper()
+    name = node.rstrip('0123456789')
+    suffix = node[len(name):]
+    if len(name) > 4:
+        name = name[:(4, 3)[name[3] in 'AEIOU']]
+    return name + ('', suffix)[suffix not in ('', '1')]
+
+
+def nodeKey(header):
+    '''Normalised key for a command header, e.g. ":NOISe:IMP:FRAMe?" -> "NOIS:IMP:FRAM".
+    Keys are remembered, as the same few headers are keyed on every call.'''
+    key = _keys.get(header)
+    if key is None:
+        if len(_keys) >= KEY_CACHE:
+            _keys.clear()
+        key = _keys[header] = ':'.join(shortNode(node) for node in header.strip().strip(':?').split(':') if node)
+    return key
+
+
+def setHeaders(cmd):
+    '''Returns the headers of the set commands in a message, leaving out
+    queries and the *WAI / *OPC / *CLS synchronisation commands'''
+    headers = []
+    for part in absoluteParts(cmd):
+        header = part.split(' ')[0]
+        if header and not header.endswith('?') and header.upper() not in ('*WAI', '*OPC', '*CLS') and not header.startswith('&'):
+            headers.append(header)
+    return headers
+
+
+def related(key, other):
+    '''True if one key is the other or one of its parents'''
+    return key == other or key.startswith(other + ':') or other.startswith(key + ':')
+
+
+class StateCache:
+    '''Cached readbacks of one instrument, see getCache'''
+    def __init__(self):
+        self.listeners = []     # (weak reference to an object, function) called on sets
+        self.lock = threading.RLock()
+        self.values = {}
+        self.written = set()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'clears': 0}
+
+    def listen(self, method):
+        '''Calls the bound method with the node keys a message sets whenever
+        a message holding a set command is about to be sent, for as long as
+        the object it belongs to is alive'''
+        with self.lock:
+            self.listeners.append((weakref.ref(method.__self__), method.__func__))
+
+    def notify(self, keys):
+        with self.lock:
+            self.listeners = [(owner, function) for owner, function in self.listeners if owner() is not None]
+            listeners = list(self.listeners)
+        for owner, function in listeners:
+            instance = owner()
+            if instance is not None:
+                function(instance, keys)
+
+    def lookup(self, cmd):
+        '''Returns the cached reply to a single query such as ":FREQ?", or
+        None if it has to be sent to the instrument. Anything else (a set,
+        a compound message, a common command) is never answered here.'''
+        if ';' in cmd or not cmd.strip().endswith('?') or cmd.strip().startswith('*') or ' ' in cmd.strip():
+            return None
+        key = nodeKey(cmd)
+        with self.lock:
+            value = self.values.get(key)
+            self.stats[('misses', 'hits')[value is not None]] += 1
+            return value
+
+    def sent(self, cmd):
+        '''Forgets whatever the set commands in a message may change, and the
+        queried values, before it is sent. Called even if the exchange then
+        fails, as the instrument may still have acted on it.'''
+        headers = setHeaders(cmd)
+        with self.lock:
+            for part in absoluteParts(cmd):
+                header = part.split(' ')[0]
+                if header.endswith('?'):
+                    self.values.pop(nodeKey(header), None)
+            for header in headers:
+                self.invalidate(header)
+        if headers:
+            self.notify([nodeKey(header) for header in headers])
+
+    def received(self, cmd, reply):
+        '''Caches the readbacks in the reply to a message, for the settings
+        that have been written through this cache'''
+        queries = [part.split(' ')[0] for part in absoluteParts(cmd) if part.split(' ')[0].endswith('?')]
+        replies = splitScpi(reply)
+        if len(replies) != len(queries) or [fail for fail in FAILED if fail in reply]:
+            return
+        with self.lock:
+            for query, value in zip(queries, replies):
+                key = nodeKey(query)
+                if not query.startswith('*') and value and [w for w in self.written if related(key, w)]:
+                    self.values[key] = value
+
+    def invalidate(self, header):
+        '''Forgets what a set command may have changed'''
+        key = nodeKey(header)
+        if [w for w in WHOLESALE if key.startswith(w)]:
+            self.clear()
+            self.written.add(key)
+            return
+        self.stats['invalidations'] += 1
+        self.written.add(key)
+        coupled = COUPLED.get(key, ())
+        for cached in list(self.values):
+            if related(cached, key) or [c for c in coupled if related(cached, c)]:
+                del self.values[cached]
+
+    def clear(self):
+        '''Forgets everything, e.g. after *RST or loading a saved set-up'''
+        with self.lock:
+            self.values = {}
+            self.written = set()
+            self.stats['clears'] += 1
+
+    def report(self):
+        '''Returns the hit and miss counts'''
+        total = self.stats['hits'] + self.stats['misses']
+        rate = 100.0 * self.stats['hits'] / total if total else 0.0
+        return "Cache hits = {hits}, misses = {misses} ({rate:.0f}% hit rate), invalidations = {invalidations}, clears = {clears}".format(rate=rate, **self.stats)
+
+
+_caches = {}
+_cachesLock = threading.Lock()
+
+
+def getCache(addr):
+    '''Returns the shared state cache for an (host, port) address, creating it on first use'''
+    with _cachesLock:
+        cache = _caches.get(addr)
+        if cache is None:
+            cache = _caches[addr] = StateCache()
+        return cache
@@ -0,0 +1,128 @@
+# Python SCPI command completion
+# Waits for an instrument to report that an operation has finished instead
+# of sleeping for a fixed time. Polling uses an exponential backoff so short
+# operations return within a few milliseconds and long ones don't flood the
+# instrument with status queries. Every wait is logged with its latency and
+# the fixed sleep it replaced so the idle time removed can be seen in the log.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+
+import time
+import logging
+import scpi_recorder
+
+log = logging.getLogger('scpi.completion')
+
+ESR_OPC = 0x01          # Event Status Register bit 0, operation complete
+ESR_ERRORS = 0x3C       # query, device, execution and command error bits
+STB_ESB = 0x20          # Status Byte bit 5, event status summary
+STB_MAV = 0x10          # Status Byte bit 4, message available
+
+
+class CompletionTimeout(Exception):
+    '''Raised when an instrument does not report completion in time'''
+
+
+def joinCmd(*parts):
+    '''Joins command parts with ';' skipping empty ones'''
+    return ';'.join([part for part in parts if part])
+
+
+def statusValue(reply):
+    '''Converts a status register reply such as "+1" or "32" to an int'''
+    try:
+        return int(float(str(reply).strip().split(';')[-1]))
+    except ValueError:
+        return 0
+
+
+class CompletionWaiter:
+    '''Completion waits for one instrument.
+    query    callable sending a command and returning its reply
+    write    callable sending a command with no reply'''
+    def __init__(self, query, write=None, name='', timeout=30, initial=0.002, maximum=0.5, factor=2.0):
+        self.query = query
+        self.write = write
+        self.name = name
+        self.timeout = timeout
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.stats = {'waits': 0, 'polls': 0, 'busy': 0.0, 'saved': 0.0}
+
+    def delays(self):
+        '''Yields the backoff delays between polls'''
+        delay = self.initial
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maximum)
+
+    def pollUntil(self, predicate, timeout=None, label='poll', replaced=0):
+        '''Calls predicate with exponential backoff until it returns a true
+        value, which is returned. Raises CompletionTimeout if it never does.'''
+        timeout = (timeout, self.timeout)[timeout is None]
+        start = time.time()
+        polls = 0
+        for delay in self.delays():
+            polls += 1
+            result = predicate()
+            if result:
+                self.record(label, time.time() - start, polls, replaced)
+                return result
+            if time.time() - start + delay > timeout:
+                break
+            scpi_recorder.sleep(delay, self.name, label)
+        self.record(label, time.time() - start, polls, replaced)
+        raise CompletionTimeout('{} - {} not complete after {} s'.format(self.name, label, timeout))
+
+    def waitOpc(self, cmd, replaced=0):
+        '''Appends *OPC? to cmd, the reply arrives when the operation is done.
+        Cheapest method when the connection can be held for the whole wait.'''
+        start = time.time()
+        reply = self.query(joinCmd(cmd, '*OPC?'))
+        self.record(cmd, time.time() - start, 1, replaced)
+        return reply
+
+    def waitEsr(self, cmd, replaced=0):
+        '''Sends cmd followed by *OPC and polls *ESR? until the operation
+        complete bit is set. Leaves the connection free between polls, which
+        suits bridges such as the Prologix that can't block on a reply.
+        Returns the ESR value so error bits can be checked by the caller.'''
+        self.write(joinCmd(cmd, '*OPC'))
+        return self.pollUntil(lambda: self.esrDone(), label=cmd, replaced=replaced)
+
+    def esrDone(self):
+        esr = statusValue(self.query('*ESR?'))
+        return esr if esr & ESR_OPC else 0
+
+    def waitStb(self, cmd, replaced=0):
+        '''Enables OPC in the event status enable register and polls the
+        status byte for the event summary bit. *STB? doesn't clear anything,
+        so it is safe to poll; *ESR? is read once at the end to clear it.'''
+        self.write(joinCmd('*ESE {}'.format(ESR_OPC | ESR_ERRORS), cmd, '*OPC'))
+        self.pollUntil(lambda: statusValue(self.query('*STB?')) & STB_ESB, label=cmd, replaced=replaced)
+        return statusValue(self.query('*ESR?'))
+
+    def waitSrq(self, cmd, srq, serialPoll, replaced=0):
+        '''Enables a service request on completion and polls the SRQ line.
+        srq          callable returning a true value while SRQ is asserted (e.g. Prologix ++srq)
+        serialPoll   callable returning the status byte and clearing the request (e.g. ++spoll)'''
+        self.write(joinCmd('*CLS;*ESE {};*SRE {}'.format(ESR_OPC | ESR_ERRORS, STB_ESB), cmd, '*OPC'))
+        self.pollUntil(lambda: statusValue(srq()), label=cmd, replaced=replaced)
+        return statusValue(serialPoll())
+
+    def record(self, label, seconds, polls, replaced):
+        '''Logs a completion latency and the fixed delay it replaced'''
+        scpi_recorder.record(self.name, scpi_recorder.WAIT, label, '{} polls'.format(polls), time.time() - seconds)
+        self.stats['waits'] += 1
+        self.stats['polls'] += polls
+        self.stats['busy'] += seconds
+        saved = max(replaced - seconds, 0)
+        self.stats['saved'] += saved
+        if replaced:
+            log.info('%s %s completed in %.3f s after %d polls, %.3f s idle removed', self.name, label, seconds, polls, saved)
+        else:
+            log.info('%s %s completed in %.3f s after %d polls', self.name, label, seconds, polls)
+
+    def report(self):
+        '''Returns a summary of all waits on this instrument'''
+        return "Waits = {waits}, Polls = {polls}, Busy = {busy:.3f} s, Idle removed = {saved:.3f} s".format(**self.stats)
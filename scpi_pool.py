@@ -0,0 +1,256 @@
+# Python SCPI connection pool
+# Keeps TCP connections to instruments open between commands so a set-up of
+# dozens of SCPI commands pays for one connect instead of one per command.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+
+import socket
+import select
+import threading
+import time
+import scpi_reader
+
+KEEPALIVE_IDLE = 30         # seconds before the OS sends the first keep-alive probe
+MAX_IDLE = 300              # seconds an idle connection is trusted without a health check
+
+
+class PooledConnection:
+    '''A single persistent socket to an instrument.
+    Access is serialised with a per-connection lock so a command and its
+    reply can never interleave with another thread's traffic.'''
+    def __init__(self, pool, connId):
+        self.pool = pool
+        self.connId = connId
+        self.lock = threading.RLock()
+        self.sock = None
+        self.lastUsed = 0
+        self.reader = None
+
+    def connect(self):
+        '''Opens the socket and enables TCP keep-alive'''
+        self.close()
+        sock = socket.create_connection(self.pool.addr, self.pool.connectTimeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+        self.sock = sock
+        self.reader = scpi_reader.ResponseReader(sock, self.pool.bufsize)
+        self.lastUsed = time.time()
+        self.pool.count('opened')
+
+    def close(self):
+        '''Closes the socket, the next command will reconnect'''
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except socket.error:
+                pass
+            self.sock = None
+            self.pool.count('closed')
+
+    def healthy(self):
+        '''Returns False if the socket is closed, has been idle too long or has
+        unread data waiting (a late reply that would corrupt the next query)'''
+        if self.sock is None or self.reader.pending():
+            return False
+        if time.time() - self.lastUsed > MAX_IDLE:
+            return False
+        try:
+            readable = select.select([self.sock], [], [], 0)[0]
+        except (socket.error, ValueError):
+            return False
+        return not readable
+
+    def ensure(self):
+        '''Reconnects if the health check fails'''
+        if not self.healthy():
+            if self.sock is not None:
+                self.pool.count('reconnects')
+            self.connect()
+
+    def send(self, cmd, timeout=None):
+        '''Sends cmd terminated with a new line, reconnecting once if the
+        instrument has dropped the connection'''
+        data = cmd if isinstance(cmd, bytes) else cmd.encode()
+        with self.lock:
+            self.ensure()
+            self.sock.settimeout(timeout)
+            try:
+                self.sock.sendall(data + b'\n')
+            except socket.error:
+                self.pool.count('reconnects')
+                self.connect()
+                self.sock.settimeout(timeout)
+                self.sock.sendall(data + b'\n')
+            self.lastUsed = time.time()
+            self.pool.count('commands')
+
+    def sendBlock(self, cmd, data, timeout=None):
+        '''Sends cmd followed by data as an IEEE 488.2 definite length block,
+        e.g. ':MMEM:DATA "D:\\file.wv",' then #<n><length><data>. data can be
+        a memoryview of a memory mapped file, it is sent without a copy.
+        A failure closes the connection, as the instrument is left part way
+        through a block.'''
+        length = str(len(data)).encode()
+        header = (cmd if isinstance(cmd, bytes) else cmd.encode()) + b'#' + str(len(length)).encode() + length
+        with self.lock:
+            self.ensure()
+            self.sock.settimeout(timeout)
+            try:
+                self.sock.sendall(header)
+                self.sock.sendall(data)
+                self.sock.sendall(b'\n')
+            except socket.error:
+                self.close()
+                raise
+            self.lastUsed = time.time()
+            self.pool.count('commands')
+
+    def read(self, method, timeout):
+        '''Runs a reader method. A timeout or socket error closes the
+        connection so that a late reply cannot be returned as the answer to
+        the next command.'''
+        with self.lock:
+            try:
+                self.sock.settimeout(timeout)
+                result = method()
+            except (socket.timeout, socket.error):
+                self.close()
+                raise
+            self.lastUsed = time.time()
+            return result
+
+    def readline(self, timeout=None):
+        '''Reads one reply up to the new line terminator'''
+        return self.read(lambda: self.reader.readline(), timeout)
+
+    def readBlock(self, timeout=None, into=None):
+        '''Reads an IEEE 488.2 binary block reply and returns its payload'''
+        return self.read(lambda: self.reader.readBlock(into), timeout)
+
+    def query(self, cmd, timeout=None):
+        '''Sends cmd and returns the reply without its terminator'''
+        with self.lock:
+            self.send(cmd, timeout)
+            return self.readline(timeout)
+
+    def queryBlock(self, cmd, timeout=None, into=None):
+        '''Sends cmd and returns the payload of its binary block reply'''
+        with self.lock:
+            self.send(cmd, timeout)
+            return self.readBlock(timeout, into)
+
+    def pipeline(self, cmds, timeout=None):
+        '''Sends cmds in a single write, one per line, then returns the
+        replies to the queries among them in order. For instruments that
+        take one command per line and can't parse compound messages.'''
+        queries = [cmd for cmd in cmds if cmd.strip().split(' ')[0].endswith('?')]
+        with self.lock:
+            self.send('\n'.join(cmds), timeout)
+            return [self.readline(timeout) for _ in queries]
+
+
+class ConnectionPool:
+    '''Pool of persistent connections to one instrument address'''
+    def __init__(self, addr, size=2, connectTimeout=10, bufsize=4096):
+        self.addr = addr
+        self.size = size
+        self.connectTimeout = connectTimeout
+        self.bufsize = bufsize
+        self.stats = {'opened': 0, 'closed': 0, 'reconnects': 0, 'commands': 0}
+        self._lock = threading.RLock()         # also guards stats, counted from every connection
+        self._idle = []
+        self._all = []
+
+    def acquire(self):
+        '''Takes an idle connection, or creates a new one.
+        Connections beyond the pool size are still handed out but are closed
+        rather than kept when released.'''
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            conn = PooledConnection(self, len(self._all))
+            self._all.append(conn)
+            return conn
+
+    def release(self, conn):
+        '''Returns a connection to the pool. One leased when closeAll ran is
+        no longer the pool's and is closed.'''
+        with self._lock:
+            if conn in self._all and len(self._idle) < self.size:
+                self._idle.append(conn)
+            else:
+                conn.close()
+                if conn in self._all:
+                    self._all.remove(conn)
+
+    def count(self, name):
+        '''Adds one to a stats counter'''
+        with self._lock:
+            self.stats[name] += 1
+
+    def connection(self):
+        '''Context manager form of acquire/release'''
+        return _Lease(self)
+
+    def send(self, cmd, timeout=None):
+        with self.connection() as conn:
+            conn.send(cmd, timeout)
+
+    def query(self, cmd, timeout=None):
+        with self.connection() as conn:
+            return conn.query(cmd, timeout)
+
+    def queryBlock(self, cmd, timeout=None, into=None):
+        with self.connection() as conn:
+            return conn.queryBlock(cmd, timeout, into)
+
+    def pipeline(self, cmds, timeout=None):
+        with self.connection() as conn:
+            return conn.pipeline(cmds, timeout)
+
+    def closeAll(self):
+        '''Closes every connection in the pool'''
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._idle = []
+            self._all = []
+
+    def report(self):
+        '''Returns a summary of connections opened versus commands sent'''
+        return "Connections opened = {opened}, Commands sent = {commands}, Reconnects = {reconnects}".format(**self.stats)
+
+
+class _Lease:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.pool.release(self.conn)
+        return False
+
+
+_pools = {}
+_poolsLock = threading.Lock()
+
+
+def getPool(addr, **kwargs):
+    '''Returns the shared pool for an (host, port) address, creating it on first use'''
+    with _poolsLock:
+        pool = _pools.get(addr)
+        if pool is None:
+            pool = _pools[addr] = ConnectionPool(addr, **kwargs)
+        return pool
+
+
+def closeAllPools():
+    '''Closes every pooled connection, e.g. at the end of an overnight run'''
+    with _poolsLock:
+        for pool in _pools.values():
+            pool.closeAll()
@@ -0,0 +1,86 @@
+# Python instrument capability profiles
+# Options and identity read from an instrument don't change between test
+# runs, so they are kept in a small JSON file instead of being queried every
+# time a control class is created. Profiles are keyed by instrument identity,
+# the *IDN? serial number and firmware version, so a firmware update or a
+# different unit gets a fresh profile; the host entry only says which
+# identity was last seen at an address. Callers that pass the *IDN? reply
+# to lookup get the profile of that identity, so a unit swapped at the same
+# address inside the TTL isn't given the options of the old one. Entries
+# older than the TTL are queried again. The file is written through
+# scpi_statefile.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+
+import os
+import time
+import threading
+import scpi_statefile
+
+DEFAULT_PATH = os.environ.get('SCPI_PROFILE_CACHE', os.path.expanduser('~/.scpi_profiles.json'))
+DEFAULT_TTL = 24 * 3600
+
+
+def identityKey(idn):
+    '''Returns "serial/firmware" from an *IDN? reply such as
+    "Rohde&Schwarz,SFU,2110.2500k02/100953,02.10.150"'''
+    fields = [field.strip() for field in idn.split(',')]
+    if len(fields) < 4:
+        return idn.strip()
+    return '{}/{}'.format(fields[2], fields[3])
+
+
+class ProfileCache:
+    '''The capability profiles of every instrument used from this machine'''
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+    def load(self):
+        data = scpi_statefile.load(self.path, {})
+        data.setdefault('profiles', {})
+        data.setdefault('hosts', {})
+        return data
+
+    def lookup(self, host, idn=None):
+        '''Returns the profile of the instrument at host, or None if there is
+        none or it is older than the TTL. With idn, the *IDN? reply just read
+        from host, the profile of that identity is returned; without it the
+        identity last seen at host is trusted.'''
+        with self.lock:
+            data = self.load()
+        key = identityKey(idn) if idn is not None else data['hosts'].get(host, '')
+        profile = data['profiles'].get(key)
+        if profile is None or time.time() - profile.get('saved', 0) > self.ttl:
+            return None
+        return profile
+
+    def store(self, host, idn, options):
+        '''Saves the identity and options read from the instrument at host and
+        returns the new profile'''
+        profile = {'idn': idn.strip(), 'options': [option.strip() for option in options if option.strip()],
+                   'saved': time.time()}
+        key = identityKey(idn)
+        with self.lock:
+            data = self.load()
+            data['profiles'][key] = profile
+            data['hosts'][host] = key
+            scpi_statefile.save(self.path, data)     # an unwritable cache only costs the queries next time
+        return profile
+
+    def forget(self, host):
+        '''Drops the host entry so the next lookup queries the instrument'''
+        with self.lock:
+            data = self.load()
+            if data['hosts'].pop(host, None) is not None:
+                scpi_statefile.save(self.path, data)
+
+
+_profiles = {}
+
+
+def getProfiles(path=DEFAULT_PATH, ttl=DEFAULT_TTL):
+    '''Returns the shared ProfileCache for path'''
+    if path not in _profiles:
+        _profiles[path] = ProfileCache(path, ttl)
+    return _profiles[path]
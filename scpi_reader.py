@@ -0,0 +1,175 @@
+# Python SCPI response reader
+# Buffered socket reader shared by the instrument controllers.
+# Data is received straight into one reusable bytearray with recv_into, the
+# terminator search only looks at bytes that arrived since the last search,
+# and IEEE 488.2 binary blocks are read into a single preallocated buffer,
+# so large traces and waveform dumps are read without quadratic copying.
+# Works with both Python 2 (sfuClass2, SCPI_socket) and Python 3 callers.
+
+import select
+import socket
+
+BLOCK_START = ord('#')
+TERMINATOR_WAIT = 0.05    # seconds to wait for the terminator after a binary block
+
+
+class BlockFormatError(ValueError):
+    '''Raised when a reply does not start with a valid IEEE 488.2 block header'''
+
+
+class ConnectionClosed(socket.error):
+    '''Raised when the instrument closes the connection before a reply is complete'''
+
+
+def parseBlock(data):
+    '''Returns a memoryview of the payload of an IEEE 488.2 block already held
+    in memory, without copying it.
+    Definite length:    #<n><length><payload>
+    Indefinite length:  #0<payload><NL>'''
+    view = memoryview(data)
+    if len(view) < 2 or view[0:1].tobytes() != b'#':
+        raise BlockFormatError('Reply is not a binary block')
+    digits = int(view[1:2].tobytes())
+    if digits == 0:
+        end = len(view)
+        if view[end - 1:end].tobytes() == b'\n':
+            end -= 1
+        return view[2:end]
+    length = int(view[2:2 + digits].tobytes())
+    start = 2 + digits
+    if len(view) < start + length:
+        raise BlockFormatError('Block is {} bytes, header says {}'.format(len(view) - start, length))
+    return view[start:start + length]
+
+
+class ResponseReader:
+    '''Reads terminated replies and binary blocks from a connected socket'''
+    def __init__(self, sock, bufsize=65536, terminator=b'\n'):
+        self.sock = sock
+        self.terminator = terminator
+        self.buf = bytearray(bufsize)
+        self.view = memoryview(self.buf)
+        self.start = 0      # first unread byte
+        self.end = 0        # end of received data
+        self.scanned = 0    # terminator search has covered start..scanned
+
+    def pending(self):
+        '''Number of received bytes not yet returned'''
+        return self.end - self.start
+
+    def clear(self):
+        '''Discards anything received but not yet read'''
+        self.start = self.end = self.scanned = 0
+
+    def fill(self):
+        '''Receives more data into the free end of the buffer, compacting or
+        growing it only when it is full'''
+        if self.end == len(self.buf):
+            unread = self.end - self.start
+            if self.start:
+                self.view[:unread] = self.view[self.start:self.end].tobytes()
+            else:
+                grown = bytearray(2 * len(self.buf))
+                grown[:unread] = self.view[:unread]
+                self.buf, self.view = grown, memoryview(grown)
+            self.scanned -= self.start
+            self.start, self.end = 0, unread
+        count = self.sock.recv_into(self.view[self.end:])
+        if not count:
+            raise ConnectionClosed('Connection closed by instrument')
+        self.end += count
+        return count
+
+    def readline(self):
+        '''Returns the next reply without its terminator'''
+        while True:
+            index = self.buf.find(self.terminator, self.scanned, self.end)
+            if index >= 0:
+                line = bytes(self.buf[self.start:index])
+                self.start = self.scanned = index + len(self.terminator)
+                if self.start == self.end:
+                    self.clear()
+                return line
+            self.scanned = max(self.end - len(self.terminator) + 1, self.start)
+            self.fill()
+
+    def take(self, count, into=None):
+        '''Returns the next count bytes. When into (a writable buffer) is
+        given the bytes are written there, anything not already buffered is
+        received directly into it.'''
+        out = into if into is not None else bytearray(count)
+        outView = memoryview(out)
+        buffered = min(self.pending(), count)
+        outView[:buffered] = self.view[self.start:self.start + buffered]
+        self.start += buffered
+        self.scanned = max(self.scanned, self.start)
+        got = buffered
+        while got < count:
+            received = self.sock.recv_into(outView[got:count])
+            if not received:
+                raise ConnectionClosed('Connection closed by instrument')
+            got += received
+        if self.start == self.end:
+            self.clear()
+        return out
+
+    def readBlock(self, into=None):
+        '''Reads an IEEE 488.2 binary block reply and returns its payload.
+        The trailing terminator after a definite length block is consumed.
+        An indefinite length block (#0) ends at a terminator that is the last
+        byte received with nothing more waiting on the socket, i.e. the
+        message END.'''
+        while self.pending() < 2:
+            self.fill()
+        if self.buf[self.start] != BLOCK_START:
+            raise BlockFormatError('Reply is not a binary block: {!r}'.format(bytes(self.buf[self.start:self.end][:20])))
+        digits = int(bytes(self.buf[self.start + 1:self.start + 2]))
+        if digits == 0:
+            self.start += 2
+            self.scanned = self.start
+            return self.readIndefinite()
+        while self.pending() < 2 + digits:
+            self.fill()
+        length = int(bytes(self.buf[self.start + 2:self.start + 2 + digits]))
+        self.start += 2 + digits
+        payload = self.take(length, into)
+        self.skipTerminator()
+        return payload
+
+    def readIndefinite(self):
+        size = len(self.terminator)
+        while True:
+            if self.end - self.start >= size and self.buf[self.end - size:self.end] == self.terminator and not self.waiting():
+                payload = bytearray(self.view[self.start:self.end - size])
+                self.clear()
+                return payload
+            self.fill()
+
+    def waiting(self, timeout=0):
+        '''True if more data is waiting on the socket'''
+        try:
+            return bool(select.select([self.sock], [], [], timeout)[0])
+        except (socket.error, ValueError):
+            return False
+
+    def skipTerminator(self):
+        '''Consumes the terminator that follows a definite length block.
+        It normally arrives with the block; allow a moment for it so it
+        isn't left behind as an empty reply to the next query.'''
+        size = len(self.terminator)
+        if self.pending() < size and self.waiting(TERMINATOR_WAIT):
+            self.fill()
+        if self.buf[self.start:self.start + size] == self.terminator:
+            self.start += size
+            self.scanned = max(self.scanned, self.start)
+        if self.start == self.end:
+            self.clear()
+
+    def readResponse(self):
+        '''Returns a binary block payload or a terminated text reply,
+        whichever the instrument sent'''
+        while self.pending() < 1:
+            self.fill()
+        if self.buf[self.start] == BLOCK_START:
+            return self.readBlock()
+        return self.readline()
@@ -0,0 +1,298 @@
+# Python SCPI traffic recorder, replay and analysis
+# Records every command and reply sent through SfuClass, EthernetControl and
+# PrologixControl, with its start time, duration and connection, plus the
+# fixed sleeps and completion waits between them, to a compact append-only
+# binary log. A recorded production session can then be replayed against the
+# scpi_simulator (or a spare instrument) at real or accelerated speed, and
+# analysed to see where its wall time went.
+# Recording is off unless start() is called or SCPI_RECORD names a log file,
+# so an instrumented call costs a single global lookup when not recording.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+#
+#   SCPI_RECORD=session.rec python run_tests.py
+#   python scpi_recorder.py analyse session.rec
+#   python scpi_recorder.py replay session.rec --simulator sfu --speed 10
+#
+# Log format: the 8 byte MAGIC, then records of a RECORD header (start time,
+# duration, kind, connection id, command length, reply length) followed by
+# the command and reply bytes. A CONNECTION record, whose command is the
+# connection label, precedes the first record of each connection.
+
+import os
+import sys
+import time
+import struct
+import atexit
+import argparse
+import threading
+from collections import namedtuple
+
+MAGIC = b'SCPIREC1'
+RECORD = struct.Struct('<dfBHII')
+WRITE, QUERY, SLEEP, WAIT, CONNECTION, BLOCK = range(6)
+KINDS = ('write', 'query', 'sleep', 'wait', 'connection', 'block')
+
+Record = namedtuple('Record', 'start duration kind connection command reply')
+
+active = None           # the Recorder in use, None when not recording
+_labels = {}
+_labelsLock = threading.Lock()
+
+
+def toBytes(text):
+    if text is None:
+        return b''
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8', 'replace')
+
+
+def connectionLabel(addr):
+    '''Returns a new label for a connection to (host, port), e.g.
+    "sfu1:5025#2", so that two connections to one instrument stay apart'''
+    base = '{}:{}'.format(addr[0], addr[1])
+    with _labelsLock:
+        _labels[base] = _labels.get(base, 0) + 1
+        return '{}#{}'.format(base, _labels[base])
+
+
+class Recorder:
+    '''Appends records to one log file'''
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def record(self, connection, kind, command, reply, start, duration):
+        command = toBytes(command)
+        reply = toBytes(reply)
+        with self.lock:
+            if self.file is None:
+                return
+            connId = self.ids.get(connection)
+            if connId is None:
+                connId = self.ids[connection] = len(self.ids)
+                label = toBytes(connection)
+                self.file.write(RECORD.pack(start, 0, CONNECTION, connId, len(label), 0) + label)
+            self.file.write(RECORD.pack(start, duration, kind, connId, len(command), len(reply)) + command + reply)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def start(path):
+    '''Starts recording to path, appending to an existing log'''
+    global active
+    stop()
+    active = Recorder(path)
+    return active
+
+
+def stop():
+    global active
+    if active is not None:
+        active.close()
+        active = None
+
+
+def record(connection, kind, command, reply, start, end=None):
+    '''Records one exchange that started at start (a time.time() value)'''
+    if active is not None:
+        end = time.time() if end is None else end
+        active.record(connection, kind, command, reply, start, end - start)
+
+
+def sleep(seconds, connection='', label='sleep'):
+    '''time.sleep that shows up in the recording'''
+    if seconds <= 0:
+        return
+    begin = time.time()
+    time.sleep(seconds)
+    record(connection, SLEEP, label, None, begin)
+
+
+def read(path):
+    '''Yields the records in a log, connection labels resolved'''
+    labels = {}
+    with open(path, 'rb') as log:
+        if log.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a SCPI recording'.format(path))
+        while True:
+            header = log.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return          # end of log, or a record cut short by a crash
+            begin, duration, kind, connId, commandLen, replyLen = RECORD.unpack(header)
+            command = log.read(commandLen).decode('utf-8', 'replace')
+            reply = log.read(replyLen)
+            if kind != BLOCK:
+                reply = reply.decode('utf-8', 'replace')
+            if kind == CONNECTION:
+                labels[connId] = command
+                continue
+            yield Record(begin, duration, kind, labels.get(connId, str(connId)), command, reply)
+
+
+def headerOf(command):
+    '''Short node of the first command in a message, for grouping'''
+    import scpi_cache
+    header = command.strip().split(' ')[0].split(';')[0]
+    return header.upper() if header.startswith('*') or header.startswith('++') else scpi_cache.nodeKey(header)
+
+
+def analyse(path, top=10):
+    '''Returns where the wall time of a recorded session went:
+    network       round trips at the fastest reply seen on each connection
+    instrument    query time above that, i.e. the instrument processing
+    writes        time spent sending writes
+    sleeps        fixed sleeps and completion poll backoff
+    host          everything between the recorded calls
+    Completion waits overlap the queries and sleeps they are made of, so
+    they are reported separately.'''
+    records = list(read(path))
+    if not records:
+        return {'records': 0}
+    first = min(rec.start for rec in records)
+    last = max(rec.start + rec.duration for rec in records)
+    fastest = {}
+    for rec in records:
+        if rec.kind in (QUERY, BLOCK):
+            fastest[rec.connection] = min(fastest.get(rec.connection, rec.duration), rec.duration)
+    totals = dict.fromkeys(('network', 'instrument', 'writes', 'sleeps', 'waits'), 0.0)
+    commands = {}
+    counts = dict.fromkeys(KINDS[:4] + KINDS[5:], 0)
+    for rec in records:
+        counts[KINDS[rec.kind]] += 1
+        if rec.kind in (QUERY, BLOCK):
+            network = fastest[rec.connection]
+            totals['network'] += network
+            totals['instrument'] += rec.duration - network
+        elif rec.kind == WRITE:
+            totals['writes'] += rec.duration
+        elif rec.kind == SLEEP:
+            totals['sleeps'] += rec.duration
+        elif rec.kind == WAIT:
+            totals['waits'] += rec.duration
+            continue
+        key = (KINDS[rec.kind], headerOf(rec.command))
+        calls, seconds = commands.get(key, (0, 0.0))
+        commands[key] = (calls + 1, seconds + rec.duration)
+    wall = last - first
+    totals['host'] = max(wall - totals['network'] - totals['instrument'] - totals['writes'] - totals['sleeps'], 0.0)
+    slowest = sorted(commands.items(), key=lambda item: -item[1][1])[:top]
+    return {'records': len(records), 'wall': wall, 'counts': counts, 'totals': totals,
+            'connections': fastest, 'slowest': slowest}
+
+
+def printAnalysis(result):
+    if not result['records']:
+        print('No records')
+        return
+    wall = result['wall'] or 1e-9
+    print('Session {:.3f} s, {}'.format(result['wall'], ', '.join('{} {}'.format(kind, count)
+                                                                  for kind, count in sorted(result['counts'].items()))))
+    for name in ('network', 'instrument', 'writes', 'sleeps', 'host'):
+        seconds = result['totals'][name]
+        print('  {:<12} {:10.3f} s {:6.1f}%'.format(name, seconds, 100 * seconds / wall))
+    print('  {:<12} {:10.3f} s (completion waits, made of the above)'.format('waits', result['totals']['waits']))
+    for connection, seconds in sorted(result['connections'].items()):
+        print('  {:<24} fastest reply {:.3f} ms'.format(connection, 1000 * seconds))
+    print('Most time spent in:')
+    for (kind, header), (calls, seconds) in result['slowest']:
+        print('  {:<6} {:<28} {:6d} calls {:10.3f} s'.format(kind, header, calls, seconds))
+
+
+def replay(path, addr, speed=1.0, timeout=30):
+    '''Sends the recorded writes and queries to the instrument or simulator
+    at addr, each recorded connection on its own connection. The recorded
+    gaps between commands are kept, divided by speed; speed 0 sends them
+    back to back. Returns the timing and the number of replies that differ
+    from the recording.'''
+    import scpi_pool
+    records = [rec for rec in read(path) if rec.kind in (WRITE, QUERY, BLOCK)]
+    pools = {}
+    result = {'commands': len(records), 'mismatches': 0, 'errors': 0, 'recorded': 0.0, 'replayed': 0.0}
+    if not records:
+        return result
+    first = records[0].start
+    result['recorded'] = records[-1].start + records[-1].duration - first
+    began = time.time()
+    try:
+        for rec in records:
+            if speed:
+                wait = (rec.start - first) / speed - (time.time() - began)
+                if wait > 0:
+                    time.sleep(wait)
+            pool = pools.get(rec.connection)
+            if pool is None:
+                pool = pools[rec.connection] = scpi_pool.ConnectionPool(addr, size=1)
+            try:
+                if rec.kind == WRITE:
+                    pool.send(rec.command, timeout)
+                elif '\n' in rec.command:
+                    # a pipelined exchange, e.g. SfuClass with a Dektec
+                    replies = pool.pipeline(rec.command.split('\n'), timeout)
+                    if b'\n'.join(toBytes(reply).strip() for reply in replies) != toBytes(rec.reply):
+                        result['mismatches'] += 1
+                elif rec.kind == BLOCK:
+                    if len(pool.queryBlock(rec.command, timeout)) != len(rec.reply):
+                        result['mismatches'] += 1
+                elif toBytes(pool.query(rec.command, timeout)).strip() != toBytes(rec.reply).strip():
+                    result['mismatches'] += 1
+            except (IOError, OSError):
+                result['errors'] += 1
+    finally:
+        result['replayed'] = time.time() - began
+        for pool in pools.values():
+            pool.closeAll()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyse or replay a SCPI recording')
+    parser.add_argument('action', choices=('analyse', 'replay', 'dump'))
+    parser.add_argument('log')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=5025)
+    parser.add_argument('--simulator', choices=('sfu', 'dmm', 'prologix'), help='replay against an in-process simulator')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulator latency in seconds')
+    parser.add_argument('--opc-delay', type=float, default=0.0, help='simulator operation time in seconds')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed-up, 0 for back to back')
+    parser.add_argument('--top', type=int, default=10, help='slowest commands listed by analyse')
+    args = parser.parse_args()
+    if args.action == 'analyse':
+        printAnalysis(analyse(args.log, args.top))
+    elif args.action == 'dump':
+        for rec in read(args.log):
+            reply = ('{} bytes'.format(len(rec.reply)), rec.reply[:60])[rec.kind != BLOCK]
+            print('{:.6f} {:9.3f} ms {:<5} {:<20} {} {}'.format(rec.start, 1000 * rec.duration, KINDS[rec.kind],
+                                                               rec.connection, rec.command, reply))
+    else:
+        server = None
+        addr = (args.host, args.port)
+        if args.simulator:
+            import scpi_simulator
+            server = scpi_simulator.startSimulator(args.simulator, latency=args.latency, opcDelay=args.opc_delay)
+            addr = server.server_address
+        try:
+            result = replay(args.log, addr, args.speed)
+        finally:
+            if server is not None:
+                server.stop()
+        print('Replayed {commands} commands in {replayed:.3f} s (recorded {recorded:.3f} s), '
+              '{mismatches} replies differ, {errors} errors'.format(**result))
+    return 0
+
+
+if os.environ.get('SCPI_RECORD'):
+    start(os.environ['SCPI_RECORD'])
+atexit.register(stop)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# Python background instrument sampler
+# Watches instrument health readings (BER, BER meter state, TS player wraps
+# and errors, ...) on a background thread instead of the test polling them
+# inline. The sampler has a connection of its own from the instrument's pool,
+# so its polls never queue behind the test's set-ups, and reads every metric
+# in one compound query per poll. The poll interval shortens to the minimum
+# as soon as anything changes and stretches back towards the maximum while
+# nothing does, so transients are caught without flooding the instrument.
+# Each metric keeps a fixed size NumPy ring buffer of (time, value) samples;
+# a metric whose first reading isn't a number, such as a meter state, has
+# its readings stored as codes that are turned back into text, and a text
+# reading of a numeric metric (an error) is stored as NaN. Windowed statistics and change events can be
+# read from the test thread at any time.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+#
+#   sampler = sfu.sampler(onChange=lambda event: log.warning('%s', event))
+#   sampler.start()
+#   ...
+#   print sampler.statistics('berRead', 10)     # the last 10 seconds
+#   sampler.stop()
+
+import time
+import threading
+from collections import deque, namedtuple
+import numpy as np
+import scpi_recorder
+from scpi_cache import splitScpi
+
+Event = namedtuple('Event', 'time metric old new')
+
+
+def toText(reply):
+    return reply.decode('utf-8', 'replace') if isinstance(reply, bytes) else reply
+
+
+def numericValue(reply):
+    '''Returns a reply as a float, or None if it isn't a number'''
+    try:
+        return float(reply)
+    except ValueError:
+        return None
+
+
+class RingBuffer:
+    '''The last size (time, value) samples of one metric in fixed memory'''
+    def __init__(self, size):
+        self.size = size
+        self.times = np.zeros(size)
+        self.values = np.full(size, np.nan)
+        self.count = 0
+
+    def append(self, when, value):
+        index = self.count % self.size
+        self.times[index] = when
+        self.values[index] = value
+        self.count += 1
+
+    def window(self, seconds=None):
+        '''Returns copies of the times and values in time order, only those
+        of the last seconds if given'''
+        held = min(self.count, self.size)
+        order = np.arange(self.count - held, self.count) % self.size
+        times = self.times[order]
+        values = self.values[order]
+        if seconds is not None and held:
+            recent = times >= times[-1] - seconds
+            times, values = times[recent], values[recent]
+        return times, values
+
+
+class Sampler:
+    '''Polls a set of queries on a dedicated connection.
+    pool        the instrument's scpi_pool.ConnectionPool
+    metrics     {name: plain query}, e.g. {'berRead': ':READ:BER?'}
+    interval    (minimum, maximum) seconds between polls
+    size        samples kept per metric
+    onChange    called with an Event, on the sampler thread, when a value changes
+    pipelined   one query per line for instruments that can't parse compound messages'''
+    def __init__(self, pool, metrics, timeout=5, interval=(0.05, 2.0), size=4096, onChange=None,
+                 pipelined=False, events=1000):
+        self.pool = pool
+        self.names = sorted(metrics)
+        self.queries = [metrics[name] for name in self.names]
+        self.timeout = timeout
+        self.minimum, self.maximum = interval
+        self.interval = self.minimum
+        self.onChange = onChange
+        self.pipelined = pipelined
+        self.buffers = dict((name, RingBuffer(size)) for name in self.names)
+        self.codes = {}         # text metric -> {reading: code}
+        self.texts = {}         # text metric -> {code: reading}
+        self.last = {}
+        self.changes = deque(maxlen=events)
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.label = scpi_recorder.connectionLabel(pool.addr) + ' sampler'
+        self.stats = {'polls': 0, 'errors': 0, 'changes': 0}
+
+    def start(self):
+        '''Starts sampling in the background'''
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name=self.label)
+        self.thread.daemon = True       # never keeps a finished test run alive
+        self.thread.start()
+
+    def stop(self):
+        '''Stops sampling and hands the connection back to the pool'''
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def run(self):
+        conn = self.pool.acquire()
+        try:
+            while not self.stopping.is_set():
+                changed = self.poll(conn)
+                self.interval = (min(self.interval * 1.5, self.maximum), self.minimum)[changed]
+                self.stopping.wait(self.interval)
+        finally:
+            self.pool.release(conn)
+
+    def poll(self, conn):
+        '''Reads every metric once, returns True if any of them changed'''
+        start = time.time()
+        cmd = ';'.join(self.queries)
+        try:
+            if self.pipelined:
+                replies = [toText(reply).strip() for reply in conn.pipeline(self.queries, self.timeout)]
+            else:
+                replies = splitScpi(toText(conn.query(cmd, self.timeout)))
+        except (IOError, OSError):
+            self.stats['errors'] += 1       # the connection was closed, the next poll reconnects
+            return False
+        when = time.time()
+        scpi_recorder.record(self.label, scpi_recorder.QUERY, cmd, ';'.join(replies), start, when)
+        self.stats['polls'] += 1
+        if len(replies) != len(self.queries):
+            self.stats['errors'] += 1
+            return False
+        events = []
+        with self.lock:
+            for name, reply in zip(self.names, replies):
+                value = numericValue(reply)
+                if name not in self.last and value is None:
+                    self.codes[name], self.texts[name] = {}, {}
+                if name in self.codes:
+                    value = self.codes[name].setdefault(reply, len(self.codes[name]))
+                    self.texts[name][value] = reply
+                elif value is None:
+                    value = np.nan
+                self.buffers[name].append(when, value)
+                old = self.last.get(name)
+                self.last[name] = reply
+                if old is not None and old != reply:
+                    events.append(Event(when, name, old, reply))
+            self.changes.extend(events)
+            self.stats['changes'] += len(events)
+        if self.onChange is not None:
+            for event in events:
+                self.onChange(event)
+        return events != []
+
+    def latest(self, name):
+        '''Returns the last reading of a metric, as read'''
+        with self.lock:
+            return self.last.get(name)
+
+    def series(self, name, seconds=None):
+        '''Returns the sample times and values of a metric, see RingBuffer.window'''
+        with self.lock:
+            return self.buffers[name].window(seconds)
+
+    def statistics(self, name, seconds=None):
+        '''Returns count, mean, min, max, standard deviation and last value
+        of a metric over the last seconds, or everything held. A text metric
+        gives the time spent in each reading instead.'''
+        times, values = self.series(name, seconds)
+        result = {'count': len(values), 'last': self.latest(name)}
+        if not len(values):
+            return result
+        if name in self.texts:
+            spans = np.diff(np.append(times, time.time()))
+            result['time'] = dict((self.texts[name][code], float(spans[values == code].sum())) for code in np.unique(values))
+            return result
+        result.update(mean=float(np.nanmean(values)), min=float(np.nanmin(values)), max=float(np.nanmax(values)),
+                      std=float(np.nanstd(values)))
+        return result
+
+    def events(self, since=0):
+        '''Returns the changes seen after the time since'''
+        with self.lock:
+            return [event for event in self.changes if event.time > since]
+
+    def report(self):
+        return "Sampler polls = {polls}, errors = {errors}, changes = {changes}, interval = {interval:.3f} s".format(
+            interval=self.interval, **self.stats)
@@ -0,0 +1,501 @@
+# Python SCPI instrument simulator
+# A local TCP server speaking the subset of SCPI used by SfuClass, DMMLogging
+# and PrologixControl, so transport changes can be benchmarked and regression
+# tested on a plain Linux box instead of a booked SFU.
+# Set commands are stored in a state tree and returned by the matching query,
+# *OPC?, *ESR?, *STB?, SYST:ERR:ALL?, *OPT?, R?, DATA:POIN?, the BER meter
+# (errors at a set BER after SENS:BER:REST) and mass memory files written
+# with MMEM:DATA blocks are emulated and a Prologix bridge mode routes
+# ++addr/++read to one simulated instrument per GPIB address. Latency, jitter, dropped replies and SCPI errors can be
+# injected to see how the clients cope.
+# Works with both Python 2 and Python 3.
+#
+#   python scpi_simulator.py sfu --port 5025 --latency 0.002 --jitter 0.001
+#   python scpi_simulator.py dmm --port 5026 --rate 50000
+#   python scpi_simulator.py prologix --port 1234 --gpib 5,7 --error-rate 0.01
+
+import re
+import sys
+import time
+import socket
+import random
+import struct
+import argparse
+import threading
+from decimal import Decimal, InvalidOperation
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+from scpi_cache import nodeKey
+
+MODELS = {
+    'sfu': ('Rohde&Schwarz,SFU,2110.2500k02/101234,02.3.141',
+            'SFU-K1,SFU-K2,SFU-K3,SFU-K8,SFU-K11,SFU-K20,SFU-K35,SFU-K40,SFU-K41,SFU-K42,SFU-B30'),
+    'dmm': ('Keysight Technologies,34465A,MY57500000,A.02.14-02.40-02.14-00.49-03-01', 'DIG,MEM'),
+    'gpib': ('Simulated,GPIB-INSTRUMENT,0,1.0', '0'),
+}
+NO_ERROR = '0,"No error"'
+INJECTED_ERROR = '-222,"Data out of range"'
+UNITS = {'GHZ': '1E9', 'MHZ': '1E6', 'KHZ': '1E3', 'HZ': '1',
+         'S': '1', 'MS': '1E-3', 'US': '1E-6', 'NS': '1E-9',
+         'DB': '1', 'DBM': '1', 'V': '1', 'MV': '1E-3', 'PCT': '1'}
+ESR_OPC = 0x01
+STB_ESB = 0x20
+# MMEM:DATA "file",#<n><length><data> and MMEM:DATA:APP, which adds to the file
+BLOCK_COMMAND = re.compile(br'^\s*:?MMEM(?:ORY)?:DATA(:APP\w*)?\s+["\']([^"\']*)["\'],#(\d)', re.IGNORECASE)
+
+
+def splitCommands(text):
+    '''Splits a program message on ';' keeping quoted strings intact'''
+    parts = []
+    current = ''
+    quote = None
+    for char in text:
+        if quote:
+            quote = (quote, None)[char == quote]
+        elif char in '"\'':
+            quote = char
+        elif char == ';':
+            parts.append(current.strip())
+            current = ''
+            continue
+        current += char
+    parts.append(current.strip())
+    return [part for part in parts if part]
+
+
+def normaliseValue(value):
+    '''Stores values the way the instrument returns them: ON/OFF as 1/0 and
+    numbers with units converted to plain base units'''
+    text = value.strip()
+    upper = text.upper()
+    if upper in ('ON', 'OFF'):
+        return ('0', '1')[upper == 'ON']
+    words = text.split()
+    scale = '1'
+    if len(words) == 2 and words[1].upper() in UNITS:
+        scale = UNITS[words[1].upper()]
+    elif len(words) != 1:
+        return text
+    try:
+        number = Decimal(words[0]) * Decimal(scale)
+    except InvalidOperation:
+        return text
+    return format(number.normalize(), 'f')
+
+
+class SimulatedInstrument:
+    '''State of one simulated instrument. Every connection to the same
+    instrument shares it, as they would on the real thing.
+    kind          'sfu', 'dmm' or 'gpib', selects *IDN? and *OPT?
+    latency       seconds added before every reply
+    jitter        maximum random seconds added on top of latency
+    opcDelay      seconds an operation takes before *OPC? answers or *ESR? shows OPC
+    errorRate     probability a command pushes an error into the error queue
+    dropRate      probability a reply is never sent, so the client times out
+    rate          DMM readings generated per second after *TRG
+    ber           bit error rate seen by the BER meter
+    berRate       bits the BER meter evaluates per second'''
+    def __init__(self, kind='sfu', latency=0.0, jitter=0.0, opcDelay=0.0, errorRate=0.0, dropRate=0.0, rate=10000,
+                 ber=0.0, berRate=1e7, seed=None):
+        self.kind = kind
+        self.idn, self.options = MODELS[kind]
+        self.latency = latency
+        self.jitter = jitter
+        self.opcDelay = opcDelay
+        self.errorRate = errorRate
+        self.dropRate = dropRate
+        self.rate = rate
+        self.ber = ber
+        self.berRate = berRate
+        self.random = random.Random(seed)
+        self.files = {}             # mass memory, kept through *RST
+        self.lock = threading.RLock()
+        self.stats = {'commands': 0, 'queries': 0, 'errors': 0, 'dropped': 0}
+        self.reset()
+
+    def reset(self):
+        '''*RST, clears the state tree and any readings'''
+        self.state = {}
+        self.errors = []
+        self.esr = 0
+        self.ese = 0
+        self.sre = 0
+        self.opcPending = None      # time the last *OPC operation completes
+        self.readings = []
+        self.triggered = None       # time of *TRG, readings are generated from then
+        self.generated = 0
+        self.berRestart()
+
+    def berRestart(self):
+        '''SENS:BER:REST, the BER meter starts counting again'''
+        self.berStart = time.time()
+        self.berErrors = 0
+        self.nextError = self.random.expovariate(self.ber) if self.ber else None
+
+    def berCount(self):
+        '''Returns the bits evaluated since the restart and the errors in them'''
+        bits = int((time.time() - self.berStart) * self.berRate)
+        while self.nextError is not None and self.nextError <= bits:
+            self.berErrors += 1
+            self.nextError += self.random.expovariate(self.ber)
+        return bits, self.berErrors
+
+    def delay(self):
+        '''Reply latency with jitter'''
+        seconds = self.latency + self.random.uniform(0, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def handle(self, message):
+        '''Executes one program message and returns the list of replies.
+        Queries in one message are answered with one ';' separated reply.
+        A header without a leading ':' after the first command is relative to
+        the parent node of the command before it, as SCPI defines.'''
+        with self.lock:
+            replies = []
+            parent = ''
+            for command in splitCommands(message):
+                self.stats['commands'] += 1
+                if self.errorRate and self.random.random() < self.errorRate:
+                    self.pushError(INJECTED_ERROR)
+                if command and command[0] not in ':*&':
+                    command = parent + command
+                if command and command[0] not in '*&':
+                    header = command.partition(' ')[0]
+                    parent = header[:header.rfind(':') + 1]
+                reply = self.execute(command)
+                if reply is not None:
+                    replies.append(reply)
+        if not replies:
+            return []
+        self.stats['queries'] += 1
+        if self.dropRate and self.random.random() < self.dropRate:
+            self.stats['dropped'] += 1
+            return []
+        self.delay()
+        if len(replies) == 1 and isinstance(replies[0], bytes):
+            return [replies[0]]
+        return [';'.join(str(reply) for reply in replies)]
+
+    def pushError(self, error):
+        self.errors.append(error)
+        self.esr |= 0x10
+        self.stats['errors'] += 1
+
+    def execute(self, command):
+        header, _, value = command.partition(' ')
+        upper = header.upper()
+        if upper.startswith('*'):
+            return self.common(upper, value)
+        if upper.startswith('&'):
+            return None
+        key = nodeKey(header)
+        if header.endswith('?'):
+            return self.query(key, value)
+        if key in ('INIT', 'INIT:IMM'):
+            self.readings = []
+            self.generated = 0
+            self.triggered = None
+        elif key in ('MMEM:LOAD:STAT', 'MMEM:LOAD'):
+            self.state = {}
+        elif key == 'SENS:BER:REST':
+            self.berRestart()
+        self.state[key] = normaliseValue(value) if value else ''
+        return None
+
+    def common(self, header, value):
+        '''IEEE 488.2 common commands'''
+        if header == '*IDN?':
+            return self.idn
+        if header == '*OPT?':
+            return self.options
+        if header == '*RST':
+            self.reset()
+        elif header == '*CLS':
+            self.errors = []
+            self.esr = 0
+        elif header == '*OPC':
+            self.opcPending = time.time() + self.opcDelay
+        elif header == '*OPC?':
+            if self.opcDelay:
+                time.sleep(self.opcDelay)
+            return '1'
+        elif header == '*ESR?':
+            self.completeOpc()
+            esr, self.esr = self.esr, 0
+            return str(esr)
+        elif header == '*STB?':
+            return str(self.statusByte())
+        elif header == '*ESE':
+            self.ese = int(value or 0)
+        elif header == '*SRE':
+            self.sre = int(value or 0)
+        elif header == '*ESE?':
+            return str(self.ese)
+        elif header == '*SRE?':
+            return str(self.sre)
+        elif header in ('*RCL', '*SAV'):
+            pass            # MMEM:LOAD:STAT has already loaded the state recalled
+        elif header == '*TRG':
+            self.triggered = time.time()
+        elif header != '*WAI':
+            self.pushError('-113,"Undefined header;{}"'.format(header))
+        return None
+
+    def completeOpc(self):
+        if self.opcPending is not None and time.time() >= self.opcPending:
+            self.esr |= ESR_OPC
+            self.opcPending = None
+
+    def statusByte(self):
+        self.completeOpc()
+        return (0, STB_ESB)[bool(self.esr & self.ese)]
+
+    def srq(self):
+        '''True while the instrument is requesting service'''
+        with self.lock:
+            return bool(self.statusByte() & self.sre)
+
+    def query(self, key, value):
+        if key == 'SYST:ERR:ALL':
+            errors, self.errors = self.errors, []
+            return ','.join(errors) or NO_ERROR
+        if key in ('SYST:ERR', 'SYST:ERR:NEXT'):
+            return self.errors.pop(0) if self.errors else NO_ERROR
+        if key == 'SYST:TIME':
+            return time.strftime('%H,%M,%S')
+        if key == 'DATA:POIN':
+            self.generate()
+            return str(len(self.readings))
+        if key == 'R':
+            return self.readBlock(value)
+        if key == 'MMEM:CAT':
+            return self.catalog(value.strip().strip('"\''))
+        if key in ('READ:BER', 'READ:BER:COUN', 'READ:BER:EVAL'):
+            bits, errors = self.berCount()
+            if key == 'READ:BER:COUN':
+                return str(errors)
+            if key == 'READ:BER:EVAL':
+                # the meter's own gate wants 100 errors at the simulated BER
+                return '{},{}'.format(bits, int(min(100 / self.ber, 1e12)) if self.ber else int(1e12))
+            return '{:.3E}'.format(float(errors) / bits if bits else 0.0)
+        return self.state.get(key, '0')
+
+    def storeFile(self, name, data, append):
+        '''MMEM:DATA, writes a file or adds to the end of it'''
+        with self.lock:
+            self.stats['commands'] += 1
+            if append and name.upper() in self.files:
+                self.files[name.upper()] += data
+            else:
+                self.files[name.upper()] = bytearray(data)
+
+    def catalog(self, directory):
+        '''MMEM:CAT?, used and free bytes then "name,type,size" for each file'''
+        prefix = directory.upper().rstrip('\\') + '\\'
+        entries = ['"{},BIN,{}"'.format(name[len(prefix):], len(data)) for name, data in sorted(self.files.items())
+                   if name.startswith(prefix) and '\\' not in name[len(prefix):]]
+        used = sum(len(data) for data in self.files.values())
+        return ','.join(['{},{}'.format(used, 10 ** 11 - used)] + entries)
+
+    def generate(self):
+        '''Adds the readings a DMM would have taken since *TRG'''
+        if self.triggered is None:
+            return
+        total = int(float(self.state.get('TRIG:COUN', '1'))) * int(float(self.state.get('SAMP:COUN', '1')))
+        due = min(int((time.time() - self.triggered) * self.rate), total)
+        if due > self.generated:
+            self.readings.extend(self.random.gauss(0.5, 0.001) for _ in range(due - self.generated))
+            self.generated = due
+
+    def readBlock(self, value):
+        '''R?, removes readings from memory and returns them as a definite
+        length block in the FORM:DATA format'''
+        self.generate()
+        count = len(self.readings)
+        if value.strip():
+            count = min(int(value), count)
+        readings, self.readings = self.readings[:count], self.readings[count:]
+        if self.state.get('FORM:DATA', 'ASC').upper().startswith('REAL'):
+            order = ('>', '<')[self.state.get('FORM:BORD', 'NORM').upper().startswith('SWAP')]
+            payload = struct.pack('{}{}d'.format(order, len(readings)), *readings)
+        else:
+            payload = ','.join('{:+.9E}'.format(reading) for reading in readings).encode()
+        length = str(len(payload)).encode()
+        return b'#' + str(len(length)).encode() + length + payload
+
+
+class PrologixBridge:
+    '''A Prologix GPIB-Ethernet bridge with a simulated instrument at each
+    GPIB address. Replies are held until ++read unless ++auto is on.'''
+    def __init__(self, instruments):
+        self.instruments = instruments
+        self.addr = sorted(instruments)[0]
+        self.auto = 0
+        self.settings = {'mode': '1', 'eoi': '1', 'eos': '2', 'read_tmo_ms': '500'}
+        self.output = {}
+
+    def handle(self, message):
+        if not message.startswith('++'):
+            instrument = self.instruments.get(self.addr)
+            if instrument is None:
+                return []
+            replies = instrument.handle(message)
+            if self.auto:
+                return replies
+            self.output[self.addr] = replies
+            return []
+        words = message[2:].split()
+        name = words[0].lower() if words else ''
+        args = words[1:]
+        if name == 'addr':
+            if not args:
+                return [str(self.addr)]
+            self.addr = int(args[0])
+        elif name == 'read':
+            return self.output.pop(self.addr, [])
+        elif name == 'auto':
+            if not args:
+                return [str(self.auto)]
+            self.auto = int(args[0])
+        elif name == 'ver':
+            return ['Prologix GPIB-ETHERNET Controller version 01.06.06.00 (simulated)']
+        elif name == 'srq':
+            return [str(int(any(instrument.srq() for instrument in self.instruments.values())))]
+        elif name == 'spoll':
+            instrument = self.instruments.get(int(args[0]) if args else self.addr)
+            return [str(instrument.statusByte() if instrument is not None else 0)]
+        elif name in ('clr', 'trg', 'loc', 'llo', 'ifc', 'rst', 'savecfg'):
+            pass
+        elif args:
+            self.settings[name] = args[0]
+        else:
+            return [self.settings.get(name, '0')]
+        return []
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    '''One client connection, messages are new line terminated'''
+    def handle(self):
+        target = self.server.target
+        if isinstance(target, PrologixBridge):
+            # each bridge connection has its own address and ++read state
+            target = PrologixBridge(target.instruments)
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                block = BLOCK_COMMAND.match(line)
+                if block is not None and isinstance(target, SimulatedInstrument):
+                    if self.readFileBlock(target, block, line):
+                        continue
+                    break
+                message = line.decode('latin-1').strip()
+                if not message:
+                    continue
+                for reply in target.handle(message):
+                    if not isinstance(reply, bytes):
+                        reply = reply.encode('latin-1')
+                    self.wfile.write(reply + b'\n')
+                self.wfile.flush()
+        except socket.error:
+            pass        # client went away mid-reply, e.g. after a timeout
+
+    def finish(self):
+        '''Flushes and closes the streams. A client that reset the connection
+        (SO_LINGER 0) makes the flush fail, which isn't worth a traceback.'''
+        try:
+            socketserver.StreamRequestHandler.finish(self)
+        except socket.error:
+            pass
+
+    def readFileBlock(self, target, block, line):
+        '''Reads the rest of an MMEM:DATA block, which may hold new lines,
+        and stores the file. Returns False if the client went away first.'''
+        start = block.end()
+        digits = int(block.group(3))
+        while len(line) < start + digits:
+            more = self.rfile.read(start + digits - len(line))
+            if not more:
+                return False
+            line += more
+        begin = start + digits
+        end = begin + int(line[start:begin] or b'0')
+        while len(line) < end + 1:
+            more = self.rfile.readline() if len(line) == end else self.rfile.read(end - len(line))
+            if not more:
+                return False
+            line += more
+        target.storeFile(block.group(2).decode('latin-1'), bytes(line[begin:end]), block.group(1) is not None)
+        return True
+
+
+class SimulatorServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, addr, target):
+        socketserver.TCPServer.__init__(self, addr, _Handler)
+        self.target = target
+
+    def start(self):
+        '''Serves from a daemon thread and returns the bound port'''
+        thread = threading.Thread(target=self.serve_forever, name='scpi-simulator')
+        thread.daemon = True
+        thread.start()
+        return self.server_address[1]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def startSimulator(kind='sfu', port=0, host='127.0.0.1', gpib=(), **kwargs):
+    '''Starts a simulator in this process, e.g. for a benchmark. port 0 picks
+    a free port, read it back from server.server_address.
+    For kind 'prologix' gpib lists the addresses to populate, the remaining
+    keyword arguments are passed to each SimulatedInstrument.'''
+    if kind == 'prologix':
+        target = PrologixBridge(dict((int(address), SimulatedInstrument('gpib', **kwargs)) for address in (gpib or (5, ))))
+    else:
+        target = SimulatedInstrument(kind, **kwargs)
+    server = SimulatorServer((host, port), target)
+    server.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SCPI instrument simulator')
+    parser.add_argument('kind', choices=['sfu', 'dmm', 'prologix'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='default 5025, or 1234 for prologix')
+    parser.add_argument('--gpib', default='5', help='comma separated GPIB addresses behind the bridge')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every reply')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum extra random seconds per reply')
+    parser.add_argument('--opc-delay', type=float, default=0.0, help='seconds each operation takes to complete')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability a command queues an SCPI error')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='probability a reply is never sent')
+    parser.add_argument('--rate', type=int, default=10000, help='DMM readings per second after *TRG')
+    parser.add_argument('--ber', type=float, default=0.0, help='bit error rate the BER meter measures')
+    parser.add_argument('--ber-rate', type=float, default=1e7, help='bits the BER meter evaluates per second')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    port = args.port or (5025, 1234)[args.kind == 'prologix']
+    server = startSimulator(args.kind, port, args.host, [int(address) for address in args.gpib.split(',')],
+                            latency=args.latency, jitter=args.jitter, opcDelay=args.opc_delay,
+                            errorRate=args.error_rate, dropRate=args.drop_rate, rate=args.rate,
+                            ber=args.ber, berRate=args.ber_rate, seed=args.seed)
+    print('{} simulator listening on {}:{}'.format(args.kind, args.host, port))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# Python JSON state files
+# The small JSON files the SCPI helpers keep between test runs (capability
+# profiles, upload manifests, base configuration fingerprints) are read and
+# written here. A file is written to a temporary file next to it and moved
+# over the old one, so readers never see a half written file. os.rename
+# can't replace an existing file on Windows, so os.replace is used where
+# there is one and the old file is removed first where there isn't (Python 2).
+# A file that can't be written is logged and left as it was: every caller
+# only loses the time the file would have saved.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+
+import os
+import json
+import logging
+
+log = logging.getLogger('scpi.statefile')
+
+
+def load(path, default):
+    '''Returns the data in a JSON file, or default if it is missing or
+    unreadable'''
+    try:
+        with open(path) as state:
+            return json.load(state)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+def replace(source, target):
+    '''Moves source over target, replacing target if it exists'''
+    if hasattr(os, 'replace'):
+        os.replace(source, target)
+        return
+    if os.name == 'nt' and os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+
+def save(path, data):
+    '''Writes data to a JSON file. Returns True if it was written.'''
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(temp, 'w') as state:
+            json.dump(data, state, indent=1, sort_keys=True)
+        replace(temp, path)
+        return True
+    except (IOError, OSError) as error:
+        log.warning("Could not write %s: %s", path, error)
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,230 @@
+# Python file upload to instrument mass memory
+# Copies ARB waveforms, TS files, audio and picture files to the instrument
+# with MMEM:DATA definite length blocks instead of by hand. The local file is
+# memory mapped and sent in large chunks straight from the mapping, so a
+# multi-GB TS file is never read into memory or copied. The first chunk
+# creates the file and the rest are appended with APPEND_COMMAND, each
+# acknowledged with *OPC?;*ESR? before the next is sent. *OPC? answers even
+# when a block was rejected, so an error bit in *ESR? (a bad path, a full
+# disk, firmware without the append form) stops the upload with an
+# UploadError, and the size the instrument reports is checked at the end
+# before the upload is recorded as complete.
+# A local manifest holds the SHA-1 of every file uploaded to each instrument
+# and how far an unfinished upload got. A file already on the instrument
+# with the same size and hash is not sent again, and an upload cut short by
+# a dropped connection carries on from the size the instrument reports (in
+# the same call, or the next one for the same file).
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+#
+#   report = upload(pool, 'streams/test.trp', 'D:\\TSGEN\\test.trp', progress=printProgress)
+
+import os
+import re
+import mmap
+import time
+import socket
+import hashlib
+import threading
+import scpi_recorder
+import scpi_statefile
+import scpi_completion
+
+WRITE_COMMAND = ':MMEM:DATA'
+APPEND_COMMAND = ':MMEM:DATA:APP'
+CHUNK = 8 * 1024 * 1024
+DEFAULT_PATH = os.environ.get('SCPI_UPLOAD_MANIFEST', os.path.expanduser('~/.scpi_uploads.json'))
+
+
+def toText(reply):
+    return reply.decode('utf-8', 'replace') if isinstance(reply, bytes) else reply
+
+
+def window(mapped, offset, count):
+    '''A view of part of a memory mapped file, without a copy'''
+    try:
+        return buffer(mapped, offset, count)        # Python 2, mmap has no memoryview there
+    except NameError:
+        return memoryview(mapped)[offset:offset + count]
+
+
+def remotePath(path):
+    '''Instrument paths use back slashes'''
+    return path.replace('/', '\\')
+
+
+def remoteSize(conn, path, timeout=None):
+    '''Returns the size of a file on the instrument from MMEM:CAT? of its
+    directory, or None if it isn't there'''
+    directory, _, name = path.rpartition('\\')
+    return catalogSize(conn.query(':MMEM:CAT? "{}"'.format(directory), timeout), name)
+
+
+def catalogSize(reply, name):
+    '''Returns the size of file name in a MMEM:CAT? reply, or None if it
+    isn't listed. A catalog entry is "name,type,size".'''
+    for entry in re.findall(r'"([^"]*)"', toText(reply)):
+        fields = entry.split(',')
+        if len(fields) == 3 and fields[0].lower() == name.lower():
+            try:
+                return int(fields[2])
+            except ValueError:
+                return None
+    return None
+
+
+class UploadError(Exception):
+    '''Raised when the instrument rejects part of an upload or ends up with
+    a file of the wrong size'''
+
+
+def confirm(conn, remote, offset, timeout=None):
+    '''Waits for the block just sent to be processed and raises UploadError
+    if the instrument flagged an error with it'''
+    esr = scpi_completion.statusValue(toText(conn.query('*OPC?;*ESR?', timeout)))
+    if esr & scpi_completion.ESR_ERRORS:
+        raise UploadError('{} rejected at byte {}: {}'.format(remote, offset, toText(conn.query('SYST:ERR?', timeout))))
+
+
+class Manifest:
+    '''Hashes of local files and of the files uploaded to each instrument'''
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self):
+        data = scpi_statefile.load(self.path, {})
+        data.setdefault('local', {})
+        data.setdefault('remote', {})
+        return data
+
+    def save(self, data):
+        scpi_statefile.save(self.path, data)      # without a manifest files are only hashed and sent again
+
+    def localHash(self, path):
+        '''Returns the SHA-1 of a local file, hashed again only if its size
+        or modification time has changed since it was last hashed'''
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.load()['local'].get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['sha1']
+        digest = hashlib.sha1()
+        if stat.st_size:
+            with open(path, 'rb') as local:
+                mapped = mmap.mmap(local.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    for offset in range(0, stat.st_size, CHUNK):
+                        digest.update(window(mapped, offset, min(CHUNK, stat.st_size - offset)))
+                finally:
+                    mapped.close()
+        with self.lock:
+            data = self.load()
+            data['local'][path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': digest.hexdigest()}
+            self.save(data)
+        return digest.hexdigest()
+
+    def remote(self, key):
+        with self.lock:
+            return self.load()['remote'].get(key)
+
+    def note(self, key, sha1, size, sent):
+        '''Records how much of a file with hash sha1 is on the instrument'''
+        with self.lock:
+            data = self.load()
+            data['remote'][key] = {'sha1': sha1, 'size': size, 'sent': sent, 'saved': time.time()}
+            self.save(data)
+
+
+_manifests = {}
+
+
+def getManifest(path=DEFAULT_PATH):
+    '''Returns the shared Manifest for path'''
+    if path not in _manifests:
+        _manifests[path] = Manifest(path)
+    return _manifests[path]
+
+
+def upload(pool, localPath, remote, manifest=None, chunk=CHUNK, timeout=60, retries=3, progress=None):
+    '''Uploads a local file to the instrument behind pool (an
+    scpi_pool.ConnectionPool), skipping it if the instrument already has it.
+    progress    called with (bytes on the instrument, total bytes) after each chunk
+    Returns a report dictionary: skipped, bytes sent, bytes resumed from a
+    previous attempt, reconnects, seconds and summary.
+    Raises UploadError if the instrument rejects a chunk or the file on it
+    doesn't end up the size of the local file.'''
+    manifest = manifest or getManifest()
+    remote = remotePath(remote)
+    size = os.path.getsize(localPath)
+    sha1 = manifest.localHash(localPath)
+    key = '{}:{}|{}'.format(pool.addr[0], pool.addr[1], remote)
+    label = scpi_recorder.connectionLabel(pool.addr) + ' upload'
+    report = {'skipped': False, 'sent': 0, 'resumed': 0, 'reconnects': 0, 'size': size}
+    start = time.time()
+    entry = manifest.remote(key)
+    known = entry is not None and entry['sha1'] == sha1 and entry['size'] == size
+    with pool.connection() as conn:
+        onInstrument = remoteSize(conn, remote, timeout)
+        conn.query('*ESR?', timeout)        # clears error bits left by earlier commands
+    if known and onInstrument == size and entry['sent'] == size:
+        report['skipped'] = True
+        report['summary'] = "{} already on the instrument, {} bytes not sent".format(remote, size)
+        return report
+    offset = 0
+    if known and onInstrument is not None and 0 < onInstrument < size:
+        offset = report['resumed'] = onInstrument      # carry on an upload of this file cut short last time
+    if size == 0:
+        with pool.connection() as conn:
+            conn.sendBlock('{} "{}",'.format(WRITE_COMMAND, remote), b'', timeout)
+            confirm(conn, remote, 0, timeout)
+    local = open(localPath, 'rb')
+    mapped = mmap.mmap(local.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    lost = False
+    try:
+        while offset < size:
+            try:
+                with pool.connection() as conn:
+                    if lost:
+                        # everything the instrument has was sent from this file, a chunk
+                        # may have landed without its *OPC? reply getting back
+                        onInstrument = remoteSize(conn, remote, timeout)
+                        offset = onInstrument if onInstrument is not None and onInstrument <= size else 0
+                        conn.query('*ESR?', timeout)      # the cut short block may have flagged an error
+                        lost = False
+                    while offset < size:
+                        count = min(chunk, size - offset)
+                        cmd = '{} "{}",'.format((WRITE_COMMAND, APPEND_COMMAND)[offset > 0], remote)
+                        data = window(mapped, offset, count)
+                        begin = time.time()
+                        try:
+                            conn.sendBlock(cmd, data, timeout)
+                            report['sent'] += count
+                        finally:
+                            getattr(data, 'release', lambda: None)()
+                        scpi_recorder.record(label, scpi_recorder.WRITE, '{}#<{} bytes>'.format(cmd, count), None, begin)
+                        confirm(conn, remote, offset, timeout)
+                        offset += count
+                        if offset < size:
+                            manifest.note(key, sha1, size, offset)
+                        if progress is not None:
+                            progress(offset, size)
+            except (socket.error, IOError, OSError):
+                report['reconnects'] += 1
+                if report['reconnects'] > retries:
+                    raise
+                lost = True
+    finally:
+        if mapped is not None:
+            mapped.close()
+        local.close()
+    with pool.connection() as conn:
+        onInstrument = remoteSize(conn, remote, timeout)
+    if onInstrument != size:
+        raise UploadError('{} is {} bytes on the instrument, {} bytes were uploaded'.format(remote, onInstrument, size))
+    manifest.note(key, sha1, size, size)
+    report['seconds'] = time.time() - start
+    report['summary'] = "{} uploaded: {} bytes sent, {} resumed, {} reconnects, {:.3f} s, {:.1f} MB/s".format(
+        remote, report['sent'], report['resumed'], report['reconnects'], report['seconds'],
+        report['sent'] / 1e6 / max(report['seconds'], 1e-9))
+    return report
@@ -1,11 +1,1086 @@
+import re
 import socket
 import time
-from decimal import Decimal
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+import scpi_pool
+import scpi_reader
+import scpi_completion
+import scpi_cache
+import scpi_profile
+import scpi_recorder
+import scpi_ber
+import scpi_upload
+import scpi_basestate
+
+def splitScpi(text):
+    '''Splits a compound SCPI command or response on ';' ignoring any
+    semicolons inside quoted strings (e.g. file names)'''
+    if '"' not in text and "'" not in text:
+        return [part.strip() for part in text.split(';')]
+    parts = []
+    quote = None
+    start = 0
+    for i, c in enumerate(text):
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == ';':
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+# applyConfig sends settings in this order, anything not listed goes between
+# the modulation settings and the RF settings
+CONFIG_ORDER = ('base', 'standard', 'sigSource', 'source', 'sourceLp', 'signal', 'spectrum',
+                'bandwidth', 't_bandwidth', 't2_bandwidth', 'bandwidthVar', 'fft', 't_fft', 'FFT_bwExt',
+                'guard', 't_guard', 'const', 't_const', 'codeRate', 't_codeRate', 'codeRateLp',
+                None,
+                'freq', 'freqOff', 'pwrLimit', 'Attenuator', 'power',
+                'noiseState', 'noiseType', 'noiseBWcoup', 'noiseBW', 'snr',
+                'frameBurst', 'iBurst', 'pulseMinMax', 'iNoise', 'phaseFile', 'pNoise',
+                'preset', 'profile', 'fadCommon', 'DTNormalise', 'fadingState',
+                'TSfile', 'TSstate', 'arbFile', 'arbClock', 'IQScaling', 'arbState',
+                'modState', 'rfState', 'BERgateMode', 'BERmeasStat', 'BERrestart')
+# settings that put others back to their defaults when they are sent
+CONFIG_DEPENDENTS = {'noiseState':  ('noiseType', 'noiseBWcoup', 'noiseBW', 'snr'),
+                     'noiseBWcoup': ('noiseBW', ),
+                     'preset':      ('profile', 'fadCommon', 'fadingState'),
+                     'TSfile':      ('TSstate', ),
+                     'arbFile':     ('arbClock', 'IQScaling', 'arbState')}
+CONFIG_RESETS = ('base', 'standard')
+# actions or states the instrument changes by itself, always sent
+CONFIG_ALWAYS = ('TSstate', 'BERmeasStat', 'BERrestart', 'DTNormalise')
+# settings sweep() steps: set command, range on an SFU, range on a Dektec
+SWEEP_SETTINGS = {'snr':   (':NOIS:CN', (-35, 60), (0, 30)),
+                  'power': (':POW', (-120, 0), (-120, 0)),
+                  'freq':  (':FREQ', (300000, 3000000000), (300000, 3000000000))}
+# readings SfuClass.sampler() watches by default: name, getter
+SAMPLER_METRICS = {'berRead':  'getBerRead',
+                   'berState': 'getBerState',
+                   'tsWraps':  'getTSGenWraps',
+                   'tsErrors': 'getTSGenErrors'}
+FAILED_MARKS = ('SFU check', 'Error', 'Timeout', 'not available', 'No Setting', 'Invalid')
+# a query every Dektec answers, sent in place of *OPC? as it has no completion commands.
+# This relies on the Dektec running the lines of a message in order and answering
+# each query in turn, so its reply can't come before the lines in front of it have run.
+# SfuClass.dektecSync can be set to another query for a Dektec that doesn't answer it.
+DEKTEC_SYNC = ':FREQ?'
+DEKTEC_REPLY_TIMEOUT = 2    # seconds to wait for replies to a Dektec message with no *OPC? in it
+# fading path parameters: name, node under :FSIM1:DEL:GRO<n>, per path
+FADING_PARAMETERS = (('loss',           'LOSS',        True),
+                     ('basicDelay',     'BDEL',        False),
+                     ('additDelay',     'ADEL',        True),
+                     ('powerRatio',     'PRAT',        True),
+                     ('constPhase',     'CPH',         True),
+                     ('speed',          'SPE',         True),
+                     ('freqRatio',      'FRAT',        True),
+                     ('corrCoefficient', 'CORR:COEF', True),
+                     ('corrPhase',      'CORR:PHAS',   True),
+                     ('lognConstant',   'LOGN:LCON',   True),
+                     ('lognStdDev',     'LOGN:CTSD',   True),
+                     ('doppler',        'FDOP',        True),
+                     ('state',          'STAT',        True),
+                     ('profile',        'PROF',        True))
+FADING_FIRST = (12, 13)     # a path's state and profile go before its other parameters
+# plain settings and readings, compiled once into ScpiCommand templates and
+# added to SfuClass as generated setters and getters: setter with the name of
+# its parameter, getter, header,
+# argument ('number' is range checked and read back as a Decimal, 'text' read
+# back as a string), range or the values shown in the docstring, range error,
+# option the command needs, what it sets or returns
+COMMANDS = (
+    (None,                                   'getNoise',                        ':NOIS:STAT',                    None,      None, None, 'awgn',
+     'state of the noise generator'),
+    (None,                                   'getSnr',                          ':NOIS:CN',                      None,      None, None, 'awgn',
+     'level of SNR/CN'),
+    ('setNoiseBwCoup(state)',                'getNoiseBwCoup',                  ':NOIS:COUP',                    'text',    ('OFF', 'ON'), None, None,
+     'state of the noise bandwidth coupling'),
+    (None,                                   'getNoiseBandwidth',               ':NOIS:BAND',                    None,      None, None, None,
+     'noise bandwidth'),
+    ('setPhaseNoise(ci)',                    'getPhaseNoise',                   ':NOIS:PHAS:LEV',                'number',  (-110, -12.9), 'Phase Noise', 'phaseNoise',
+     'level of phase noise at 100Hz'),
+    (None,                                   'getPhaseShape',                   ':NOIS:PHAS:SHAP:SEL',           None,      None, None, 'phaseNoise',
+     'phase noise shape file'),
+    ('setPulseNoise(ci)',                    'getPulseNoise',                   ':NOIS:IMP:CI',                  'number',  (-30, 60), 'Phase Noise Pulse', 'impulsiveNoise',
+     'level of pulse noise C/I'),
+    ('setPulseNoiseBurst(burst)',            'getPulseNoiseBurst',              ':NOIS:IMP:PULS',                'number',  (1, 40000), 'Pulse Noise Burst', 'impulsiveNoise',
+     'number of pulse noise pulses per burst'),
+    (None,                                   'getPulseNoisePulses',             ':NOIS:IMP:PULS',                None,      None, None, 'impulsiveNoise',
+     'number of pulse noise pulses per burst'),
+    (None,                                   'getPulseNoiseFrame',              ':NOIS:IMP:FRAM',                None,      None, None, 'impulsiveNoise',
+     'pulse noise frame duration'),
+    (None,                                   'getPulseNoiseMin',                ':NOIS:IMP:MINS',                None,      None, None, 'impulsiveNoise',
+     'minimum pulse spacing'),
+    (None,                                   'getPulseNoiseMax',                ':NOIS:IMP:MAXS',                None,      None, None, 'impulsiveNoise',
+     'maximum pulse spacing'),
+    ('setFrequency(freq)',                   'getFrequency',                    ':FREQ',                         'number',  (300000, 3000000000), 'Main Frequency', None,
+     'carrier frequency'),
+    (None,                                   'getRfLevel',                      ':POW',                          None,      None, None, None,
+     'RF level'),
+    ('setRfState(state)',                    'getRfState',                      ':OUTP',                         'text',    ('OFF', 'ON'), None, None,
+     'state of the RF output'),
+    ('setALC(state)',                        'getALC',                          ':POW:ALC:STAT',                 'text',    ('AUTO', 'ON', 'OFF'), None, None,
+     'ALC state'),
+    (None,                                   'getAttenuator',                   ':OUTP:AMOD',                    None,      None, None, None,
+     'attenuator mode'),
+    (None,                                   'getAttenuatorUpper',              ':OUTP:AFIX:RANG:UPP',           None,      None, None, None,
+     'RF upper attenuator limit'),
+    ('setRfLimit(limit)',                    'getRfLimit',                      ':POW:LIM',                      'number',  (-120, 20), 'RF Output Level Limit', None,
+     'RF level limit'),
+    ('setRfLevelOffs(offset)',               'getRfLevelOffs',                  ':POW:OFFS',                     'number',  (-120, 120), 'RF Output Level Limit', None,
+     'RF level offset'),
+    ('setRfVoltage(level)',                  'getRfVoltage',                    ':VOLT',                         'number',  (-120, 20), 'RF Output Level Limit', None,
+     'RF voltage'),
+    (None,                                   'getRfUnit',                       ':UNIT:VOLT',                    None,      None, None, None,
+     'RF level unit'),
+    ('setBerMeasState(state)',               'getBerMeasState',                 ':SENS:BER:MEAS',                'text',    ('OFF', 'ON'), None, None,
+     'state of the BER measurement'),
+    (None,                                   'getBerInput',                     ':SENS:BER:INP:SEL',             None,      None, None, None,
+     'input used for BER measurement'),
+    ('setBerSignal(signal)',                 'getBerSignal',                    ':SENS:BER:SIGN',                'text',    ('H184', 'S187', 'H200', 'S203', 'H204', 'S207', 'STUF'), None, None,
+     'type of packeted data stream if using MPEG transport stream inputs'),
+    (None,                                   'getBerRead',                      ':READ:BER',                     None,      None, None, None,
+     'instantaneously measured bit error rate'),
+    (None,                                   'getBerReadAll',                   ':READ:BER:ALL',                 None,      None, None, None,
+     'bit error rate and the other BER meter readings'),
+    (None,                                   'getBerEval',                      ':READ:BER:EVAL',                None,      None, None, None,
+     'bits evaluated so far and the bits needed for the required measurement accuracy'),
+    (None,                                   'getBerState',                     ':READ:BER:STAT',                None,      None, None, None,
+     'status of the bit error rate meter'),
+    (None,                                   'getBerErrorCount',                ':READ:BER:COUN',                None,      None, None, None,
+     'sum of bit errors to date'),
+    ('setBerGateMode(mode)',                 'getBerGateMode',                  ':SENS:BER:GATE:MODE',           'text',    ('AUT', 'INF', 'UWIN', 'USIN'), None, None,
+     'BER gating mode'),
+    (None,                                   'getBerGateTime',                  ':READ:BER:GATE:TIME',           None,      None, None, None,
+     'BER gating time'),
+    ('setBerPayload(mode)',                  'getBerPayload',                   ':SENS:BER:PAYL',                'text',    ('PRBS', 'H00', 'HFF'), None, None,
+     'payload contents of the received packets'),
+    (None,                                   'getBerPrbs',                      ':SENS:BER:PRBS:SEQ',            None,      None, None, None,
+     'PRBS sequence'),
+    (None,                                   'getModulationState',              ':MOD:STAT',                     None,      None, None, None,
+     'modulation state'),
+    (None,                                   'getSignalSource',                 ':DM:SOUR',                      None,      None, None, None,
+     'modulation signal source'),
+    (None,                                   'getStandard',                     ':DM:TRAN',                      None,      None, None, None,
+     'modulation standard'),
+    (None,                                   'getAtvStandard',                  ':DM:ATV:STAN',                  None,      None, None, None,
+     'ATV transmission standard'),
+    ('setSpectrum(state)',                   'getSpectrum',                     ':DM:POL',                       'text',    ('NORMal', 'INVerted'), None, None,
+     'modulation spectrum state'),
+    (None,                                   'getFadingState',                  ':FSIM:STAT',                    None,      None, None, 'fading',
+     'state of the fading simulator'),
+    (None,                                   'getFadingPreset',                 ':FSIM1:STAN',                   None,      None, None, 'fading',
+     'loaded preset standard fading profile'),
+    (None,                                   'getFadingReference',              ':FSIM:REF',                     None,      None, None, 'fading',
+     'reference of the fading simulator, SPEED or DOPPLER'),
+    (None,                                   'getTsGenState',                   ':TSGEN:READ:COMM:STATE',        None,      None, None, 'tsplayer',
+     'state of the transport stream player, STOP, PAUS or RUNN'),
+    (None,                                   'getTsGenFile',                    ':TSGEN:CONF:PLAY',              None,      None, None, 'tsplayer',
+     'file loaded into the transport stream player'),
+    ('setTsGenRate(rate)',                   'getTsGenRate',                    ':TSGEN:CONF:TSRATE',            'text',    None, None, 'tsplayer',
+     'TS data rate in bit/s'),
+    (None,                                   'getTSGenWraps',                   ':TSGEN:CONF:WRAPS',             None,      None, None, 'tsplayer',
+     'number of playout wraps counted by the Dektec playout, Dektec only'),
+    (None,                                   'getTSGenErrors',                  ':TSGEN:CONF:ERRORS',            None,      None, None, 'tsplayer',
+     'number of errors counted by the Dektec playout, Dektec only'),
+    ('setInterfSource(interfSource)',        'getInterfSource',                 ':DM:ISRC',                      'text',    None, None, None,
+     'interferer source'),
+    (None,                                   'getInterfType',                   ':DM:IATV',                      None,      None, None, None,
+     'interferer type'),
+    (None,                                   'getInterfAtt',                    ':DM:IATT',                      None,      None, None, None,
+     'interferer attenuation'),
+    (None,                                   'getInterfFreq',                   ':DM:IFR',                       None,      None, None, None,
+     'interferer frequency offset'),
+    (None,                                   'getInterfSigSour',                ':DM:SFR',                       None,      None, None, None,
+     'interferer signal frequency offset'),
+    ('setInterfNoiseAdd(noise)',             'getInterfNoiseAdd',               ':DM:IADD',                      'text',    ('BEFN', 'AFN', 'OFF'), None, None,
+     'interferer added noise'),
+    (None,                                   'getInterfLevel',                  ':DM:IREF',                      None,      None, None, None,
+     'interferer level'),
+    ('setInterfRef(ref)',                    'getInterfRef',                    ':DM:IREF',                      'text',    ('LEV', 'ATT'), None, None,
+     'interferer reference'),
+    ('setArbState(state)',                   'getArbState',                     ':BB:ARB:STAT',                  'text',    ('OFF', 'ON'), None, 'arb',
+     'state of the ARB'),
+    (None,                                   'getArbClock',                     ':BB:ARB:CLOC',                  None,      None, None, 'arb',
+     'ARB output rate frequency'),
+    (None,                                   'getArbInterpol',                  ':BB:ARB:INTE',                  None,      None, None, 'arb',
+     'OFDM or QAM interpolation of a Dektec IQ mode modulator'),
+    ('setArbGain(gain)',                     'getArbGain',                      ':BB:ARB:GAIN',                  'text',    None, None, 'arb',
+     'gain of the IQ playout of a Dektec IQ mode modulator'),
+    (None,                                   'getDvbtBand',                     ':DVBT:CHAN:BAND',               None,      None, None, None,
+     'DVB bandwidth'),
+    (None,                                   'getDvbtFft',                      ':DVBT:FFT:MODE',                None,      None, None, None,
+     'DVB FFT mode'),
+    (None,                                   'getDvbtGuard',                    ':DVBT:GUAR:INT',                None,      None, None, None,
+     'DVB guard'),
+    (None,                                   'getDvbtCons',                     ':DVBT:CONS',                    None,      None, None, None,
+     'DVB constellation'),
+    (None,                                   'getDvbtCoderate',                 ':DVBT:RATE',                    None,      None, None, None,
+     'DVB code rate'),
+    (None,                                   'getDvbtUsedBand',                 ':DVBT:USED:BAND',               None,      None, None, None,
+     'DVB used bandwidth'),
+    (None,                                   'getDvbtHierarchy',                ':DVBT:HIER',                    None,      None, None, None,
+     'DVBT hierarchical mode'),
+    (None,                                   'getDvbtLpCoderate',               ':DVBT:RATE:LOW',                None,      None, None, None,
+     'DVB LP code rate'),
+    ('setDvbtSource(source)',                'getDvbtSource',                   ':DVBT:SOUR',                    'text',    ('EXT', 'TSPL', 'TEST'), None, None,
+     'DVB-T input signal source'),
+    ('setDvbtLpSource(source)',              'getDvbtLpSource',                 ':DVBT:SOUR:LOW',                'text',    ('EXT', 'TSPL', 'TEST'), None, None,
+     'DVB-T LP input signal source'),
+    ('setIsdbSystem(sys)',                   'getIsdbSystem',                   ':ISDBt:SYSTem',                 'text',    ('T', 'TSB1', 'TSB'), None, None,
+     'ISDBT system'),
+    ('setIsdbPortion(por)',                  'getIsdbPortion',                  ':ISDBt:PORTION',                'text',    ('PDD', 'PDC', 'PCC', 'DDD', 'DDC', 'DCC', 'CCC'), None, None,
+     'ISDBT portion'),
+    (None,                                   'getIsdbFft',                      ':ISDBt:FFT:MODE',               None,      None, None, None,
+     'ISDBT FFT mode'),
+    (None,                                   'getIsdbGuard',                    ':ISDBt:GUARd',                  None,      None, None, None,
+     'ISDBT guard'),
+    (None,                                   'getIsdbBandwidthVar',             ':ISDBt:BAND:VAR',               None,      None, None, None,
+     'ISDB-T Channel bandwidth variation'),
+    (None,                                   'getIsdbBandwidth',                ':ISDBt:CHAN:BAND',              None,      None, None, None,
+     'ISDB-T Channel bandwidth'),
+    ('setIsdbSpecial(state)',                'getIsdbSpecial',                  ':ISDBt:SPECial:SETTings:STAT',  'text',    ('ON', 'OFF'), None, None,
+     'state of the ISDBT special settings'),
+    ('setDvbcSource(source)',                'getDvbcSource',                   ':DVBC:SOUR',                    'text',    ('EXT', 'TSPL', 'TEST'), None, None,
+     'DVB-C input signal source'),
+    (None,                                   'getDvbcConst',                    ':DVBC:CONS',                    None,      None, None, None,
+     'DVB-C constellation'),
+    (None,                                   'getDvbcSymbolRate',               ':DVBC:SYMB',                    None,      None, None, None,
+     'DVB-C symbol rate'),
+    ('setJ83bSource(source)',                'getJ83bSource',                   ':J83B:SOUR',                    'text',    ('EXT', 'TSPL', 'TEST'), None, None,
+     'J.83/B input signal source'),
+    (None,                                   'getJ83bConst',                    ':J83B:CONS',                    None,      None, None, None,
+     'J.83/B constellation'),
+    (None,                                   'getJ83bSymbolRate',               ':J83B:SYMB',                    None,      None, None, None,
+     'J.83/B symbol rate'),
+    ('setJ83bInter(mode)',                   'getJ83bInter',                    ':J83B:INT:MODE',                'text',    None, None, None,
+     'J.83/B interleaver'),
+    ('setAtscFreqRef(ref)',                  'getAtscFreqRef',                  ':FREQ:VSBF',                    'text',    ('PIL', 'CENT'), None, None,
+     'ATSC frequency reference'),
+    (None,                                   'getDtmbNetworkMode',              ':DTMB:NETW',                    None,      None, None, None,
+     'state of the DTMB network mode'),
+    ('setDtmbSingleMode(state)',             'getDtmbSingleMode',               ':DTMB:SINGle',                  'text',    ('ON', 'OFF'), None, None,
+     'state of the DTMB single carrier mode'),
+    ('setDtmbDualPilot(state)',              'getDtmbDualPilot',                ':DTMB:DUAL:PILot',              'text',    ('ON', 'OFF'), None, None,
+     'state of the DTMB Dual Pilot tone'),
+    (None,                                   'getDtmbConst',                    ':DTMB:CONS',                    None,      None, None, None,
+     'DTMB constellation'),
+    (None,                                   'getDtmbCodeRate',                 ':DTMB:RATE',                    None,      None, None, None,
+     'DTMB Code rate'),
+    (None,                                   'getDtmbGuard',                    ':DTMB:GUARD',                   None,      None, None, None,
+     'DTMB guard interval'),
+    (None,                                   'getDtmbInterleaver',              ':DTMB:TIME:INT',                None,      None, None, None,
+     'DTMB time interleaver'),
+    (None,                                   'getDtmbBandwidth',                ':DTMB:CHAN:BAND',               None,      None, None, None,
+     'DTMB Channel bandwidth'),
+    ('setDtmbSpecial(state)',                'getDtmbSpecial',                  ':DTMB:SETT',                    'text',    ('ON', 'OFF'), None, None,
+     'state of the DTMB special setting'),
+    ('setDtmbPowerBoost(state)',             'getDtmbPowerBoost',               ':DTMB:SPEC:GIP',                'text',    ('ON', 'OFF'), None, None,
+     'state of the DTMB GI Power boost special setting'),
+    ('setDtmbSiPowerNorm(state)',            'getDtmbSiPowerNorm',              ':DTMB:SPEC:SIPN',               'text',    ('ON', 'OFF'), None, None,
+     'state of the DTMB SI Power Normalization special setting'),
+    ('setDtmbGiPn(state)',                   'getDtmbGiPn',                     ':DTMB:GIC',                     'text',    ('VAR', 'CONS'), None, None,
+     'DTMB Guard PN'),
+    (None,                                   'getT2Bandwidth',                  ':T2DV:CHAN',                    None,      None, None, None,
+     'DVB-T2 Channel bandwidth'),
+    (None,                                   'getT2UsedBandwidth',              ':T2DV:USED',                    None,      None, None, None,
+     'DVB-T2 usable channel bandwidth'),
+    (None,                                   'getT2BandwidthVar',               ':T2DV:BAND:VAR',                None,      None, None, None,
+     'DVB-T2 Channel bandwidth variation'),
+    (None,                                   'getT2FFTSize',                    ':T2DV:FFT:MODE',                None,      None, None, None,
+     'DVB-T2 FFT size'),
+    (None,                                   'getT2Guard',                      ':T2DV:GUAR:INT',                None,      None, None, None,
+     'DVB-T2 guard interval'),
+    (None,                                   'getT2PilotPat',                   ':T2DV:PIL',                     None,      None, None, None,
+     'DVB-T2 pilot pattern'),
+    (None,                                   'getT2FramesPerSuper',             ':T2DV:NT2F',                    None,      None, None, None,
+     'number of T2 frames per super frame (N_T2)'),
+    (None,                                   'getT2OfdmPerFrame',               ':T2DV:LF',                      None,      None, None, None,
+     'number of OFDM symbols per T2 frame (L_f), read only'),
+    (None,                                   'getT2DataPerFrame',               ':T2DV:LDAT',                    None,      None, None, None,
+     'number of data symbols per T2 frame (L_DATA)'),
+    (None,                                   'getT2TxSystem',                   ':T2DV:TXSY',                    None,      None, None, None,
+     'DVB-T2 transmission system'),
+    (None,                                   'getT2PAPR',                       ':T2DV:PAPR',                    None,      None, None, None,
+     'state of the DVB-T2 PAPR setting'),
+    (None,                                   'getT2FEF',                        ':T2DV:FEF',                     None,      None, None, None,
+     'state of the DVB-T2 FEF setting'),
+    (None,                                   'getT2TFS',                        ':T2DV:TFS',                     None,      None, None, None,
+     'state of the DVB-T2 TFS setting'),
+    (None,                                   'getT2L1T2Version',                ':T2DV:L:T2V',                   None,      None, None, None,
+     'state of the DVB-T2 L1T2 version'),
+    (None,                                   'getT2L1PostMod',                  ':T2DV:L:CONS',                  None,      None, None, None,
+     'state of the DVB-T2 L1 post modulation'),
+    ('setT2L1Repetition(state)',             'getT2L1Repetition',               ':T2DV:L:REP',                   'text',    ('OFF', 'ON'), None, None,
+     'state of the DVB-T2 L1 repetition setting'),
+    (None,                                   'getT2L1PostExtension',            ':T2DV:L:EXT',                   None,      None, None, None,
+     'state of the DVB-T2 L1 post extension setting'),
+    (None,                                   'getT2NumAuxStream',               ':T2DV:NAUX',                    None,      None, None, None,
+     'number of DVB-T2 auxiliary streams'),
+    (None,                                   'getT2L1RfSignalling',             ':T2DV:L:RFS',                   None,      None, None, None,
+     'state of the DVB-T2 L1 RF Signalling'),
+    (None,                                   'getT2CellId',                     ':T2DV:ID:CELL',                 None,      None, None, None,
+     'DVB-T2 cell id, the integer value of the hex number shown on the SFU screen'),
+    (None,                                   'getT2NetworkId',                  ':T2DV:ID:NETW',                 None,      None, None, None,
+     'DVB-T2 network id, the integer value of the hex number shown on the SFU screen'),
+    (None,                                   'getT2SystemId',                   ':T2DV:ID:T2SY',                 None,      None, None, None,
+     'DVB-T2 system id, the integer value of the hex number shown on the SFU screen'),
+    ('setT2MIInterface(state)',              'getT2MIInterface',                ':T2DV:INPUT:T2MI:INT',          'text',    ('OFF', 'ON'), None, None,
+     'state of the DVB-T2 MI Modulator Interface'),
+    (None,                                   'getT2MIsetT2MISource',            ':T2DV:INPUT:T2MI:SOUR',         None,      None, None, None,
+     'source of the DVB-T2 MI Modulator Interface stream'),
+    ('setT2EFEPayload(source)',              'getT2EFEPayload',                 ':T2DV:FEF:PAYL',                'text',    ('NULL', 'NOIS'), None, None,
+     'type of the DVB-T2 FEF Payload type'),
+    ('setT2BBMode(bbmode)',                  'getT2BBMode',                     ':T2DV:PLP1:BB_M',               'text',    ('HEM', 'NM'), None, None,
+     'type of the DVB-T2 BB Mode set'),
+    ('setT2MIpidId(pid)',                    'getT2MIpidId',                    ':T2DV:INP:T2MI:PID',            'text',    None, None, None,
+     'PID of the stream played within the T2MI stream'),
+    ('setT2MIsidId(sid)',                    'getT2MIsidId',                    ':T2DV:INP:T2MI:SID',            'text',    None, None, None,
+     'SID of the stream played within the T2MI stream'),
+    (None,                                   'getDvbsSource',                   ':DVBS:SOUR',                    None,      None, None, 'dvbs',
+     'DVB-S input signal source'),
+    (None,                                   'getDvbsConst',                    ':DVBS:CONS',                    None,      None, None, 'dvbs',
+     'DVBS constellation'),
+    (None,                                   'getDvbsSymbolRate',               ':DVBS:SYMB',                    None,      None, None, 'dvbs',
+     'DVB-S symbol rate'),
+    (None,                                   'getDvbsCoderate',                 ':DVBS:RATE',                    None,      None, None, 'dvbs',
+     'DVB-S code rate'),
+    (None,                                   'getDvbsRollOff',                  ':DVBS:ROLL',                    None,      None, None, 'dvbs',
+     'DVB-S value of roll off'),
+    (None,                                   'getDvbs2Source',                  ':DVBS2:SOUR',                   None,      None, None, 'dvbs2',
+     'DVB-S2 input signal source'),
+    (None,                                   'getDvbs2Const',                   ':DVBS2:CONS',                   None,      None, None, 'dvbs2',
+     'DVBS2 constellation'),
+    (None,                                   'getDvbs2SymbolRate',              ':DVBS2:SYMB',                   None,      None, None, 'dvbs2',
+     'DVB-S2 symbol rate'),
+    (None,                                   'getDvbs2Coderate',                ':DVBS2:RATE',                   None,      None, None, 'dvbs2',
+     'DVB-S2 code rate'),
+    (None,                                   'getDvbs2FecFrame',                ':DVBS2:FECF',                   None,      None, None, 'dvbs2',
+     'DVB-S2 FEC frame length, NORMAL for 64800 bit or SHORT for 16200 bit'),
+    ('setDvbs2Pilots(state)',                'getDvbs2Pilots',                  ':DVBS2:PIL',                    'text',    ('ON', 'OFF'), None, 'dvbs2',
+     'DVB-S2 pilots state'),
+    (None,                                   'getDvbs2RollOff',                 ':DVBS2:ROLL',                   None,      None, None, 'dvbs2',
+     'DVB-S2 roll off, 0.05 | 0.1 | 0.15 | 0.2 | 0.25 | 0.35'),
+    ('setDvbs2InputSignal(inputSig)',        None,                              ':DVBS2:SOUR',                   'text',    ('EXT', 'TSP', 'TEST'), None, 'dvbs2',
+     'DVB-S2 input signal source'),
+    ('setAtvVideoSource(source)',            'getAtvVideoSource',               ':RATV:VID:VINP',                'text',    ('EXT', 'VGEN'), None, None,
+     'Video input signal source'),
+    (None,                                   'getAtvVisionPicture',             ':RATV:VIDG:VIS',                None,      None, None, None,
+     'vision picture being generated'),
+    ('setAtvAudioSource(source)',            'getAtvAudioSource',               ':RATV:AUD:AINP',                'text',    ('EXT', 'AGEN', 'APL'), None, None,
+     'Audio input signal source'),
+    ('setAtvAudioExtZ(impedance)',           'getAtvAudioExtZ',                 ':RATV:AUEX:IMP',                'text',    ('Z50', 'Z600'), None, None,
+     'value of the input impedance of the external audio input'),
+    (None,                                   'getAtvSoundMode',                 ':RATV:SOUN:MODE',               None,      None, None, None,
+     'Audio sound mode'),
+    (None,                                   'getAtvSoundNicam',                ':RATV:SOUN:NICS',               None,      None, None, None,
+     'NICAM modulation signal'),
+    (None,                                   'getAtvSpecialState',              ':RATV:SPEC:SETT:STAT',          None,      None, None, None,
+     'overall state of the ATV special settings'),
+    ('setAtvSpecialAMDepth(depth)',          'getAtvSpecialAMDepth',            ':RATV:SPEC:SOUN:AMD',           'text',    None, None, None,
+     'modulation depth of the L standard amplitude-modulated sound'),
+    (None,                                   'getAtvSpecialFrqDeviationPilot',  ':RATV:SPEC:SOUN:DEVP',          None,      None, None, None,
+     'frequency deviation of the pilot carrier on sound subcarrier 2'),
+    ('setAtvSpecialPilotState(state)',       'getAtvSpecialPilotState',         ':RATV:SPEC:SOUN:PIL',           'text',    ('ON', 'OFF'), None, None,
+     'state of the pilot carrier on sound subcarrier 2'),
+    (None,                                   'getAtvSpecialPreemphasis',        ':RATV:SPEC:SOUN:PRE',           None,      None, None, None,
+     'preemphasis for the AF sound channels'),
+    ('setAtvSpecialVisionCarrier(state)',    'getAtvSpecialVisionCarrier',      ':RATV:SPEC:TRP:CARR',           'text',    ('ON', 'OFF'), None, None,
+     'state of the vision carrier'),
+    ('setAtvSpecialGDPrecorrection(state)',  'getAtvSpecialGDPrecorrection',    ':RATV:SPEC:TRP:GDPR',           'text',    ('ON', 'OFF'), None, None,
+     'state of the video group delay precorrection'),
+    (None,                                   'getAtvSpecialResidualCarrier',    ':RATV:SPEC:TRP:RES',            None,      None, None, None,
+     'amount of residual carrier'),
+    ('setAtvSpecialVideoSignal(state)',      'getAtvSpecialVideoSignal',        ':RATV:SPEC:TRP:VID',            'text',    ('ON', 'OFF'), None, None,
+     'state of the video signal'),
+    ('setAtvSpecialVSBFilter(state)',        'getAtvSpecialVSBFilter',          ':RATV:SPEC:TRP:VSBF',           'text',    ('ON', 'OFF'), None, None,
+     'state of the vestigial sideband filter'),
+    ('setAtvSpecialVSBCharact(char)',        'getAtvSpecialVSBCharact',         ':RATV:SPEC:TRP:VSBC',           'text',    ('BG', 'BGA', 'I', 'I1', 'DKN', 'DKFM', 'DK', 'M', 'N', 'L', 'LNIC'), None, None,
+     'vestigial sideband filter characteristic'),
+)
+# setters whose message or readback check differs from the usual form, kept as the
+# hand-written setters had them: setter -> {'suffix': message after the value, 'check': str}
+COMMAND_OVERRIDES = {'setFrequency': {'suffix': ';FREQ?'},
+                     'setRfVoltage': {'check': str}}
+OPTION_MESSAGES = {'awgn':           'AWGN Noise function not available',
+                   'phaseNoise':     'Phase Noise function not available',
+                   'impulsiveNoise': 'Impulsive Noise function not available',
+                   'fading':         'Fading function not available',
+                   'tsplayer':       'TS player function not available',
+                   'arb':            'ARB function not available',
+                   'dvbs':           'DVBS function not available',
+                   'dvbs2':          'DVBS2 function not available'}
+# generated setters are compiled from this so that they keep the parameter
+# name of the hand-written setter, e.g. setFrequency(freq=474000000) still works
+SETTER_TEMPLATE = '''def {name}(sfu, {parameter}):
+    return sfu.sendCommand(command, {parameter})
+'''
+
+
+def settingFailed(res):
+    '''True if the result of a setter shows the setting was not applied'''
+    return [mark for mark in FAILED_MARKS if mark in str(res)] != []
+
+
+def packMessages(parts, limit, suffix=''):
+    '''Joins parts into as few compound messages of at most limit characters
+    as possible, suffix (e.g. ";*OPC?") ending the last one'''
+    messages = []
+    current = ''
+    for part in parts:
+        if current and len(current) + len(part) + len(suffix) + 1 > limit:
+            messages.append(current)
+            current = part
+        else:
+            current = (part, current + ';' + part)[current != '']
+    messages.append(current + suffix)
+    return messages
+
+
+def packRelative(parts, limit, suffix=''):
+    '''Like packMessages for (header, rest) parts with absolute headers, but
+    a header under the same parent node as the one before it in a message is
+    sent relative to it, e.g. ":FSIM1:DEL:GRO1:PATH1:LOSS 0;ADEL 0.5;PRAT 0",
+    which makes a fading table a fraction of the length'''
+    messages = []
+    current = ''
+    parent = None
+    for header, rest in parts:
+        node, _, leaf = header.rpartition(':')
+        text = (header + rest, leaf + rest)[node == parent and current != '']
+        if current and len(current) + len(text) + len(suffix) + 1 > limit:
+            messages.append(current)
+            current = header + rest     # a new message starts again from the root
+        else:
+            current = (text, current + ';' + text)[current != '']
+        parent = node
+    messages.append(current + suffix)
+    return messages
+
+
+def fadingValue(value):
+    '''Formats a fading table value, e.g. 3.0 from a NumPy array as "3"'''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def fadingRows(table):
+    '''Turns a fading table into (group, path, {parameter: value}) rows.
+    table is a list of dicts with "group", "path" and parameter names (or
+    FADING_PARAMETERS indexes) as keys, a NumPy structured array with those
+    field names, or a 2-D array whose columns are group, path and the
+    parameters in FADING_PARAMETERS order. Missing, None and NaN values are
+    left out.'''
+    names = [name for name, _, _ in FADING_PARAMETERS]
+    if hasattr(table, 'dtype') and table.dtype.names:
+        table = [dict(zip(table.dtype.names, row)) for row in table.tolist()]
+    elif hasattr(table, 'tolist'):
+        table = [dict(zip(['group', 'path'] + names, row)) for row in table.tolist()]
+    rows = []
+    for entry in table:
+        values = {}
+        for key, value in entry.items():
+            if key in ('group', 'path') or value is None or value != value:
+                continue
+            index = key if isinstance(key, int) else names.index(key)
+            values[index] = fadingValue(value)
+        rows.append((int(entry['group']), int(entry['path']), values))
+    return rows
+
+
+def fadingMatches(sent, read):
+    '''True if a fading readback agrees with the value sent: numbers compared
+    as numbers, ON/OFF as 1/0 and names by their short form'''
+    sent = {'ON': '1', 'OFF': '0'}.get(sent.upper(), sent)
+    read = read.strip().strip('"')
+    try:
+        return Decimal(sent) == Decimal(read)
+    except ArithmeticError:
+        return sent.upper().startswith(read.upper()) or read.upper().startswith(sent.upper())
+
+
+def parseErrors(reply):
+    '''Splits a SYST:ERR:ALL? reply such as '-113,"Undefined header;FREQQ",-222,"Data out of range"'
+    into one string per error, leaving out 0,"No error"'''
+    errors = re.findall(r'[-+]?\d+,"[^"]*"', reply)
+    if not errors and reply.strip() and 'No error' not in reply:
+        errors = [reply.strip()]
+    return [error for error in errors if not error.startswith('0,')]
+
+
+def attributeError(error, commands):
+    '''Returns the command whose header is quoted in the error text, as the
+    SFU does for command errors, or None if the error doesn't name one'''
+    text = error.upper()
+    for cmd in reversed(commands):
+        for part in splitScpi(cmd):
+            header = part.split(' ')[0].strip(':?').upper()
+            if header and not header.startswith('*') and header in text:
+                return cmd
+    return None
+
+
+# setupSFU setting -> SfuClass setter, common settings usable by all standards
+SETTERS = {'base':        'base',
+           'standard':    'setStandard',
+           'power':       'setRfLevel',
+           'pwrLimit':    'setRfLimit',
+           'rfState':     'setRfState',
+           'modState':    'setModulationState',
+           'freq':        'setFrequency',
+           'freqOff':     'setFreqOff',
+           'snr':         'setSnr',
+           'noiseState':  'setNoise',
+           'noiseType':   'setNoiseType',
+           'fadingState': 'setFadingState',
+           'intSource':   'setInterfSource',
+           'intType':     'setInterfType',
+           'intFreq':     'setInterfFreq',
+           'intSigFreq':  'setInterfSigSour',
+           'intNoise':    'setInterfNoiseAdd',
+           'intAtt':      'setInterfAtt',
+           'intLev':      'setInterfLevel',
+           'intRef':      'setInterfRef',
+           'arbFile':     'setArb',
+           'arbState':    'setArbState',
+           'arbClock':    'setArbClock',
+           'iBurst':      'setPulseNoiseBurst',
+           'iNoise':      'setPulseNoise',
+           'pNoise':      'setPhaseNoise',
+           'phaseFile':   'setPhaseShape',
+           'sigSource':   'setSignalSource',
+           'arbState':    'setArbState',
+           'noiseBW':     'setNoiseBandwidth',
+           'noiseBWcoup': 'setNoiseBwCoup',
+           'spectrum':    'setSpectrum',
+           'TSfile':      'setTsGenFile',
+           'TSstate':     'setTsGenState',
+           'BERmeasStat': 'setBerMeasState',
+           'BERrestart':  'setBerMeasRestart',
+           'BERgateMode': 'setBerGateMode',
+           'DTNormalise': 'setDTFadNormalise',
+           'Attenuator':  'setAttenuator',
+           'preset':      'setFadingPreset',
+           'profile':     'setFadingProfile',
+           'frameBurst':  'setPulseNoiseFrameBurst',
+           'fadCommon':   'setFadingCommon',
+           'arbFile':     'setArb',
+           'pulseMinMax': 'setPulseNoiseMinMax',
+           'IQScaling':   'setArbGain'}
+# setters added or replaced for particular standards
+STD_SETTERS = {
+    ('DVBS2X', 'DVBS2'): {'const':    'setDvbs2Const',             # constellation settings (modulation):  4 (QPSK) 8 (8PSK) 16 (16APSK) 32 (32APSK)
+                          'codeRate': 'setDvbs2Coderate',          # 1_4  1_3  2_5  1_2  3_5  2_3  3_4  4_5  5_6  6_7  7_8  8_9  9_10
+                          'baudrate': 'setDvbs2SymbolRate',        # 1000000 to 45000000 baud
+                          'pilots':   'setDvbs2Pilots',            # Pilots state to ON or OFF
+                          'rollOff':  'setDvbs2RollOff',           # roll-off settings are: 15 (0.15)  20 (0.20)  25 (0.25)  35 (0.35)
+                          'FECframe': 'setDvbs2FecFrame',          # FEC frame length condition NORMAL for 64800 bit, SHORT for 16200 bit
+                          'signal':   'setDvbs2Source'},           # Sets DVB-S2X input signal source: EXT, TSPL or TEST
+    ('DVBS', ): {'codeRate': 'setDvbsCoderate',           # 1_4  1_3  2_5  1_2  3_5  2_3  3_4  4_5 5_6  6_7  7_8 1 8_9  9_10
+                 'baudrate': 'setDvbsSymbolRate',         # 1000000 to 45000000 baud
+                 'signal':   'setDvbsSource',             # Sets DVB-S input signal source: EXT, TSPL or TEST
+                 'const':    'setDvbsConst',              # constellation settings (modulation):  4 (QPSK) 8 (8PSK) 16 (16APSK) 32 (32APSK)
+                 'rollOff':  'setDvbsRollOff'},           # roll-off settings are: 15 (0.15)  20 (0.20)  25 (0.25)  35 (0.35)
+    ('DVBT2', ): {'FECframe':       'setT2FECFrame',
+                  'codeRate':       'setT2CodeRate',
+                  'const':          'setT2Const',
+                  'constRot':       'setT2ConstRot',
+                  'timeIntType':    'setT2TimeIntType',
+                  'timeIntFrame':   'setT2TimeIntFrame',
+                  'timeIntLen':     'setT2TimeIntLength',
+                  'plpNumBlocks':   'setT2DateNumBlock',
+                  'bandwidth':      'setT2Bandwidth',
+                  'bandwidthVar':   'setT2BandwidthVar',
+                  'FFT_bwExt':      'setT2FFTSize',
+                  'guard':          'setT2Guard',
+                  'PP':             'setT2PilotPat',
+                  'framesPerSuper': 'setT2FramesPerSuper',
+                  'dataPerFrame':   'setT2DataPerFrame',
+                  'slicesPerFrame': 'setT2SlicesPerFrame',
+                  'networkMode':    'setT2NetworkMode',
+                  'TxSystem':       'setT2TxSystem',
+                  'PAPR':           'setT2PAPR',
+                  'L1T2Version':    'setT2L1T2Version',
+                  'L1PostMod':      'setT2L1PostMod',
+                  'L1Rep':          'setT2L1Repetition',
+                  'L1PostExt':      'setT2L1PostExtension',
+                  'NumAuxStr':      'setT2NumAuxStream',
+                  'L1RfSig':        'getT2L1RfSignalling',
+                  'CellId':         'setT2CellId',
+                  'NetworkId':      'setT2NetworkId',
+                  'SystemId':       'setT2SystemId',
+                  'T2MIState':      'setT2MIInterface',
+                  'T2MISource':     'setT2MISource',
+                  'T2MIpidId':      'setT2MIpidId',
+                  'T2MIsidId':      'setT2MIsidId',
+                  'groupRef':       'setDektecT2Group',
+                  'FEFpayload':     'setT2EFEPayload',
+                  'BBMode':         'setT2BBMode',
+                  'standard':       'setStandard',
+                  't_bandwidth':    'setDvbtBand',
+                  't_fft':          'setDvbtFft',
+                  't_guard':        'setDvbtGuard',
+                  't_const':        'setDvbtCons',
+                  't_codeRate':     'setDvbtCoderate',
+                  't_usedBW':       'setDvbtUsedBand',
+                  't2_bandwidth':   'setT2Bandwidth'},
+    ('DVBT', ): {'bandwidth':  'setDvbtBand',
+                 'fft':        'setDvbtFft',
+                 'guard':      'setDvbtGuard',
+                 'const':      'setDvbtCons',
+                 'codeRate':   'setDvbtCoderate',
+                 'usedBW':     'setDvbtUsedBand',
+                 'hierarchy':  'setDvbtHierarchy',
+                 'codeRateLp': 'setDvbtLpCoderate',
+                 'source':     'setDvbtSource',
+                 'sourceLp':   'setDvbtLpSource'}
+}
+
+# getSFUSetting setting -> SfuClass getter
+GETTERS = {'standard':    'getStandard',
+           'power':       'getRfLevel',
+           'pwrLimit':    'getRfLimit',
+           'rfState':     'getRfState',
+           'modState':    'getModulationState',
+           'freq':        'getFrequency',
+           'freqOff':     'getFreqOff',
+           'snr':         'getSnr',
+           'noiseState':  'getNoise',
+           'noiseType':   'getNoiseType',
+           'fadingState': 'getFadingState',
+           'intSource':   'getInterfSource',
+           'intType':     'getInterfType',
+           'intFreq':     'getInterfFreq',
+           'intSigFreq':  'getInterfSigSour',
+           'intNoise':    'getInterfNoiseAdd',
+           'intAtt':      'getInterfAtt',
+           'intLev':      'getInterfLevel',
+           'intRef':      'getInterfRef',
+           'arbFile':     'getArb',
+           'arbState':    'getArbState',
+           'arbClock':    'getArbClock',
+           'iBurst':      'getPulseNoiseBurst',
+           'iNoise':      'getPulseNoise',
+           'pNoise':      'getPhaseNoise',
+           'phaseFile':   'getPhaseShape',
+           'sigSource':   'getSignalSource',
+           'noiseBW':     'getNoiseBandwidth',
+           'noiseBWcoup': 'getNoiseBwCoup',
+           'spectrum':    'getSpectrum',
+           'TSfile':      'getTsGenFile',
+           'TSstate':     'getTsGenState',
+           'BERmeasStat': 'getBerMeasState',
+           'BERgateMode': 'getBerGateMode',
+           'frameBurst':  'getPulseNoiseFrameBurst',
+           'fadCommon':   'getFadingReference',
+           'Attenuator':  'getAttenuator',
+           'profile':     'getNoCommand',
+           'preset':      'getNoCommand',
+           'pulseMinMax': 'getPulseNoiseMinMax',
+           'IQScaling':   'getArbGain'}
+# getters added or replaced for particular standards
+STD_GETTERS = {
+    ('DVBS2X', 'DVBS2'): {'signal':   'getDvbs2Source',            # Sets DVB-S2X input signal source: EXT, TSPL or TEST
+                          'FECframe': 'getDvbs2FecFrame'},         # FEC frame length condition NORMAL for 64800 bit, SHORT for 16200 bit
+    ('DVBS', ): {'signal': 'getDvbsSource'},              # Sets DVB-S2X input signal source: EXT, TSPL or TEST
+    ('DVBT2', ): {'FECframe':       'getT2FECFrame',
+                  'codeRate':       'getT2CodeRate',
+                  'const':          'getT2Const',
+                  'constRot':       'getT2ConstRot',
+                  'timeIntType':    'getT2TimeIntType',
+                  'timeIntFrame':   'getT2TimeIntFrame',
+                  'timeIntLen':     'getT2TimeIntLength',
+                  'plpNumBlocks':   'getT2DateNumBlock',
+                  'bandwidth':      'getT2Bandwidth',
+                  'bandwidthVar':   'getT2BandwidthVar',
+                  'FFT_bwExt':      'getT2FFTSize',
+                  'guard':          'getT2Guard',
+                  'PP':             'getT2PilotPat',
+                  'framesPerSuper': 'getT2FramesPerSuper',
+                  'dataPerFrame':   'getT2DataPerFrame',
+                  'slicesPerFrame': 'getT2SlicesPerFrame',
+                  'networkMode':    'getT2NetworkMode',
+                  'TxSystem':       'getT2TxSystem',
+                  'PAPR':           'getT2PAPR',
+                  'L1T2Version':    'getT2L1T2Version',
+                  'L1PostMod':      'getT2L1PostMod',
+                  'L1Rep':          'getT2L1Repetition',
+                  'L1PostExt':      'getT2L1PostExtension',
+                  'NumAuxStr':      'getT2NumAuxStream',
+                  'L1RfSig':        'getT2L1RfSignalling',
+                  'CellId':         'getT2CellId',
+                  'NetworkId':      'getT2NetworkId',
+                  'SystemId':       'getT2SystemId',
+                  'T2MIState':      'getT2MIInterface',
+                  'T2MISource':     'getT2MIsetT2MISource',
+                  'T2MIpidId':      'getT2MIpidId',
+                  'T2MIsidId':      'getT2MIsidId',
+                  'groupRef':       'getDektecT2Group',
+                  'FEFpayload':     'getT2EFEPayload',
+                  'BBMode':         'getT2BBMode',
+                  'standard':       'getStandard',
+                  't_bandwidth':    'getDvbtBand',
+                  't_fft':          'getDvbtFft',
+                  't_guard':        'getDvbtGuard',
+                  't_const':        'getDvbtCons',
+                  't_codeRate':     'getDvbtCoderate',
+                  't_usedBW':       'getDvbtUsedBand',
+                  't2_bandwidth':   'getT2Bandwidth'},
+    ('DVBT', ): {'bandwidth':  'getDvbtBand',
+                 'fft':        'getDvbtFft',
+                 'guard':      'getDvbtGuard',
+                 'const':      'getDvbtCons',
+                 'codeRate':   'getDvbtCoderate',
+                 'usedBW':     'getDvbtUsedBand',
+                 'hierarchy':  'getDvbtHierarchy',
+                 'codeRateLp': 'getDvbtLpCoderate',
+                 'source':     'getDvbtSource',
+                 'sourceLp':   'getDvbtLpSource'}
+}
+
+
+class BoundMethods:
+    '''A setting -> method name table shared by all SfuClass objects of a
+    standard. The method is bound to the instance when it is looked up, and
+    entries set on an instance only change that instance.'''
+    def __init__(self, sfu, names):
+        self.sfu = sfu
+        self.names = names
+        self.own = {}
+
+    def __getitem__(self, setting):
+        if setting in self.own:
+            return self.own[setting]
+        return getattr(self.sfu, self.names[setting])
+
+    def __setitem__(self, setting, method):
+        self.own[setting] = method
+
+    def __contains__(self, setting):
+        return setting in self.own or setting in self.names
+
+    def get(self, setting, default=None):
+        return self[setting] if setting in self else default
+
+    def keys(self):
+        return list(set(self.names) | set(self.own))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+class ScpiCommand:
+    '''One COMMANDS row compiled into message templates and range limits,
+    built once at import and shared by every SfuClass object. Its setter
+    and getter go through SfuClass.sendCommand and SfuClass.readCommand.'''
+    def __init__(self, setter, getter, header, argument, values, error, option, description):
+        self.setter, self.parameter = None, None
+        if setter:
+            self.setter, self.parameter = re.match(r'(\w+)\((\w+)\)$', setter).groups()
+        setter = self.setter
+        self.getter = getter
+        override = COMMAND_OVERRIDES.get(setter, {})
+        self.prefix = header + ' '
+        self.suffix = override.get('suffix', ';*WAI;{}?'.format(header))
+        self.query = header + '?'
+        self.number = argument == 'number'
+        self.checkText = override.get('check') == str       # readback checked against the value as sent
+        self.limits = None
+        if self.number and values:
+            self.limits = (Decimal(str(values[0])), Decimal(str(values[1])))
+        self.values = values
+        self.error = '****    Error: {} out of range'.format(error)
+        self.option = option
+        self.unavailable = OPTION_MESSAGES.get(option)
+        self.description = description
+
+    def setterMethod(self):
+        namespace = {'command': self}
+        exec(SETTER_TEMPLATE.format(name=self.setter, parameter=self.parameter), namespace)
+        setter = namespace[self.setter]
+        setter.__doc__ = 'Sets the {}.'.format(self.description)
+        if self.limits:
+            setter.__doc__ += '    {} to {}'.format(*self.values)
+        elif self.values:
+            setter.__doc__ += '    {}'.format(' | '.join('"{}"'.format(value) for value in self.values))
+        return setter
+
+    def getterMethod(self):
+        command = self
+
+        def getter(sfu, fresh=False):
+            return sfu.readCommand(command, fresh)
+        getter.__name__ = self.getter
+        getter.__doc__ = 'Returns the {}.'.format(self.description)
+        return getter
+
+
+def addCommands(cls, commands):
+    '''Compiles COMMANDS rows and adds their setters and getters to cls'''
+    for row in commands:
+        command = ScpiCommand(*row)
+        if command.setter:
+            setattr(cls, command.setter, command.setterMethod())
+        if command.getter:
+            setattr(cls, command.getter, command.getterMethod())
+
+
+class OptionFlag(object):
+    '''An SfuClass option flag such as sfu.arb, looked up in the capability
+    profile the first time any flag is read. A Dektec has every option.'''
+    def __init__(self, option):
+        self.option = option
+
+    def __get__(self, sfu, owner):
+        if sfu is None:
+            return self
+        return sfu.type == "Dektec" or self.option in sfu.capabilities()['options']
+
+
+class SfuBatch:
+    '''Collects the set-and-readback commands issued by setupSFU calls and
+    sends them as a few packed compound messages ending with a single *OPC?,
+    then verifies the readbacks in compound queries of up to MAX_QUERIES.
+    A command that writes a node already queued sends the queue first, so
+    every readback is checked against the last value written to it.
+    Use through SfuClass.transaction():
+        with sfu.transaction() as batch:
+            sfu.setupSFU('freq', 474000000)
+            sfu.setupSFU('power', -50)
+        print batch.results'''
+    def __init__(self, sfu):
+        self.sfu = sfu
+        self.setting = ''
+        self.pending = []       # (setting, cmd, set parts, readback query, check)
+        self.nodes = set()      # node keys written by the pending commands
+        self.results = []       # (setting, cmd, verified readback)
+
+    def __enter__(self):
+        self.sfu.batch = self
+        return self
+
+    def __exit__(self, excType, excValue, trace):
+        self.sfu.batch = None
+        if excType is None:
+            self.commit()
+        return False
+
+    def queue(self, cmd, check):
+        '''Queues a "SET;*WAI;QUERY?" style command. Returns None if the
+        command can't be deferred, after flushing anything already queued so
+        that the caller can run it straight away in the right order.'''
+        parts = [part for part in splitScpi(cmd) if part and part.upper() != '*WAI']
+        special = [part for part in parts if part.startswith('*') or 'MMEM' in part.upper()]
+        if len(parts) < 2 or special or not parts[-1].endswith('?') or [part for part in parts[:-1] if part.endswith('?')]:
+            self.commit()
+            return None
+        nodes = set(scpi_cache.nodeKey(part.split(' ')[0]) for part in parts)
+        if [node for node in nodes for queued in self.nodes if scpi_cache.related(node, queued)]:
+            # readbacks are checked after the whole batch, so a node written twice must be sent first
+            self.commit()
+        self.pending.append((self.setting, cmd, [self.absolute(part) for part in parts[:-1]], self.absolute(parts[-1]), check))
+        self.nodes.update(nodes)
+        return "____    Queued in batch: {}".format(cmd)
+
+    def absolute(self, part):
+        '''Gives each command a root path so packing can't change what a
+        relative header like "DM:IREF?" refers to'''
+        return part if part.startswith(':') else ':' + part
+
+    def pack(self, parts, suffix=''):
+        return packMessages(parts, self.sfu.MAX_CMD_LEN, suffix)
+
+    def commit(self):
+        '''Sends all queued settings then verifies all readbacks'''
+        if not self.pending:
+            return self.results
+        pending = self.pending
+        self.pending = []
+        self.nodes = set()
+        sfu = self.sfu
+        for entry in pending:
+            if entry[0] in sfu.appliedNodes:
+                sfu.appliedNodes[entry[0]].update(scpi_cache.nodeKey(part.split(' ')[0]) for part in entry[2])
+        active, applying = sfu.batch, sfu.applying
+        sfu.batch = None        # the packed messages themselves must go straight out
+        sfu.applying = ''       # the nodes were noted above, sending them drops no applied setting
+        try:
+            self.send(pending)
+        finally:
+            sfu.batch, sfu.applying = active, applying
+        return self.results
+
+    def send(self, pending):
+        sfu = self.sfu
+        setParts = []
+        for entry in pending:
+            setParts.extend(entry[2])
+        messages = self.pack(setParts, ';*OPC?')
+        for message in messages[:-1]:
+            sfu.writeSFU(message)
+        opc = sfu.querySFU(messages[-1])
+        if 'Operation Complete' not in opc:
+            for setting, cmd, _, _, _ in pending:
+                self.results.append((setting, cmd, opc))
+                sfu.applied.pop(setting, None)
+            return
+        for first in range(0, len(pending), sfu.MAX_QUERIES):
+            start = first
+            for message in self.pack([entry[3] for entry in pending[first:first + sfu.MAX_QUERIES]]):
+                count = len(splitScpi(message))
+                group = pending[start:start + count]
+                start += count
+                replies = splitScpi(sfu.readSFU(message))
+                if len(replies) != len(group):
+                    # a failed query stops the instrument parsing the message, check one by one
+                    replies = [sfu.readSFU(entry[3]) for entry in group]
+                for entry, reply in zip(group, replies):
+                    self.results.append((entry[0], entry[1], sfu.checkResult(entry[1], reply, entry[4])))
+        if sfu.deferErrors:
+            # one error check for the whole batch, each error put against the setting that caused it
+            for cmd, error in sfu.checkpoint():
+                entries = [entry for entry in pending if attributeError(error, [entry[1]])]
+                entries = entries or [entry for entry in pending if entry[2][0] in cmd] or pending
+                self.results.append((entries[-1][0], entries[-1][1], "****    SFU check - Error = {}".format(error)))
+        for setting, _, res in self.failures():
+            sfu.applied.pop(setting, None)      # was recorded as applied when it was queued
+
+    def failures(self):
+        '''Returns the results that did not verify'''
+        return [res for res in self.results if settingFailed(res[2])]
+
+
+class SfuSnapshot:
+    '''Reads many getSFUSetting values in a few compound queries. Each getter
+    is first run without sending anything, to find the plain queries it
+    makes; those are sent packed into as few messages as the SFU buffers
+    allow and the getters are run again answered from the replies, so the
+    values are exactly what getSFUSetting would have returned. A query that
+    wasn't prefetched, or whose message failed, goes to the SFU on its own.
+    Use through SfuClass.snapshot().'''
+    def __init__(self, sfu):
+        self.sfu = sfu
+        self.discovering = False
+        self.queries = []
+        self.replies = {}
+        self.messages = 0
+
+    def answer(self, cmd):
+        '''Returns the reply to a plain query such as ":FREQ?", or None if
+        the command has to be sent'''
+        cmd = cmd.strip()
+        if ';' in cmd or ' ' in cmd or not cmd.endswith('?') or cmd.startswith('*'):
+            return None
+        if self.discovering:
+            if cmd not in self.queries:
+                self.queries.append(cmd)
+            return ''
+        return self.replies.get(cmd)
+
+    def discover(self, getters):
+        '''Runs each getter with nothing sent, collecting its plain queries'''
+        sfu = self.sfu
+        sfu.capabilities()      # option flags read inside the getters must not be answered here
+        sfu.prefetch = self
+        self.discovering = True
+        try:
+            for getter in getters:
+                try:
+                    getter()
+                except Exception:
+                    pass        # a getter upset by the blank replies has made its queries by then
+        finally:
+            self.discovering = False
+            sfu.prefetch = None
+        return self.queries
+
+    def take(self, keys):
+        '''Returns {setting: getSFUSetting(setting)} for every key'''
+        sfu = self.sfu
+        self.discover([lambda key=key: sfu.getSFUSetting(key) for key in keys])
+        sfu.prefetch = self
+        try:
+            if sfu.type == "SFU":
+                self.fetch()
+            values = {}
+            for key in keys:
+                try:
+                    values[key] = sfu.getSFUSetting(key)
+                except Exception as e:
+                    values[key] = '****    Error: {} - {}'.format(type(e).__name__, e)    # one broken getter doesn't lose the snapshot
+            return values
+        finally:
+            sfu.prefetch = None
+
+    def fetch(self):
+        sfu = self.sfu
+        for start in range(0, len(self.queries), sfu.MAX_QUERIES):
+            for message in packMessages(self.queries[start:start + sfu.MAX_QUERIES], sfu.MAX_CMD_LEN):
+                queries = splitScpi(message)
+                replies = splitScpi(sfu.readSFU(message))
+                self.messages += 1
+                if len(replies) == len(queries):
+                    self.replies.update(zip(queries, replies))
+
+
+def typedValue(reply):
+    '''Converts a getter reply to an int or Decimal if it is a plain number
+    and takes the quotes off a string, anything else is left as it is'''
+    if not isinstance(reply, str):
+        return reply
+    text = reply.strip()
+    if len(text) > 1 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1]
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return text
+    if not number.is_finite():
+        return text
+    return (number, int(number))[text.lstrip('+-').isdigit()]
+
+
+def readSnapshots(path):
+    '''Yields the snapshots recorded by SfuClass.snapshot, oldest first'''
+    with open(path) as records:
+        for line in records:
+            if line.strip():
+                yield json.loads(line)
+
 
 class SfuClass:
     '''A Class representing a SFU 
     Allows remote control of a SFU using SCPI commands'''
-    def __init__(self, common, sfuInst='', timeout=30, Debug=1):
+    dvbt       = OptionFlag('SFU-K1')
+    dvbc       = OptionFlag('SFU-K2')
+    dvbs       = OptionFlag('SFU-K3')
+    dvbs2      = OptionFlag('SFU-K8')
+    tdmbdab    = OptionFlag('SFU-K11')
+    tsplayer   = OptionFlag('SFU-K20')
+    arb        = OptionFlag('SFU-K35')
+    awgn       = OptionFlag('SFU-K40')
+    phaseNoise = OptionFlag('SFU-K41')
+    impulsiveNoise = OptionFlag('SFU-K42')
+    fading     = OptionFlag('SFU-B30')
+    dispatch = {}           # standard -> (setters, getters), merged once for all instances
+    dektecSync = DEKTEC_SYNC
+    dektecReplyTimeout = DEKTEC_REPLY_TIMEOUT
+    BUFSIZ = 1024
+    PORT = 5025
+    MAX_CMD_LEN = 4000      # keep packed messages inside the SFU input buffer
+    MAX_QUERIES = 60        # queries per compound read, keeps the reply inside the output buffer
+
+    def __init__(self, common, sfuInst='', timeout=30, Debug=1, deferErrors=False):
         '''The Constructor
         Records the network name of the selected SFU'''   
         self.std = common['STD'].upper()          # standard being tested
@@ -16,294 +1091,291 @@ class SfuClass:
             sfuInst = str(common['sfu'])
             Debug = (1, 0)['N' in common.get('debugCTS', '')]
         self.id = sfus.get(str(sfuInst), 'Unable to find sfu {}'.format(str(sfuInst)))        
-        self.BUFSIZ = 1024
         self.HOST = self.id
-        self.PORT = 5025
         self.ADDR = (self.HOST, self.PORT)
+        self.pool = scpi_pool.getPool(self.ADDR, bufsize=self.BUFSIZ)   # persistent connections shared by all SfuClass on this host
+        self.connection = scpi_recorder.connectionLabel(self.ADDR)     # names this SFU in SCPI recordings
+        self.batch = None
+        self.prefetch = None
+        self.cache = scpi_cache.getCache(self.ADDR)    # readbacks of settings made through any SfuClass on this host
+        self.cache.listen(self.cacheSet)
+        self.applied = {}                          # setupSFU setting -> last value applied without error
+        self.appliedNodes = {}                     # setupSFU setting -> node keys its setter writes
+        self.applying = None                       # setting setupSFU is applying, its writes don't drop applied settings
+        self.appliedClears = 0                     # cache clears already accounted for in applied
+        self.fadingTable = None                    # (hash, cache clears) of the last fading table verified, dropped by any FSIM write
+        self.lastUpload = None                     # report of the last uploadFile
+        self.baseStates = scpi_basestate.getBaseStates()
+        self.baseClean = True                      # the stored base fingerprint may still hold, the next set drops it
+        self.baseStats = {'loads': 0, 'skips': 0, 'saved': 0.0, 'checks': 0.0}
+        self.deferErrors = deferErrors             # read *ESR? with each query, SYST:ERR:ALL? only when it shows an error
+        self.unchecked = ['(before connection)']   # commands sent since the last *ESR? reading
+        self.errorWindows = []                     # commands whose *ESR? reading showed an error, not yet drained
+        self.errorLog = []                         # (command, error) found by every checkpoint
+        self.errorStats = {'piggybacked': 0, 'polls': 0, 'drains': 0, 'errors': 0}
         self.timeout = timeout
         self.debug = Debug
+        self.waiter = scpi_completion.CompletionWaiter(self.querySFU, self.writeSFU, name=self.id, timeout=timeout)
         if self.debug:
             print self.id
-        if int(sfuInst) > 10 and int(sfuInst) < 9000:
+        if str(sfuInst).isdigit() and int(sfuInst) > 10 and int(sfuInst) < 9000:
             self.type = "Dektec"
         else:
             self.type = "SFU"
         
-        print self.getSystemError()
+        self.profiles = scpi_profile.getProfiles()
+        self.profile = None                        # identity and options, read when first needed
         if self.debug:
+            print self.getSystemError()
             print self.systInfo()
-        
-        if self.type == "SFU":
-            options = self.systOptions().split(',')
-            self.dvbt       = 'SFU-K1' in options
-            self.dvbc       = 'SFU-K2' in options
-            self.dvbs       = 'SFU-K3' in options
-            self.dvbs2      = 'SFU-K8' in options
-            self.tdmbdab    = 'SFU-K11' in options
-            self.tsplayer   = 'SFU-K20' in options
-            self.arb        = 'SFU-K35' in options
-            self.awgn       = 'SFU-K40' in options
-            self.phaseNoise = 'SFU-K41' in options
-            self.impulsiveNoise = 'SFU-K42' in options
-            self.fading     = 'SFU-B30' in options
-        elif self.type == "Dektec":
-            self.dvbt       = True
-            self.dvbc       = True
-            self.dvbs       = True
-            self.dvbs2      = True
-            self.tdmbdab    = True
-            self.tsplayer   = True
-            self.arb        = True
-            self.awgn       = True
-            self.phaseNoise = True
-            self.impulsiveNoise = True
-            self.fading     = True
-            
-        # common settings usable by all standards:        
-        self.SFUSetting  = {'base':         self.base,
-                            'standard':     self.setStandard,
-                            'power':        self.setRfLevel,
-                            'pwrLimit':     self.setRfLimit,
-                            'rfState':      self.setRfState,
-                            'modState':     self.setModulationState,
-                            'freq':         self.setFrequency,
-                            'freqOff':      self.setFreqOff,
-                            'snr':          self.setSnr,
-                            'noiseState':   self.setNoise,
-                            'noiseType' :   self.setNoiseType,
-                            'fadingState':  self.setFadingState,
-                            'intSource':    self.setInterfSource,
-                            'intType':      self.setInterfType,
-                            'intFreq':      self.setInterfFreq,
-                            'intSigFreq':   self.setInterfSigSour,
-                            'intNoise':     self.setInterfNoiseAdd,
-                            'intAtt':       self.setInterfAtt,
-                            'intLev':       self.setInterfLevel,
-                            'intRef':       self.setInterfRef,
-                            'arbFile':      self.setArb,
-                            'arbState':     self.setArbState,
-                            'arbClock':     self.setArbClock,
-                            'iBurst':       self.setPulseNoiseBurst,
-                            'iNoise':       self.setPulseNoise,
-                            'pNoise' :      self.setPhaseNoise,
-                            'phaseFile':    self.setPhaseShape,
-                            'sigSource':    self.setSignalSource,
-                            'arbState':     self.setArbState,
-                            'noiseBW':      self.setNoiseBandwidth,
-                            'noiseBWcoup':  self.setNoiseBwCoup,
-                            'spectrum':     self.setSpectrum,
-                            'TSfile':       self.setTsGenFile,
-                            'TSstate':      self.setTsGenState,
-                            'BERmeasStat':  self.setBerMeasState,
-                            'BERrestart':   self.setBerMeasRestart,
-                            'BERgateMode':  self.setBerGateMode,
-                            'DTNormalise':  self.setDTFadNormalise,
-                            'Attenuator':   self.setAttenuator,
-                            'preset':       self.setFadingPreset,
-                            'profile':      self.setFadingProfile,
-                            'frameBurst':   self.setPulseNoiseFrameBurst,
-                            'fadCommon':    self.setFadingCommon,
-                            'arbFile':      self.setArb,
-                            'pulseMinMax':  self.setPulseNoiseMinMax,
-                            'IQScaling':    self.setArbGain}
-        
-        if self.std == 'DVBS2X' or self.std == 'DVBS2':
-            self.SFUSetting['const']    = self.setDvbs2Const      # constellation settings (modulation):  4 (QPSK) 8 (8PSK) 16 (16APSK) 32 (32APSK)
-            self.SFUSetting['codeRate'] = self.setDvbs2Coderate   # 1_4  1_3  2_5  1_2  3_5  2_3  3_4  4_5  5_6  6_7  7_8  8_9  9_10
-            self.SFUSetting['baudrate'] = self.setDvbs2SymbolRate # 1000000 to 45000000 baud
-            self.SFUSetting['pilots']   = self.setDvbs2Pilots     # Pilots state to ON or OFF
-            self.SFUSetting['rollOff']  = self.setDvbs2RollOff    # roll-off settings are: 15 (0.15)  20 (0.20)  25 (0.25)  35 (0.35)
-            self.SFUSetting['FECframe'] = self.setDvbs2FecFrame   # FEC frame length condition NORMAL for 64800 bit, SHORT for 16200 bit
-            self.SFUSetting['signal']   = self.setDvbs2Source     # Sets DVB-S2X input signal source: EXT, TSPL or TEST
-        if self.std == 'DVBS':
-            self.SFUSetting['codeRate'] = self.setDvbsCoderate    # 1_4  1_3  2_5  1_2  3_5  2_3  3_4  4_5 5_6  6_7  7_8 1 8_9  9_10
-            self.SFUSetting['baudrate'] = self.setDvbsSymbolRate  # 1000000 to 45000000 baud
-            self.SFUSetting['signal']   = self.setDvbsSource        # Sets DVB-S input signal source: EXT, TSPL or TEST
-            self.SFUSetting['const']    = self.setDvbsConst      # constellation settings (modulation):  4 (QPSK) 8 (8PSK) 16 (16APSK) 32 (32APSK)
-            self.SFUSetting['rollOff']  = self.setDvbsRollOff    # roll-off settings are: 15 (0.15)  20 (0.20)  25 (0.25)  35 (0.35)
-        if self.std == 'DVBT2':
-            self.SFUSetting['FECframe']       = self.setT2FECFrame
-            self.SFUSetting['codeRate']       = self.setT2CodeRate
-            self.SFUSetting['const']          = self.setT2Const                              
-            self.SFUSetting['constRot']       = self.setT2ConstRot  
-            self.SFUSetting['timeIntType']    = self.setT2TimeIntType
-            self.SFUSetting['timeIntFrame']   = self.setT2TimeIntFrame
-            self.SFUSetting['timeIntLen']     = self.setT2TimeIntLength
-            self.SFUSetting['plpNumBlocks']   = self.setT2DateNumBlock
-            self.SFUSetting['bandwidth']      = self.setT2Bandwidth
-            self.SFUSetting['bandwidthVar']   = self.setT2BandwidthVar
-            self.SFUSetting['FFT_bwExt']      = self.setT2FFTSize
-            self.SFUSetting['guard']          = self.setT2Guard
-            self.SFUSetting['PP']             = self.setT2PilotPat
-            self.SFUSetting['framesPerSuper'] = self.setT2FramesPerSuper
-            self.SFUSetting['dataPerFrame']   = self.setT2DataPerFrame
-            self.SFUSetting['slicesPerFrame'] = self.setT2SlicesPerFrame
-            self.SFUSetting['networkMode']    = self.setT2NetworkMode
-            self.SFUSetting['TxSystem']       = self.setT2TxSystem
-            self.SFUSetting['PAPR']           = self.setT2PAPR
-            self.SFUSetting['L1T2Version']    = self.setT2L1T2Version
-            self.SFUSetting['L1PostMod']      = self.setT2L1PostMod
-            self.SFUSetting['L1Rep']          = self.setT2L1Repetition
-            self.SFUSetting['L1PostExt']      = self.setT2L1PostExtension
-            self.SFUSetting['NumAuxStr']      = self.setT2NumAuxStream
-            self.SFUSetting['L1RfSig']        = self.getT2L1RfSignalling
-            self.SFUSetting['CellId']         = self.setT2CellId
-            self.SFUSetting['NetworkId']      = self.setT2NetworkId
-            self.SFUSetting['SystemId']       = self.setT2SystemId
-            self.SFUSetting['T2MIState']      = self.setT2MIInterface
-            self.SFUSetting['T2MISource']     = self.setT2MISource
-            self.SFUSetting['T2MIpidId']      = self.setT2MIpidId
-            self.SFUSetting['T2MIsidId']      = self.setT2MIsidId
-            self.SFUSetting['groupRef']       = self.setDektecT2Group
-            self.SFUSetting['FEFpayload']     = self.setT2EFEPayload
-            self.SFUSetting['BBMode']         = self.setT2BBMode
-            self.SFUSetting['standard']       = self.setStandard
-            self.SFUSetting['t_bandwidth']    = self.setDvbtBand
-            self.SFUSetting['t_fft']          = self.setDvbtFft
-            self.SFUSetting['t_guard']        = self.setDvbtGuard
-            self.SFUSetting['t_const']        = self.setDvbtCons
-            self.SFUSetting['t_codeRate']     = self.setDvbtCoderate
-            self.SFUSetting['t_usedBW']       = self.setDvbtUsedBand
-            self.SFUSetting['t2_bandwidth']   = self.setT2Bandwidth
-        if self.std == 'DVBT':
-            self.SFUSetting['bandwidth'] = self.setDvbtBand
-            self.SFUSetting['fft']       = self.setDvbtFft
-            self.SFUSetting['guard']     = self.setDvbtGuard
-            self.SFUSetting['const']     = self.setDvbtCons
-            self.SFUSetting['codeRate']  = self.setDvbtCoderate
-            self.SFUSetting['usedBW']    = self.setDvbtUsedBand
-            self.SFUSetting['hierarchy'] = self.setDvbtHierarchy
-            self.SFUSetting['codeRateLp']= self.setDvbtLpCoderate
-            self.SFUSetting['source']    = self.setDvbtSource
-            self.SFUSetting['sourceLp']  = self.setDvbtLpSource
-            
-        
-        self.getSFUValue = {'standard':     self.getStandard,
-                            'power':        self.getRfLevel,
-                            'pwrLimit':     self.getRfLimit,
-                            'rfState':      self.getRfState,
-                            'modState':     self.getModulationState,
-                            'freq':         self.getFrequency,
-                            'freqOff':      self.getFreqOff,
-                            'snr':          self.getSnr, 
-                            'noiseState':   self.getNoise,
-                            'noiseType' :   self.getNoiseType, 
-                            'fadingState':  self.getFadingState, 
-                            'intSource':    self.getInterfSource,
-                            'intType':      self.getInterfType, 
-                            'intFreq':      self.getInterfFreq, 
-                            'intSigFreq':   self.getInterfSigSour,
-                            'intNoise':     self.getInterfNoiseAdd, 
-                            'intAtt':       self.getInterfAtt,
-                            'intLev':       self.getInterfLevel,
-                            'intRef':       self.getInterfRef, 
-                            'arbFile':      self.getArb,
-                            'arbState':     self.getArbState,
-                            'arbClock':     self.getArbClock,
-                            'iBurst':       self.getPulseNoiseBurst,
-                            'iNoise':       self.getPulseNoise,
-                            'pNoise' :      self.getPhaseNoise,
-                            'phaseFile':    self.getPhaseShape,
-                            'sigSource':    self.getSignalSource,
-                            'noiseBW':      self.getNoiseBandwidth,
-                            'noiseBWcoup':  self.getNoiseBwCoup,
-                            'spectrum':     self.getSpectrum,
-                            'TSfile':       self.getTsGenFile,
-                            'TSstate':      self.getTsGenState,
-                            'BERmeasStat':  self.getBerMeasState,
-                            'BERgateMode':  self.getBerGateMode,
-                            'frameBurst':   self.getPulseNoiseFrameBurst,
-                            'fadCommon':    self.getFadingReference,
-                            'Attenuator':   self.getAttenuator,
-                            'profile':      self.getNoCommand,
-                            'preset':       self.getNoCommand,
-                            'pulseMinMax':  self.getPulseNoiseMinMax,
-                            'IQScaling':    self.getArbGain}
-        
-        if self.std == 'DVBS2X' or self.std == 'DVBS2':
-            self.getSFUValue['signal']     = self.getDvbs2Source     # Sets DVB-S2X input signal source: EXT, TSPL or TEST
-            self.getSFUValue['FECframe']   = self.getDvbs2FecFrame   # FEC frame length condition NORMAL for 64800 bit, SHORT for 16200 bit
-        if self.std == 'DVBS':
-            self.getSFUValue['signal']     = self.getDvbsSource     # Sets DVB-S2X input signal source: EXT, TSPL or TEST
-            #self.getSFUValue['FECframe']   = self.getDvbsFecFrame   # FEC frame length condition NORMAL for 64800 bit, SHORT for 16200 bit
-        if self.std == 'DVBT2':
-            self.getSFUValue['FECframe']       = self.getT2FECFrame
-            self.getSFUValue['codeRate']       = self.getT2CodeRate
-            self.getSFUValue['const']          = self.getT2Const                              
-            self.getSFUValue['constRot']       = self.getT2ConstRot  
-            self.getSFUValue['timeIntType']    = self.getT2TimeIntType
-            self.getSFUValue['timeIntFrame']   = self.getT2TimeIntFrame
-            self.getSFUValue['timeIntLen']     = self.getT2TimeIntLength
-            self.getSFUValue['plpNumBlocks']   = self.getT2DateNumBlock
-            self.getSFUValue['bandwidth']      = self.getT2Bandwidth
-            self.getSFUValue['bandwidthVar']   = self.getT2BandwidthVar
-            self.getSFUValue['FFT_bwExt']      = self.getT2FFTSize
-            self.getSFUValue['guard']          = self.getT2Guard
-            self.getSFUValue['PP']             = self.getT2PilotPat
-            self.getSFUValue['framesPerSuper'] = self.getT2FramesPerSuper
-            self.getSFUValue['dataPerFrame']   = self.getT2DataPerFrame
-            self.getSFUValue['slicesPerFrame'] = self.getT2SlicesPerFrame
-            self.getSFUValue['networkMode']    = self.getT2NetworkMode
-            self.getSFUValue['TxSystem']       = self.getT2TxSystem
-            self.getSFUValue['PAPR']           = self.getT2PAPR
-            self.getSFUValue['L1T2Version']    = self.getT2L1T2Version
-            self.getSFUValue['L1PostMod']      = self.getT2L1PostMod
-            self.getSFUValue['L1Rep']          = self.getT2L1Repetition
-            self.getSFUValue['L1PostExt']      = self.getT2L1PostExtension
-            self.getSFUValue['NumAuxStr']      = self.getT2NumAuxStream
-            self.getSFUValue['L1RfSig']        = self.getT2L1RfSignalling
-            self.getSFUValue['CellId']         = self.getT2CellId
-            self.getSFUValue['NetworkId']      = self.getT2NetworkId
-            self.getSFUValue['SystemId']       = self.getT2SystemId
-            self.getSFUValue['T2MIState']      = self.getT2MIInterface
-            self.getSFUValue['T2MISource']     = self.getT2MIsetT2MISource
-            self.getSFUValue['T2MIpidId']      = self.getT2MIpidId
-            self.getSFUValue['T2MIsidId']      = self.getT2MIsidId
-            self.getSFUValue['groupRef']       = self.getDektecT2Group
-            self.getSFUValue['FEFpayload']     = self.getT2EFEPayload
-            self.getSFUValue['BBMode']         = self.getT2BBMode
-            self.getSFUValue['standard']       = self.getStandard
-            self.getSFUValue['t_bandwidth']    = self.getDvbtBand
-            self.getSFUValue['t_fft']          = self.getDvbtFft
-            self.getSFUValue['t_guard']        = self.getDvbtGuard
-            self.getSFUValue['t_const']        = self.getDvbtCons
-            self.getSFUValue['t_codeRate']     = self.getDvbtCoderate
-            self.getSFUValue['t_usedBW']       = self.getDvbtUsedBand
-            self.getSFUValue['t2_bandwidth']   = self.getT2Bandwidth
-        if self.std == 'DVBT':
-            self.getSFUValue['bandwidth'] =  self.getDvbtBand
-            self.getSFUValue['fft']       =  self.getDvbtFft
-            self.getSFUValue['guard']     =  self.getDvbtGuard
-            self.getSFUValue['const']     =  self.getDvbtCons
-            self.getSFUValue['codeRate']  =  self.getDvbtCoderate
-            self.getSFUValue['usedBW']    =  self.getDvbtUsedBand
-            self.getSFUValue['hierarchy'] =  self.getDvbtHierarchy
-            self.getSFUValue['codeRateLp']=  self.getDvbtLpCoderate
-            self.getSFUValue['source']    =  self.getDvbtSource
-            self.getSFUValue['sourceLp']  =  self.getDvbtLpSource
-    
-    def getNoCommand(self):
+        setters, getters = self.dispatchTables(self.std)
+        self.SFUSetting  = BoundMethods(self, setters)
+        self.getSFUValue = BoundMethods(self, getters)
+    
+    @classmethod
+    def dispatchTables(cls, std):
+        '''Returns the setupSFU and getSFUSetting method name tables for a standard'''
+        if std not in cls.dispatch:
+            setters, getters = dict(SETTERS), dict(GETTERS)
+            for stds, table in STD_SETTERS.items():
+                if std in stds:  setters.update(table)
+            for stds, table in STD_GETTERS.items():
+                if std in stds:  getters.update(table)
+            cls.dispatch[std] = (setters, getters)
+        return cls.dispatch[std]
+
+    def capabilities(self, refresh=False):
+        '''Returns the SFU identity and options as {'idn': ..., 'options': [...]}.
+        They are kept in the on-disk profile cache by *IDN? serial number and
+        firmware, so later SfuClass objects for the same SFU only read *IDN?
+        to check it is the same unit, and query *OPT? again only when it isn't
+        or the profile is older than its TTL.'''
+        if self.profile is not None and not refresh:
+            return self.profile
+        host = '{}:{}'.format(*self.ADDR)
+        profile = None
+        if self.id != 'Dummy' and not refresh:
+            idn = self.querySFU("*IDN?", fresh=True)
+            if not settingFailed(idn):
+                profile = self.profiles.lookup(host, idn)
+        if profile is None:
+            reply = splitScpi(self.querySFU("*IDN?;*OPT?", fresh=True))
+            if self.id == 'Dummy' or len(reply) != 2 or settingFailed(reply[-1]):
+                profile = {'idn': reply[0], 'options': []}     # not saved, so it is read again next time
+            else:
+                profile = self.profiles.store(host, reply[0], reply[1].split(','))
+        self.profile = profile
+        return profile
+
+    def connectionStats(self):
+        '''Returns the number of connections opened versus commands sent to this SFU'''
+        return self.pool.report()
+
+    def cacheStats(self):
+        '''Returns the state cache hit and miss counts'''
+        return self.cache.report()
+
+    def errorReport(self):
+        '''Returns the deferred error checking counts'''
+        return "Error checks: *ESR? piggy-backed = {piggybacked}, *ESR? polls = {polls}, SYST:ERR:ALL? drains = {drains}, errors = {errors}".format(**self.errorStats)
+
+    def getNoCommand(self, fresh=False):
         return 'N/A'
         
+    def transaction(self):
+        '''Returns a batch context manager that packs the setupSFU calls made
+        inside it into as few round trips as possible'''
+        return SfuBatch(self)
+
     def setupSFU(self, setting, value):
+        if self.batch is not None:
+            self.batch.setting = setting
         if self.SFUSetting.get(setting, False):
-            if type(value) == list:
-                var1 = value[0]
-                var2 = value[1]
-                return self.SFUSetting[setting](var1, var2)
-            else:
-                return self.SFUSetting[setting](value)
+            self.checkApplied()
+            applying = self.applying
+            self.applying = setting
+            self.appliedNodes[setting] = set()
+            try:
+                if type(value) == list:
+                    var1 = value[0]
+                    var2 = value[1]
+                    res = self.SFUSetting[setting](var1, var2)
+                else:
+                    res = self.SFUSetting[setting](value)
+            finally:
+                self.applying = applying
+            self.noteApplied(setting, value, res)
+            return res
         else:
             #return '****    Error: No Setting {} Available    ****'.format(setting)
             return 'No Setting {} Available'.format(setting)
+
+    def checkApplied(self):
+        '''Forgets the applied settings if the SFU has been reset, recalled or
+        had a set-up loaded since they were recorded (e.g. by preset() or RCL())'''
+        if self.cache.stats['clears'] != self.appliedClears:
+            self.applied = {}
+            self.appliedClears = self.cache.stats['clears']
+
+    def appliedTouched(self, keys):
+        '''Called with the nodes a message is about to set. Nodes written
+        while setupSFU applies a setting are noted as that setting's; a
+        write from anywhere else (a setter called directly, writeSFU) drops
+        every applied setting that writes one of the nodes.'''
+        if self.applying:
+            self.appliedNodes[self.applying].update(keys)
+        elif self.applying is None:
+            for setting, nodes in self.appliedNodes.items():
+                if setting in self.applied and [key for key in keys for node in nodes if scpi_cache.related(key, node)]:
+                    del self.applied[setting]
+
+    def noteApplied(self, setting, value, res):
+        '''Records the value of a setting sent by setupSFU'''
+        if setting in CONFIG_RESETS:
+            self.applied = {}
+        for dependent in CONFIG_DEPENDENTS.get(setting, ()):
+            self.applied.pop(dependent, None)
+        if settingFailed(res):
+            self.applied.pop(setting, None)
+        else:
+            self.applied[setting] = str(value)
+        self.appliedClears = self.cache.stats['clears']
+
+    def applyConfig(self, config, batch=False):
+        '''Applies a test definition {setting: value} sending only the settings
+        that differ from the last values applied, in dependency order (e.g.
+        standard before constellation, noise state before C/N).
+        A changed standard or base file resets the SFU, so every setting after
+        it is sent. When the config has a base file and a setting applied
+        before is missing from the config, the base file is re-loaded so the
+        setting goes back to its base value.
+        batch    pack the settings sent with transaction()
+        Returns a report dictionary with the settings sent, skipped and failed.'''
+        self.checkApplied()
+        rank = dict((name, index) for index, name in enumerate(CONFIG_ORDER))
+        order = sorted(config, key=lambda setting: (rank.get(setting, rank[None]), setting))
+        report = {'sent': [], 'skipped': [], 'failed': [], 'results': {}}
+        stale = [setting for setting in self.applied if setting not in config]
+
+        def send():
+            for setting in order:
+                value = config[setting]
+                unchanged = self.applied.get(setting) == str(value) and setting not in CONFIG_ALWAYS
+                if unchanged and not (setting == 'base' and stale):
+                    report['skipped'].append(setting)
+                    continue
+                res = self.setupSFU(setting, value)
+                report['results'][setting] = res
+                report[('sent', 'failed')[settingFailed(res)]].append(setting)
+        if batch:
+            with self.transaction() as trans:
+                send()
+            self.appliedClears = self.cache.stats['clears']    # queued resets only reached the SFU on commit
+            for setting, _, res in trans.failures():
+                report['results'][setting] = res
+                if setting in report['sent']:
+                    report['sent'].remove(setting)
+                    report['failed'].append(setting)
+        else:
+            send()
+        report['summary'] = "Config applied: sent = {}, skipped = {}, failed = {}".format(
+            len(report['sent']), len(report['skipped']), len(report['failed']))
+        return report
+
+    apply_config = applyConfig
     
-    def getSFUSetting(self, setting):
+    def getSFUSetting(self, setting, fresh=False):
         if self.getSFUValue.get(setting, False):
-            return self.getSFUValue[setting]()
+            return self.getSFUValue[setting](fresh=fresh)
         else:
             #return '****    Error: No Setting Value {} Available    ****'.format(setting)
             return 'No Setting Value {} Available'.format(setting)
         
+    def sampler(self, metrics=None, **kwargs):
+        '''Returns a scpi_sampler.Sampler watching readings of this SFU in the
+        background on a connection of its own. Call start() and stop() on it.
+        metrics    {name: getter method name or plain SCPI query}, default
+                   SAMPLER_METRICS less any the SFU has no option for
+        Other keyword arguments are passed to the Sampler.'''
+        import scpi_sampler         # NumPy is only needed by stations that sample
+        queries = {}
+        for name, getter in (metrics or SAMPLER_METRICS).items():
+            if getter.startswith(':'):
+                queries[name] = getter
+                continue
+            found = SfuSnapshot(self).discover([getattr(self, getter)])
+            if len(found) == 1:
+                queries[name] = found[0]
+            elif metrics is not None:
+                raise ValueError("{} doesn't read a single plain query ({}), give the query instead".format(getter, found))
+        return scpi_sampler.Sampler(self.pool, queries, timeout=self.timeout, pipelined=self.type == "Dektec", **kwargs)
+
+    def snapshot(self, keys=None, record=None, typed=True):
+        '''Reads back the state of the SFU for the results log in one or two
+        round trips instead of one per setting: the queries of every
+        getSFUSetting getter are sent as packed compound queries, see
+        SfuSnapshot.
+        keys      settings to read, default every getter of the standard
+        record    file to append the snapshot to as one JSON line, read back with readSnapshots
+        typed     return numbers as int or Decimal (the record keeps the replies as text)
+        Returns {setting: value}.'''
+        if keys is None:
+            getters = self.getSFUValue
+            keys = sorted(key for key in getters.keys() if key in getters.own or hasattr(self, getters.names[key]))
+        if self.batch is not None:  self.batch.commit()
+        snap = SfuSnapshot(self)
+        values = snap.take(keys)
+        if record:
+            with open(record, 'a') as records:
+                records.write(json.dumps({'time': time.time(), 'sfu': self.id, 'std': self.std, 'values': values},
+                                         sort_keys=True, separators=(',', ':')) + '\n')
+        if typed:
+            values = dict((key, typedValue(value)) for key, value in values.items())
+        return values
+
+    def sweep(self, setting, points, measure=None, settle=0):
+        '''Steps an SNR ("snr"), RF level ("power") or frequency ("freq")
+        sweep, calling measure(point) once each point is set and read back.
+        Every point is range checked and its message built before the first
+        is sent, and the noise state setSnr reads at each point is read once.
+        Each point is then a single round trip, with noise ONLY the switch
+        to OFF and back goes in the same message as the C/N.
+        The SFU list mode steps on its own dwell time or trigger, so it
+        can't hand over to a measurement on this side at each point.
+        settle    seconds to wait after a point is set, before measure
+        Returns a report dictionary with (point, result, measurement) for
+        every point, the failed points and the setting time per point.'''
+        if setting == 'snr' and not self.awgn: return {'summary': 'AWGN Noise function not available'}
+        header, limits, dektecLimits = SWEEP_SETTINGS[setting]
+        low, high = (limits, dektecLimits)[self.type == 'Dektec']
+        for point in points:
+            if Decimal(str(point)) < low or Decimal(str(point)) > high:
+                return {'summary': "*************************                Sweep Points Set Error - Invalid Value for {} {}                *************************".format(self.type, point)}
+        if self.batch is not None:  self.batch.commit()
+        self.checkApplied()
+        template = "{0} {{}};*WAI;{0}?".format(header)
+        if setting == 'power':
+            self.writeSFU("UNIT:VOLT DBM")
+        elif setting == 'snr' and self.type == 'SFU' and 'ONLY' in self.getNoise():
+            template = ":NOISE:STAT OFF;*WAI;{0} {{}};*WAI;:NOISE:STAT ONLY;*WAI;{0}?".format(header)
+        messages = [(point, template.format(point), Decimal(str(point))) for point in points]
+        report = {'points': [], 'failed': [], 'setTime': 0.0}
+        for point, message, check in messages:
+            start = time.time()
+            res = self.querySFU(message, check)
+            report['setTime'] += time.time() - start
+            self.noteApplied(setting, point, res)
+            if settingFailed(res):
+                report['failed'].append(point)
+                report['points'].append((point, res, None))
+                continue
+            scpi_recorder.sleep(settle, self.connection, 'settle')
+            report['points'].append((point, res, measure(point) if measure else None))
+        report['perPoint'] = report['setTime'] / max(len(messages), 1)
+        report['summary'] = "Sweep of {}: {} points, {} failed, {:.1f} ms per point".format(
+            setting, len(messages), len(report['failed']), 1000 * report['perPoint'])
+        return report
+
     def dummyMode(self, txt):
         return "Dummy SFU Mode: {}".format(txt)      
     
@@ -311,16 +1383,17 @@ class SfuClass:
         '''Sends the command string cmd to the SFU if sfu1 or sfu2 are passed
         else it ignores the command i.e. in dummy SFU mode'''
         if self.id == 'Dummy':  return self.dummyMode(cmd)        
+        if self.batch is not None:  self.batch.commit()     # keep order with any queued settings
         if self.debug:  print "Setting SFU {} with {}".format(self.id, cmd) 
+        self.cache.sent(cmd)
+        if self.deferErrors and self.type == "SFU":  self.unchecked.append(cmd)
         try:
-            self.sfuSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)   # Create socket
-            self.sfuSock.connect(self.ADDR)                    # connect a socket       
-            self.sfuSock.send(cmd + "\n")                        # Send the command with end charater
-            time.sleep((0, 0.1)[self.type == "SFU"])
-            self.sfuSock.close()                          # Close the socket
+            start = time.time()
+            self.pool.send(cmd, self.timeout)             # Send the command on a pooled connection
+            scpi_recorder.record(self.connection, scpi_recorder.WRITE, cmd, None, start)
         except:
             return "****    Comms Error - Unable to communicate with SFU: {}    ****".format(self.id)
-        time.sleep((0, 0.5)[self.debug])  
+        scpi_recorder.sleep((0, 0.5)[self.debug], self.connection)  
         return True           
             
     def readSFU(self, cmd):
@@ -328,16 +1401,17 @@ class SfuClass:
         and then reads the reply, else it ignores the command i.e. in dummy 
         SFU mode. The reply from the SFU is returned in the string mesg.'''
         if self.id == 'Dummy':  return self.dummyMode(cmd)
+        if self.prefetch is not None:
+            prefetched = self.prefetch.answer(cmd)
+            if prefetched is not None:
+                return prefetched
         if self.debug:  print "Setting SFU {} with {}".format(self.id, cmd) 
         mesg = ""
+        self.cache.sent(cmd)
         try:
-            self.sfuSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)   # Create socket
-            self.sfuSock.settimeout(self.timeout)
-            self.sfuSock.connect(self.ADDR)                    # connect a socket       
-            self.sfuSock.send(cmd + "\n")                        # Send the command 
-            mesg = self.sfuSock.recv(self.BUFSIZ)              # Read the response
-            self.sfuSock.close()                          # Close the socket
+            mesg = self.exchangeSFU(cmd)                  # Send the command and read the response
             mesg = mesg.strip()                           # Remove \n at end of mesg
+            self.cache.received(cmd, mesg)
         except socket.timeout:
             if self.type == "SFU":
                 mesg = "*****    Timeout    ***** - {}".format(self.getSystemError())
@@ -345,31 +1419,43 @@ class SfuClass:
                 mesg = 'Timeout Error'
         except:
             return "****    Comms Error - Unable to communicate with SFU: {}    ***".format(self.id)
-        time.sleep((0, 0.5)[self.debug])
+        scpi_recorder.sleep((0, 0.5)[self.debug], self.connection)
         return mesg
     
-    def querySFU(self, cmd, check='False'):
+    def querySFU(self, cmd, check='False', fresh=False):
         '''Sends the command string cmd to the SFU if sfu1 or sfu2 are passed
         and then reads the reply, else it ignores the command i.e. in dummy 
-        SFU mode. The reply from the SFU is returned in the string mesg.'''
+        SFU mode. The reply from the SFU is returned in the string mesg.
+        A plain query of a setting made through any SfuClass on this host is
+        answered from the state cache unless fresh is True.'''
         if self.id == 'Dummy':  return self.dummyMode(cmd)        
+        if self.prefetch is not None:
+            prefetched = self.prefetch.answer(cmd)
+            if prefetched is not None:
+                return (self.checkResult(cmd, prefetched, check), prefetched)[self.prefetch.discovering]
+        if self.batch is not None and self.type == "SFU":
+            queued = self.batch.queue(cmd, check)
+            if queued is not None:
+                return queued
+        if not fresh:
+            cached = self.cache.lookup(cmd)
+            if cached is not None:
+                return self.checkResult(cmd, cached, check)
         mesg = ""
         if self.type == "SFU":
             if self.debug:  print "Setting SFU {} with {}".format(self.id, cmd)  
             #for connectAttempt in range(3):  # make up to 3 attempts get a good response from the instrument
                 #if connectAttempt > 0:  print mesg, "\n__________            Connection Attempt " + str(connectAttempt+1) + "            __________"
+            self.cache.sent(cmd)
             try:
-                self.sfuSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)   # Create socket
-                self.sfuSock.settimeout(self.timeout)
-                self.sfuSock.connect(self.ADDR)                    # connect a socket
                 if 'OPC?' in cmd:
                     starttime = time.time()
                     if self.debug:
                         print "__________            Waiting for SFU operation to complete            __________"
-                self.sfuSock.send(cmd + "\n")                        # Send the command
-                mesg = self.sfuSock.recv(self.BUFSIZ)              # Read the response
-                self.sfuSock.close()                          # Close the socket 
+                mesg = self.exchangeSFU(cmd)                  # Send the command and read the response
+                self.cache.received(cmd, mesg.strip())
                 if 'OPC?' in cmd and "" != mesg:
+                    self.waiter.record(cmd, time.time() - starttime, 1, 0)
                     if self.debug:
                         print "__________            Operation took {} seconds            __________".format(time.time() - starttime)
                     mesg = "____    Operation Complete    _____"
@@ -384,26 +1470,123 @@ class SfuClass:
                 mesg = "*************************                Comms Error - Unable to communicate with SFU: {}                *************************".format(self.id)
                 
         elif self.type == "Dektec":
-            cmdList = cmd.split(';')
-            #for connectAttempt in range(3):
-            #if connectAttempt > 0:  print mesg, "\n__________            Connection Attempt " + str(connectAttempt+1) + "            __________"
-            for dektekCMD in cmdList:
-                #print dektekCMD 
-                if '?' in dektekCMD:
-                    if 'OPC?' in dektekCMD:
-                        mesg = "____    Operation Complete    _____"
-                    else:
-                        mesg = str(self.readSFU(dektekCMD))
-                        if "" == mesg:
-                            return 'N/A for DekTec'
-                        #return mesg
-                else:
-                    if "*WAI" not in dektekCMD:
-                        mesg = str(self.writeSFU(dektekCMD))
-                #if 'Error' not in mesg: break     
-                           
-        time.sleep((0, 0.5)[self.debug])
-          
+            mesg = self.dektecExchange(cmd)
+            if "" == mesg:
+                return 'N/A for DekTec'
+
+        scpi_recorder.sleep((0, 0.5)[self.debug], self.connection)
+        return self.checkResult(cmd, mesg, check)
+
+    def exchangeSFU(self, cmd):
+        '''Sends a query on the pooled connection and returns the reply. In
+        deferred error mode *ESR? is added to the message and its reading
+        taken off the reply again, so the error bits come for free.'''
+        if not (self.deferErrors and self.type == "SFU"):
+            return self.poolQuery(cmd)
+        self.unchecked.append(cmd)
+        queries = [part.split(' ')[0].upper() for part in splitScpi(cmd) if part.split(' ')[0].endswith('?')]
+        append = queries[-1:] != ['*ESR?']
+        mesg = self.poolQuery((cmd, cmd + ';*ESR?')[append])
+        replies = splitScpi(mesg.strip())
+        if len(replies) != len(queries) + append:
+            # an error stopped the SFU parsing the message, so *ESR? never ran
+            self.errorWindows.append(self.unchecked)
+            self.unchecked = []
+            return mesg
+        self.errorStats['piggybacked'] += append
+        self.noteEsr([reply for query, reply in zip(queries + ['*ESR?'], replies) if query == '*ESR?'])
+        return (mesg, ';'.join(replies[:-1]))[append]
+
+    def dektecExchange(self, cmd):
+        '''Sends a compound command to a Dektec. It can't parse compound
+        messages, so the fragments go in one write on the pooled connection,
+        one per line, and the replies come back one line per query. The
+        Dektec runs the lines in order, so the reply to dektecSync sent in
+        place of *OPC? means everything before it has finished. *WAI is
+        implied and dropped. Returns the reply to the last fragment as the
+        old fragment-by-fragment exchange did, or "" if a query had none.
+        Only the reply to dektecSync gets the full timeout, the reply to any
+        other query is waited for dektecReplyTimeout, so a query the Dektec
+        ignores, or closes the connection on, returns "" quickly as it did
+        before instead of taking the full timeout (600 s during a base load).'''
+        parts = [part for part in splitScpi(cmd) if part and part.upper() != '*WAI']
+        if not parts:
+            return 'True'
+        lines = [(part, self.dektecSync)[part.upper() == '*OPC?'] for part in parts]
+        # one reply is expected per query, only the sync waits for the operations before it
+        syncs = [part.upper() == '*OPC?' for part in parts if part.split(' ')[0].endswith('?')]
+        shortWait = min(self.timeout, self.dektecReplyTimeout)
+        self.cache.sent(cmd)
+        start = time.time()
+        replies = []
+        try:
+            with self.pool.connection() as conn:
+                conn.send('\n'.join(lines), self.timeout)
+                for sync in syncs:
+                    replies.append(conn.readline((shortWait, self.timeout)[sync]).strip())
+        except socket.timeout:
+            return ('', 'Timeout Error')[syncs[len(replies)]]
+        except scpi_reader.ConnectionClosed:
+            return ''
+        except:
+            return "*************************                Comms Error - Unable to communicate with SFU: {}                *************************".format(self.id)
+        finally:
+            scpi_recorder.record(self.connection, scpi_recorder.QUERY, '\n'.join(lines), '\n'.join(replies), start)
+        self.cache.received(cmd, ';'.join(replies))
+        if [reply for reply in replies if reply == '']:
+            return ""
+        if parts[-1].upper() == '*OPC?':
+            return "____    Operation Complete    _____"
+        if parts[-1].endswith('?'):
+            return replies[-1]
+        return 'True'
+
+    def poolQuery(self, cmd):
+        '''Sends a query on a pooled connection, recording it when SCPI traffic is being recorded'''
+        start = time.time()
+        mesg = ''
+        try:
+            mesg = self.pool.query(cmd, self.timeout)
+            return mesg
+        finally:
+            scpi_recorder.record(self.connection, scpi_recorder.QUERY, cmd, mesg, start)
+
+    def noteEsr(self, readings):
+        '''Takes *ESR? readings covering the unchecked commands. Reading the
+        register clears it, so any error bit is remembered until checkpoint.'''
+        if [reading for reading in readings if scpi_completion.statusValue(reading) & scpi_completion.ESR_ERRORS]:
+            self.errorWindows.append(self.unchecked)
+        self.unchecked = []
+
+    def checkpoint(self):
+        '''Makes sure everything sent so far has been checked for errors and
+        returns the new errors as (command, error) pairs. The error queue is
+        only read if an *ESR? reading showed an error, so a clean checkpoint
+        costs one *ESR? round trip at most, none right after a query.'''
+        if self.id == 'Dummy' or self.type != "SFU":
+            return []
+        try:
+            if self.unchecked:
+                self.errorStats['polls'] += 1
+                self.noteEsr([self.poolQuery('*ESR?')])
+            if not self.errorWindows:
+                return []
+            self.errorStats['drains'] += 1
+            reply = self.poolQuery('SYST:ERR:ALL?')
+        except (socket.timeout, socket.error) as e:
+            return [((self.unchecked[-1:] or [''])[0], "Unable to check for errors: {}".format(e))]
+        windows, self.errorWindows = self.errorWindows, []
+        commands = [cmd for window in windows for cmd in window]
+        errors = []
+        for i, error in enumerate(parseErrors(reply)):
+            # the queue is in order, and each flagged window caused at least one error
+            errors.append((attributeError(error, commands) or windows[min(i, len(windows) - 1)][-1], error))
+        self.errorLog.extend(errors)
+        self.errorStats['errors'] += len(errors)
+        return errors
+
+    def checkResult(self, cmd, mesg, check='False'):
+        '''Compares the reply to a command against the expected check value'''
         mesg = mesg.strip()   # Remove \n at end of mesg
         if 'Error' in mesg:
             check = 'False'
@@ -424,7 +1607,26 @@ class SfuClass:
                 mesg = "********    SFU check\n    Command       = {}\n    Returned      = {}\n    Error Message = {}    \n********".format(cmd, mesg, self.getSystemError())
         return mesg
 
+    def sendCommand(self, command, value):
+        '''Sets a value with a compiled ScpiCommand, the setters made from
+        COMMANDS all come here'''
+        if command.option and not getattr(self, command.option): return command.unavailable
+        value = str(value)
+        if not command.number:
+            return self.querySFU(command.prefix + value + command.suffix, value)
+        number = Decimal(value)
+        if command.limits and not command.limits[0] <= number <= command.limits[1]:
+            return command.error
+        return self.querySFU(command.prefix + value + command.suffix, (number, value)[command.checkText])
+
+    def readCommand(self, command, fresh=False):
+        '''Reads a value with a compiled ScpiCommand, the getters made from
+        COMMANDS all come here'''
+        if command.option and not getattr(self, command.option): return command.unavailable
+        return self.querySFU(command.query, fresh=fresh)
+
 #### Instrument Commands ###########################################################################
+    # the plain setters and getters of this section are made from COMMANDS
     
     def goLocal(self):
         ''' Returns the SFU to Local mode'''
@@ -456,7 +1658,10 @@ class SfuClass:
     
     def getSystemError(self):
         '''interrogate system for errors'''
-        res = self.querySFU("SYST:ERR:ALL?")
+        if self.deferErrors and self.type == 'SFU' and self.id != 'Dummy':
+            res = ','.join('{} [{}]'.format(error, cmd) for cmd, error in self.checkpoint()) or 'No error'
+        else:
+            res = self.querySFU("SYST:ERR:ALL?")
         if self.type == 'Dektec':
             res = "____    DekTek - Unable to check for errors"          
         elif "No error" in res or "Dummy" in res:
@@ -465,19 +1670,81 @@ class SfuClass:
             res = "****    SFU check - Error = {}".format(res)
         return res
     
-    def base(self, profile):
+    def base(self, profile, force=False):
         '''Loads a base settings .savrl file. A long delay is included to allow the instrument to set-up
-        before retuning to local command and returning from the function.'''
+        before retuning to local command and returning from the function.
+        The load is skipped when the SFU is still in the state the same file
+        left it in (see scpi_basestate): nothing has been set through any
+        SfuClass since, as the first set after a load drops the stored
+        fingerprint, and a fresh snapshot of the settings hashes the same as
+        the one taken after the load.
+        force    load the file whatever state the SFU is in'''
+        host = '{}:{}'.format(*self.ADDR)
+        fingerprinted = self.type == 'SFU' and self.id != 'Dummy'
+        if fingerprinted and not force:
+            start = time.time()
+            stored = self.baseStates.lookup(host)
+            unchanged = (stored is not None and stored['profile'] == profile
+                         and self.baseFingerprint(profile) == stored['fingerprint'])
+            check = time.time() - start
+            self.baseStats['checks'] += check
+            if unchanged:
+                saved = max(stored['loadTime'] - check, 0)
+                self.baseStats['skips'] += 1
+                self.baseStats['saved'] += saved
+                self.baseStates.skipped(host, saved)
+                self.baseClean = True
+                return "Base config already loaded: {} ({:.3f} s check, {:.1f} s saved)".format(profile, check, saved)
         if self.type == 'SFU':
             print "____Loading Base File - This may take up to 30 seconds"
+        start = time.time()
         saveTimeout = self.timeout
         self.timeout = 600
         self.querySFU(":MMEM:LOAD:STAT 1, \"{}\";*RCL 1;*OPC?".format(profile))
         self.timeout = saveTimeout
+        loadTime = time.time() - start
+        self.baseStats['loads'] += 1
         errorCheck = self.getSystemError()
         if 'SFU check - Error' in errorCheck:
+            if fingerprinted:
+                self.baseStates.forget(host)
             return errorCheck
+        if fingerprinted:
+            self.baseStates.store(host, profile, self.baseFingerprint(profile), loadTime)
+            self.baseClean = True
         return "Base config loaded: {}".format(profile)
+
+    def cacheSet(self, keys):
+        '''Called by the state cache with the nodes a message sent through
+        any SfuClass on this host is about to set'''
+        self.baseTouched()
+        self.appliedTouched(keys)
+        if [key for key in keys if key.split(':')[0] == 'FSIM']:
+            self.fadingTable = None     # the table set last may no longer be what the SFU has
+
+    def baseTouched(self):
+        '''Called by the state cache before a set is sent. The first set
+        after a base file was loaded or found loaded drops the stored
+        fingerprint for every SfuClass on this machine, so a setting no
+        snapshot reads can't leave a later base() skipping the load.'''
+        if self.baseClean and self.type == 'SFU' and self.id != 'Dummy':
+            self.baseClean = False
+            self.baseStates.forget('{}:{}'.format(*self.ADDR))
+
+    def baseFingerprint(self, profile):
+        '''Hashes a snapshot of every setting of the standard with the size
+        of the base file on the SFU and, if it was sent with uploadFile, its
+        SHA-1'''
+        remote = scpi_upload.remotePath(profile)
+        directory, _, name = remote.rpartition('\\')
+        size = scpi_upload.catalogSize(self.readSFU(':MMEM:CAT? "{}"'.format(directory)), name)
+        entry = scpi_upload.getManifest().remote('{}:{}|{}'.format(self.pool.addr[0], self.pool.addr[1], remote))
+        sha1 = entry['sha1'] if entry is not None and entry['size'] == size == entry['sent'] else None
+        return scpi_basestate.fingerprint(self.snapshot(typed=False), {'size': size, 'sha1': sha1})
+
+    def baseReport(self):
+        '''Returns the base file loads made and skipped, and the time saved'''
+        return "Base files: loaded = {loads}, skipped = {skips}, saved = {saved:.1f} s, checks = {checks:.3f} s".format(**self.baseStats)
     
     def RCL(self):
         '''Recalls a base setting .savrl file'''
@@ -491,10 +1758,6 @@ class SfuClass:
         '''Set the modulation state. state    "ON" | "OFF"'''
         return self.querySFU(":MOD {};*WAI;:MOD:STAT?".format(state), state)
 
-    def getModulationState(self):
-        '''Returns the modulation state.'''
-        return self.querySFU(":MOD:STAT?")
-    
     def setSignalSource(self, source):
         '''Set the modulation signal source. source    "INTern" | "DTV" | "ATV" | "ARB" | "DIGital" | "ANALog" |"DIRect"'''
         res = self.querySFU(":DM:SOUR {};*WAI;:DM:SOUR?".format(source), str(source))
@@ -502,10 +1765,6 @@ class SfuClass:
             return '****    Error: This instrument does not have the {} feature'.format(source)
         return res
 
-    def getSignalSource(self):
-        '''Returns the modulation signal source.'''
-        return self.querySFU(":DM:SOUR?")
-    
     def setStandard(self, standard):
         '''Set the modulation standard.        
         standard    "DVBC" | "DVBS" | "DVBT" | "VSB" | "J83B" | "ISDB" | "DMBT" |
@@ -516,10 +1775,6 @@ class SfuClass:
             return '****    Error: This instrument does not have the {} feature'.format(standard)
         return res
 
-    def getStandard(self):
-        '''Returns the modulation standard.'''
-        return self.querySFU(":DM:TRAN?")
-
     def setAtvStandard(self, standard):
         '''Set the ATVtransmission standard.        
         standard    "BGPR" | "BGNP" | "DKPR" | "D1PR" | "DCPR" | "IPR" | "I1PR" |
@@ -529,25 +1784,9 @@ class SfuClass:
             return '****    Error: This instrument does not have the {} feature'.format(standard)
         return res
 
-    def getAtvStandard(self):
-        '''Returns the ATV transmission standard.'''
-        return self.querySFU(":DM:ATV:STAN?")        
-        
-    def setSpectrum(self, state):
-        '''Set the modulation spectrum state. state    "NORMal" | "INVerted"'''
-        return self.querySFU("DM:POL {};*WAI;:DM:POL?".format(state), str(state))
-
-    def getSpectrum(self):
-        '''Returns the modulation spectrum state.'''
-        return self.querySFU(":DM:POL?")
-
 #### Noise Commands ###############################################################################     
+    # the plain setters and getters of this section are made from COMMANDS
     
-    def getNoise(self):
-        if self.awgn is False: return 'AWGN Noise function not available'  
-        '''Gets the state of noise generator.'''
-        return self.querySFU(":NOISE:STAT?")
-     
     def setNoise(self, state):
         '''Sets the state of noise generator. state    "OFF" | "ADD" | "ONLY"'''
         state = (state, 'OFF')[self.type == "Dektec" and state == 'ONLY']
@@ -581,15 +1820,15 @@ class SfuClass:
         PHASE_res = self.querySFU(cmd, state)           
         return 'AWGN = {}, IMPULSE = {}, PHASE = {}'.format(AWGN_res, IMPULSE_res, PHASE_res)
 
-    def getNoiseType(self):
+    def getNoiseType(self, fresh=False):
         if not self.awgn: return 'AWGN Noise function not available'  
         '''Sets the type of noise generator.
         Selecting a new type of noise will not automatically de-selects the 
         currently enabled noise type.        
         ntype    "AWGN" | "IMPULSE" | "PHASE"'''  
-        AWGN_res = ('OFF', 'ON')[self.querySFU(":NOISe:AWGN?") == '1']            
-        IMPULSE_res = ('OFF', 'ON')[self.querySFU(":NOISe:IMP?") == '1']             
-        PHASE_res = ('OFF', 'ON')[self.querySFU(":NOISe:PHAS?") == '1']            
+        AWGN_res = ('OFF', 'ON')[self.querySFU(":NOISe:AWGN?", fresh=fresh) == '1']            
+        IMPULSE_res = ('OFF', 'ON')[self.querySFU(":NOISe:IMP?", fresh=fresh) == '1']             
+        PHASE_res = ('OFF', 'ON')[self.querySFU(":NOISe:PHAS?", fresh=fresh) == '1']            
         return 'AWGN = {}, IMPULSE = {}, PHASE = {}'.format(AWGN_res, IMPULSE_res, PHASE_res)
 
     def setSnr(self, snr):
@@ -611,19 +1850,6 @@ class SfuClass:
             self.setNoise('ONLY')
         return res
 
-    def getSnr(self):
-        if not self.awgn: return 'AWGN Noise function not available'  
-        '''Returns the level of SNR/CN'''
-        return self.querySFU(":NOIS:CN?")        
-    
-    def setNoiseBwCoup(self, state):
-        '''Sets the state of the noise bandwidth coupling.        state    "OFF" | "ON"'''
-        return self.querySFU(":NOIS:COUP {};*WAI;:NOISe:COUP?".format(state), state)
-            
-    def getNoiseBwCoup(self):
-        '''Returns the state of the noise bandwidth coupling.'''
-        return self.querySFU(":NOISe:COUP?")         
-
     def setNoiseBandwidth(self, bw):
         '''Sets the noise bandwidth.    freq        1MHz to 80MHz'''
         bw = str(bw)
@@ -633,63 +1859,17 @@ class SfuClass:
             return '****    Error: To set Noise Bandwidth coupling must be OFF'
         return self.querySFU(":NOISE:BAND {};*WAI;:NOISE:BAND?".format(bw), int(bw))
 
-    def getNoiseBandwidth(self):
-        '''Returns the noise bandwidth.'''
-        return self.querySFU(":NOISE:BAND?")
-
 #### Phase Noise Commands #########################################################################
-    def setPhaseNoise(self, ci):
-        if not self.phaseNoise: return 'Phase Noise function not available'  
-        '''Sets the level of Phase noise at 100Hz. ci    -110 to -12.9'''
-        ci = str(ci)
-        if Decimal(ci) < -110 or Decimal(ci) > -12.9:
-            return '****    Error: Phase Noise out of range'
-        return self.querySFU(":NOISe:PHAS:LEVel {};*WAI;:NOISe:PHAS:LEVel?".format(ci), Decimal(ci))
-    
-    def getPhaseNoise(self):
-        if not self.phaseNoise: return 'Phase Noise function not available'  
-        '''Sets the level of Phase noise at 100Hz. ci    -110 to -12.9'''
-        return self.querySFU(":NOISe:PHAS:LEVel?")
-                   
+    # the plain setters and getters of this section are made from COMMANDS
     def setPhaseShape(self, shape):
         if not self.phaseNoise: return 'Phase Noise function not available'  
         '''Sets the Phase noise shape file.        All phase noise shape files are located in the D:/PHASENOISE/ folder        shape    file name'''
         fileName = "D:/PHASENOISE/{}".format(shape)
         return self.querySFU(":NOISe:PHAS:SHAPe:SELect \"{}\";*WAI;:NOISe:PHAS:SHAPe:SEL?".format(fileName), str(shape))
     
-    def getPhaseShape(self):
-        if not self.phaseNoise: return 'Phase Noise function not available'  
-        '''Returns the Phase noise shape file'''        
-        return self.querySFU(":NOISe:PHAS:SHAPe:SEL?")
-
 #### Impulsive Noise Commands #####################################################################
+    # the plain setters and getters of this section are made from COMMANDS
     
-    def setPulseNoise(self, ci):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Sets the level of PULSE_NOISE/CI.        ci    -30 to 60'''
-        ci = str(ci)
-        if Decimal(ci) < -30 or Decimal(ci) > 60:
-            return '****    Error: Phase Noise Pulse out of range'
-        return self.querySFU(":NOISe:IMP:CI {};*WAI;:NOISe:IMP:CI?".format(ci), Decimal(ci))
-
-    def getPulseNoise(self):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Returns the level of Pulse noise.'''
-        return self.querySFU(":NOISe:IMP:CI?")
-
-    def setPulseNoiseBurst(self, burst):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Sets the number of PULSE_NOISE burst setting.        Burst      1 to 40,000'''
-        burst = str(burst)
-        if Decimal(burst) < 1 or Decimal(burst) > 40000:
-            return '****    Error: Pulse Noise Burst out of range'
-        return self.querySFU(":NOISe:IMP:PULS {};*WAI;:NOISe:IMP:PULS?".format(burst), Decimal(burst))
-    
-    def getPulseNoiseBurst(self):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Gets the number of PULSE_NOISE burst setting.        Burst      1 to 40,000'''
-        return self.querySFU(":NOISe:IMP:PULS?")
-
     def setPulseNoiseFrame(self, frame):
         if not self.impulsiveNoise: return 'Impulsive Noise function not available'
         '''Returns the frame duration setting.     Frame      10 | 100 | 1000 '''
@@ -703,11 +1883,11 @@ class SfuClass:
         burstRes = self.setPulseNoiseBurst(burst)   
         return 'Frame = {}, Pulse = {}'.format(frameRes, burstRes)
     
-    def getPulseNoiseFrameBurst(self):
+    def getPulseNoiseFrameBurst(self, fresh=False):
         if not self.impulsiveNoise: return 'Impulsive Noise function not available'
         '''Sets the level of PULSE_NOISE frame and burst setting.        Frame      10 | 100 | 1000          Burst      1 to 40,000'''
-        res1 = self.querySFU(":NOISe:IMP:FRAMe?")
-        res2 = self.querySFU(":NOISe:IMP:PULS?")    
+        res1 = self.querySFU(":NOISe:IMP:FRAMe?", fresh=fresh)
+        res2 = self.querySFU(":NOISe:IMP:PULS?", fresh=fresh)    
         return 'Frame = {}, Pulse = {}'.format(res1, res2)
         
     def setPulseNoiseMinMax(self, minPulse, maxPulse):
@@ -735,40 +1915,14 @@ class SfuClass:
         resMin = self.querySFU(":NOISe:IMP:MINS {} us;:NOISe:IMP:MINS?".format(minPulse), minCheck)                       # Read min space
         return  'Max = {}, Min = {}'.format(resMax, resMin)
     
-    def getPulseNoiseMinMax(self):
+    def getPulseNoiseMinMax(self, fresh=False):
         if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        resMax = self.querySFU(":NOISe:IMP:MAXS?")                      # Read max space
-        resMin = self.querySFU(":NOISe:IMP:MINS?")                       # Read min space
+        resMax = self.querySFU(":NOISe:IMP:MAXS?", fresh=fresh)                      # Read max space
+        resMin = self.querySFU(":NOISe:IMP:MINS?", fresh=fresh)                       # Read min space
         return  'Max = {}, Min = {}'.format(resMax, resMin)
     
-    def getPulseNoiseFrame(self):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Returns the frame duration setting.'''
-        return self.querySFU(":NOISe:IMP:FRAMe?")
-    
-    def getPulseNoisePulses(self):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Returns the number of pulses per burst setting.'''
-        return self.querySFU(":NOISe:IMP:PULS?")
-    
-    def getPulseNoiseMin(self):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Returns the minumin pulse spaceing setting.'''
-        return self.querySFU(":NOISe:IMP:MINS?")
-    
-    def getPulseNoiseMax(self):
-        if not self.impulsiveNoise: return 'Impulsive Noise function not available'
-        '''Returns the maxumin pulse spaceing setting.'''
-        return self.querySFU(":NOISe:IMP:MAXS?")
-        
 #### Frequency and Level Commands #################################################################
-    def setFrequency(self, freq):
-        '''Sets the carrier frequency.        freq        300 kHz to 3GHz'''
-        freq = str(freq)
-        if Decimal(freq) < 300000 or Decimal(freq) > 3000000000:
-            return '****    Error: Main Frequency out of range'
-        return self.querySFU(":FREQ {};FREQ?".format(freq), Decimal(freq))
-    
+    # the plain setters and getters of this section are made from COMMANDS
     def setFreqOff(self, offset):
         '''Sets a carrier frequency offset.
         Note: this is different to the SFU carrier frequency offset command which dosn't actutualy do anything.
@@ -777,15 +1931,11 @@ class SfuClass:
         offset = str(offset)
         return self.setFrequency(Decimal(self.getFrequency()) + Decimal(offset))
 
-    def getFrequency(self):
-        '''Returns the carrier frequency.'''
-        return self.querySFU(":FREQ?")
-    
-    def getFreqOff(self):
+    def getFreqOff(self, fresh=False):
         '''Returns the carrier frequency offset.'''
         if self.type == "Dektec":
-            return self.querySFU(":FREQ?")
-        return self.querySFU(":FREQ:OFFS?")
+            return self.querySFU(":FREQ?", fresh=fresh)
+        return self.querySFU(":FREQ:OFFS?", fresh=fresh)
     
     def setRfLevelAndState(self, level, state):
         '''Sets the RF level and its state.    level    -120 to 0        state    "OFF" | "ON"'''
@@ -798,18 +1948,6 @@ class SfuClass:
             return '****    Error: RF Output Level out of range'
         return self.querySFU("UNIT:VOLT DBM;:POW {};*WAI;:POW?".format(level), Decimal(level))
 
-    def setRfState(self, state):
-        '''Sets the RF state.   state    "OFF" | "ON"'''
-        return self.querySFU(":OUTP {};*WAI;:OUTP?".format(state), state)
-    
-    def setALC(self, state):
-        '''Sets the ALC state.         state    "AUTO" | "ON"| "OFF" '''
-        return self.querySFU(":POW:ALC:STAT {};*WAI;:POW:ALC:STAT?".format(state), state)
-    
-    def getALC(self):
-        '''Gets ALC State        '''
-        return self.querySFU(":POW:ALC:STAT?")
-    
     def setAttenuator(self, state):
         '''Sets the RF state.         state    "AUTO" | "FIX"| "NORM"| "HPOW"'''
         self.querySFU(":OUTP:AMOD AUTO;*WAI;:OUTP:AMOD?".format(state), 'AUTO')
@@ -818,75 +1956,18 @@ class SfuClass:
         rfPower = self.setRfLevel(rfPower) 
         return setAttenuator
     
-    def getAttenuator(self):
-        '''Sets the RF state.         state    "AUTO" | "FIXED"| "NORMAL"| "HPOWER"'''
-        return self.querySFU(":OUTP:AMOD?")
-    
-    def getAttenuatorUpper(self):
-        '''Gets the RF Upper Attenuator Limit.        '''
-        return self.querySFU(":OUTP:AFIX:RANG:UPP?")
-        
-    def setRfLimit(self, limit):
-        '''Sets the RF level.       level    -120 to 20'''
-        limit = str(limit)
-        if Decimal(limit) < -120 or Decimal(limit) > 20:
-            return '****    Error: RF Output Level Limit out of range'
-        return self.querySFU(":POW:LIM {};*WAI;:POW:LIM?".format(limit), Decimal(limit))
-        
-    def setRfLevelOffs(self, offset):
-        '''Sets the RF level offset.        level    -120 to 120'''
-        offset = str(offset)
-        if Decimal(offset) < -120 or Decimal(offset) > 120:
-            return '****    Error: RF Output Level Limit out of range'
-        return self.querySFU(":POW:OFFS {};*WAI;:POW:OFFS?".format(offset), Decimal(offset))
-
-    def getRfLevel(self):
-        '''Returns the RF level.'''
-        return self.querySFU(":POW?")
-    
-    def getRfState(self):
-        '''Returns the state of the RF output.'''
-        return self.querySFU(":OUTP?") 
-        
-    def getRfLimit(self):
-        '''Returns the state of the RF output.'''
-        return self.querySFU(":POW:LIM?") 
-        
-    def getRfLevelOffs(self):
-        '''Returns the value of the RF output offset.'''
-        return self.querySFU(":POW:OFFS?") 
-        
-    def setRfVoltage(self, level):
-        '''Sets the RF voltage.        level    -120 to 20'''
-        level = str(level)
-        if Decimal(level) < -120 or Decimal(level) > 20:
-            return '****    Error: RF Output Level Limit out of range'
-        return self.querySFU(":VOLT {};*WAI;:VOLT?".format(level), str(level))
-     
     def setRfUnit(self, unit):
         '''Sets the RF level unit.        unit    DBM for dBm, DBUV for dBuV, DBMV for dBmV and MV for mV'''
         return self.querySFU("UNIT:VOLT {};*WAI;:UNIT:VOLT?".format(unit), str.upper(unit))
         
-    def getRfVoltage(self):
-        '''Returns the RF level.'''
-        return self.querySFU(":VOLT?") 
-        
-    def getRfUnit(self):
-        '''Returns the value of the RF level unit.'''
-        return self.querySFU("UNIT:VOLT?") 
-    
 #### Fading Sim comands ###########################################################################
+    # the plain setters and getters of this section are made from COMMANDS
 
     def setFadingState(self, state):
         if not self.fading: return 'Fading function not available'
         '''Sets the state of fading simulator.        state    "OFF" | "ON" '''
         return self.querySFU(":FSIM1:STAT {};*WAI;:FSIM:STAT?".format(state), state)
     
-    def getFadingState(self):
-        if not self.fading: return 'Fading function not available'
-        '''Returns the state of fading simulator.'''
-        return self.querySFU(":FSIM:STAT?")
-    
     def setFadingProfile(self, profile):
         if not self.fading: return 'Fading function not available'
         '''Loads a fading profile .fad file'''
@@ -904,16 +1985,12 @@ class SfuClass:
         '''Loads a preset standard fading profile'''
         return self.querySFU(":FSIM1:STAN {};*WAI;*OPC?".format(preset))
     
-    def getFadingPreset(self):
-        if not self.fading: return 'Fading function not available'
-        '''Returns the loaded preset standard fading profile'''
-        return self.querySFU(":FSIM1:STAN?")
-    
     def setFadingSet(self, groupNumber, pathNumber, parameter, value):
         if not self.fading: return 'Fading function not available'
         '''Sets 1 of 14 fading parameter in a specified group and path''' 
         parameter = int(parameter)
         value = str(value)
+        self.fadingTable = None
         if value in ['ON', 'OFF']: 
             value = value            
         cmd = {0:   ":FSIM1:DEL:GRO{0}:PATH{1}:LOSS {2};*WAI;:FSIM1:DEL:GRO{0}:PATH{1}:LOSS?".format(groupNumber, pathNumber, value),   #PATH LOSS   
@@ -934,7 +2011,7 @@ class SfuClass:
             return '****    Invalid settings for groupNumber = {}, pathNumber = {}, parameter = {}, value = {}'.format(groupNumber, pathNumber, parameter, value)
         return self.querySFU(cmd)#, Decimal(value))
  
-    def getFadingSet(self, groupNumber, pathNumber, parameter):
+    def getFadingSet(self, groupNumber, pathNumber, parameter, fresh=False):
         if not self.fading: return 'Fading function not available'
         '''Returns 1 of 14 fading parameter in a specified group and path '''
         parameter = int(parameter)
@@ -955,7 +2032,87 @@ class SfuClass:
                13: ":FSIM1:DEL:GRO{0}:PATH{1}:PROF?".format(groupNumber, pathNumber)}.get(parameter, False)#Profile
         if not cmd:
             return '****    Invalid settings for groupNumber = {}, pathNumber = {}, parameter = {}, value = {}'.format(groupNumber, pathNumber, parameter)
-        return self.querySFU(cmd)
+        return self.querySFU(cmd, fresh=fresh)
+
+    def fadingHeader(self, groupNumber, pathNumber, parameter):
+        '''Returns the header of one of the FADING_PARAMETERS'''
+        name, node, perPath = FADING_PARAMETERS[parameter]
+        if perPath:
+            return ":FSIM1:DEL:GRO{}:PATH{}:{}".format(groupNumber, pathNumber, node)
+        return ":FSIM1:DEL:GRO{}:{}".format(groupNumber, node)
+
+    def setFadingTable(self, table, verify=True):
+        if not self.fading: return {'summary': 'Fading function not available'}
+        '''Sets a whole fading profile, e.g. 20 paths x 14 parameters, in a few
+        packed compound messages instead of a set-and-readback per parameter,
+        then reads the whole table back in one compound query to verify it.
+        table is a list of dicts or a NumPy array, see fadingRows. A table
+        identical to the last one verified is not sent again unless the SFU
+        has been reset, had a set-up loaded or had any FSIM setting written
+        since.
+        Returns a report dictionary with the parameters sent and mismatches.'''
+        parts = []
+        for group, path, values in fadingRows(table):
+            for parameter in sorted(values, key=lambda parameter: (parameter not in FADING_FIRST, parameter)):
+                parts.append((self.fadingHeader(group, path, parameter), values[parameter], (group, path, parameter)))
+        last = dict((header, index) for index, (header, _, _) in enumerate(parts))
+        parts = [part for index, part in enumerate(parts) if last[part[0]] == index]     # a group's basic delay is sent once
+        digest = hashlib.sha1('\n'.join('{} {}'.format(header, value) for header, value, _ in parts).encode()).hexdigest()
+        report = {'sent': 0, 'messages': 0, 'skipped': False, 'mismatches': [], 'hash': digest}
+        if self.fadingTable == (digest, self.cache.stats['clears']):
+            report['skipped'] = True
+            report['summary'] = "Fading table unchanged: {} parameters not sent".format(len(parts))
+            return report
+        self.fadingTable = None
+        messages = packRelative([(header, ' ' + value) for header, value, _ in parts], self.MAX_CMD_LEN, ';*OPC?')
+        for message in messages[:-1]:
+            self.writeSFU(message)
+        opc = self.querySFU(messages[-1])
+        report['sent'] = len(parts)
+        report['messages'] = len(messages)
+        if 'Operation Complete' not in opc:
+            report['summary'] = "****    Fading table not set: {}".format(opc)
+            return report
+        if verify:
+            replies = self.readFading([header for header, _, _ in parts])
+            for (header, value, (group, path, parameter)), reply in zip(parts, replies):
+                if not fadingMatches(value, reply):
+                    report['mismatches'].append((group, path, FADING_PARAMETERS[parameter][0], value, reply))
+            report['messages'] += len(packRelative([(header, '?') for header, _, _ in parts], self.MAX_CMD_LEN))
+        if verify and not report['mismatches']:
+            self.fadingTable = (digest, self.cache.stats['clears'])
+        report['summary'] = "Fading table set: {} parameters in {} messages, {} mismatches".format(
+            report['sent'], report['messages'], len(report['mismatches']))
+        return report
+
+    def readFading(self, headers):
+        '''Reads the values of fading headers in as few compound queries as
+        fit the SFU input buffer. A query that fails is returned as its error.'''
+        replies = []
+        for message in packRelative([(header, '?') for header in headers], self.MAX_CMD_LEN):
+            count = len(splitScpi(message))
+            reply = self.readSFU(message)
+            values = splitScpi(reply)
+            replies.extend((values, [reply] * count)[len(values) != count])
+        return replies
+
+    def getFadingTable(self, paths, parameters=None):
+        if not self.fading: return 'Fading function not available'
+        '''Reads the fading parameters of a list of (group, path) pairs in one
+        compound query. Returns a list of dicts with "group", "path" and the
+        parameter names, the same shape setFadingTable takes.'''
+        parameters = range(len(FADING_PARAMETERS)) if parameters is None else parameters
+        parameters = [(parameter, [name for name, _, _ in FADING_PARAMETERS].index(parameter))[not isinstance(parameter, int)]
+                      for parameter in parameters]
+        headers = [self.fadingHeader(group, path, parameter) for group, path in paths for parameter in parameters]
+        replies = iter(self.readFading(headers))
+        table = []
+        for group, path in paths:
+            row = {'group': group, 'path': path}
+            for parameter in parameters:
+                row[FADING_PARAMETERS[parameter][0]] = next(replies)
+            table.append(row)
+        return table
 
     def setFadingReference(self, reference):
         if not self.fading: return 'Fading function not available'
@@ -963,11 +2120,6 @@ class SfuClass:
         check = ("FDOP", "SPE")[reference == "SPEED"]
         return self.querySFU(":FSIM:REF {};*WAI;:FSIM:REF?".format(check), check)
 
-    def getFadingReference(self):
-        if not self.fading: return 'Fading function not available'
-        '''Returns the ref setting for the fading simulator [SPEED - DOPPLER]'''
-        return self.querySFU(":FSIM:REF?")
-
     def setFadingCommon(self, allPaths):
         if self.fading is False: return 'Fading function not available'
         '''Sets the common path setting for the fading simulator [ON | OFF]'''
@@ -979,13 +2131,13 @@ class SfuClass:
             res = self.querySFU(":FSIM:CSP {};*WAI;:FSIM:CSP?".format(allPaths), allPaths)      
         return res
     
-    def getFadingCommon(self):
+    def getFadingCommon(self, fresh=False):
         if not self.fading: return 'Fading function not available'
         '''Returns the common path setting for the fading simulator'''
         # find out if in speed or doppler mode
-        queRes = self.querySFU(":FSIM:REF?") 
-        res = {"FDOP": self.querySFU(":FSIM:CFD?"),
-               "SPE": self.querySFU(":FSIM:CSP?")}.get(queRes, queRes)
+        queRes = self.querySFU(":FSIM:REF?", fresh=fresh) 
+        res = {"FDOP": self.querySFU(":FSIM:CFD?", fresh=fresh),
+               "SPE": self.querySFU(":FSIM:CSP?", fresh=fresh)}.get(queRes, queRes)
         return res    
 
     def setDTFadNormalise(self):
@@ -994,69 +2146,36 @@ class SfuClass:
         return "Dektec Fading Normalise set: ".format(self.querySFU(":FSIM:NORM"))
     
 #### TS Gen Commands ##############################################################################
+    # the plain setters and getters of this section are made from COMMANDS
             
     def setTsGenState(self, state):
         if not self.tsplayer: return 'TS player function not available'
         '''Sets the state of the transport stream player [STOP-PAUSE-PLAY]'''
         check = {"PAUSE": "PAUS", "PLAY": "RUNN", "STOP": "STOP"}.get(state)
-        self.querySFU(":TSGEN:CONF:COMM {}".format(state))
-        time.sleep(2)
-        res = self.getTsGenState()
+        self.writeSFU(":TSGEN:CONF:COMM {}".format(state))
+        try:
+            res = self.waiter.pollUntil(lambda: (None, check)[self.getTsGenState(fresh=True) == check], 10, 'TS player {}'.format(state), 2)
+        except scpi_completion.CompletionTimeout:
+            res = self.getTsGenState(fresh=True)
         if res != check:
             return '****    Error: Wrong Playout State, Set = {}, Current = {}'.format(state, res)
         return res
 
-    def getTsGenState(self):
-        if not self.tsplayer: return 'TS player function not available'
-        '''Returns the state of the transport stream player [STOP-PAUS-RUNN]'''
-        return self.querySFU(":TSGEN:READ:COMM:STATE?")
-    
-    def setTsGenFile(self, tsFile):
+    def setTsGenFile(self, tsFile, localFile=None):
         if not self.tsplayer: return 'TS player function not available'
-        '''Sets the file for the transport stream player'''
+        '''Sets the file for the transport stream player, uploading localFile
+        to it first if given, see uploadFile'''
+        if localFile:
+            uploaded = self.uploadFile(localFile, tsFile)
+            if settingFailed(uploaded):  return uploaded
         res = self.querySFU(":TSGEN:CONF:PLAY \"{}\";*WAI;:TSGEN:CONF:PLAY?".format(tsFile.replace('/', '\\')))
         errorCheck = self.getSystemError()
         if 'SFU check - Error' in errorCheck:
             return errorCheck
         return res
     
-    def getTsGenFile(self):
-        if not self.tsplayer: return 'TS player function not available'
-        '''Returns the file loaded into the transport stream player'''
-        return self.querySFU(":TSGEN:CONF:PLAY?")
-        
-    def setTsGenRate(self, rate):
-        if not self.tsplayer: return 'TS player function not available'
-        '''Sets the TS data rate in bit/s '''    
-        return self.querySFU(":TSGEN:CONF:TSRATE {};*WAI;:TSGEN:CONF:TSRATE?".format(rate), str(rate))
-    
-    def getTsGenRate(self):
-        if not self.tsplayer: return 'TS player function not available'
-        '''Returns the TS data rate in bit/s'''
-        return self.querySFU(":TSGEN:CONF:TSRATE?")
-        
-    def getTSGenWraps(self):
-        if not self.tsplayer: return 'TS player function not available'
-        '''Dektec Only
-        Returns the number of playout wraps counted by the Dektec playout'''
-        return self.querySFU(":TSGEN:CONF:WRAPS?")
-
-    def getTSGenErrors(self):
-        if not self.tsplayer: return 'TS player function not available'
-        '''Dektec Only
-        Returns the number of errors counted by the Dektec playout'''
-        return self.querySFU(":TSGEN:CONF:ERRORS?")
-
 #### Intrerfere Commands ##########################################################################
-    def setInterfSource(self, interfSource):
-        '''Sets up the interferer source
-        [OFF | ARB=1 | DIG (I/Q digital) | ANA (I/Q analog) | ATV]'''
-        return self.querySFU(":DM:ISRC {};*WAI;:DM:ISRC?".format(interfSource), interfSource)
-
-    def getInterfSource(self):
-        '''Returns the interferer source'''
-        return self.querySFU(":DM:ISRC?")
-        
+    # the plain setters and getters of this section are made from COMMANDS
     def setInterfType(self, interfType):
         '''Sets up the interferer type        [MNPR | BGPR | IPR | LPR]'''
         res = self.querySFU(":DM:IATV {};*WAI;:DM:IATV?".format(interfType), interfType)
@@ -1064,10 +2183,6 @@ class SfuClass:
             return '****    Error: This instrument does not have the {} feature'.format(interfType)
         return res
 
-    def getInterfType(self):
-        '''Returns the interferer type'''
-        return self.querySFU(":DM:IATV?")
-        
     def setInterfAtt(self, interfAtt):
         '''Sets up the interferer attenuation.
         Will only work interferer reference is set to attenuation.    interfAtt    -60.0 to 60.0'''
@@ -1084,10 +2199,6 @@ class SfuClass:
         # right mode so carry on 
         return self.querySFU(":DM:IATT {};*WAI;:DM:IATT?".format(interfAtt), Decimal(interfAtt))
 
-    def getInterfAtt(self):
-        '''Returns the interferer attenuation'''
-        return self.querySFU(":DM:IATT?")
-            
     def setInterfFreq(self, interfFreq):
         '''Sets up the interferer frequency offset.        interfFreq    -40000000.0 to 40000000.0'''
         interfFreq = str(interfFreq)
@@ -1095,10 +2206,6 @@ class SfuClass:
             return '****    Error: Interferer Frequency out of range'
         return self.querySFU("DM:IFR {};*WAI;:DM:IFR?".format(interfFreq), Decimal(interfFreq))   
 
-    def getInterfFreq(self):
-        '''Returns the interferer frequency offset.'''
-        return self.querySFU(":DM:IFR?")        
-
     def setInterfSigSour(self, signalSource):
         '''Sets the frequency offset of the useful signal in the baseband.    signalSourse    -10000000.0 to 10000000.0'''
         signalSource = str(signalSource)
@@ -1106,19 +2213,6 @@ class SfuClass:
             return '****    Error: Interferer Frequency Offset out of range'
         return self.querySFU(":DM:SFR {};*WAI;:DM:SFR?".format(signalSource), Decimal(signalSource))   
 
-    def getInterfSigSour(self):
-        '''Returns the interferer signal frequency offset'''
-        return self.querySFU("DM:SFR?")
-
-    def setInterfNoiseAdd(self, noise):
-        '''Sets up the interferer added noise.
-        noise    "BEFN" | "AFN" | "OFF"'''
-        return self.querySFU(":DM:IADD {};*WAI;:DM:IADD?".format(noise), str(noise))
-    
-    def getInterfNoiseAdd(self):
-        '''Returns the interferer added noise.'''
-        return self.querySFU("DM:IADD?")
-
     def setInterfLevel(self, level):
         '''Sets the interferer level in dB.
         Will only work interferer reference is set to level.
@@ -1136,45 +2230,27 @@ class SfuClass:
         # right mode so carry on
         return self.querySFU(":DM:ILEV {};*WAI;:DM:ILEV?".format(level), Decimal(str(level)))
 
-    def getInterfLevel(self):
-        '''Returns the interferer level.'''
-        return self.querySFU("DM:IREF?")
-
-    def setInterfRef(self, ref):
-        '''Sets up the interferer reference.        ref    "LEV" | "ATT"'''
-        return self.querySFU(":DM:IREF {};*WAI;:DM:IREF?".format(ref), ref)
-
-    def getInterfRef(self):
-        '''Returns the interferer reference.'''
-        return self.querySFU("DM:IREF?")
-        
 #### ARB Commands #################################################################################
+    # the plain setters and getters of this section are made from COMMANDS
 
     def setArb(self, state, arbFile): 
         if not self.arb: return 'ARB function not available'
         '''Sets the state of the ARB, and load a form if state is on.        state    "OFF" | "ON"        file     "filepath\filename'''
         return 'Arb File = {}, Arb State = {}'.format(self.setArbFile(arbFile), self.setArbState(state))
     
-    def getArb(self):
+    def getArb(self, fresh=False):
         if not self.arb: return 'ARB function not available'
         '''Gets the state of the ARB        state    "OFF" | "ON"        file     "filepath\filename'''
-        return 'Arb File = {}, Arb State = {}'.format(self.getArbFile(), self.getArbState())
+        return 'Arb File = {}, Arb State = {}'.format(self.getArbFile(fresh=fresh), self.getArbState(fresh=fresh))
     
-    def setArbState(self, state):
-        if not self.arb: return 'ARB function not available'
-        '''Sets the state of the ARB
-        state    "OFF" | "ON"'''   
-        return self.querySFU(":BB:ARB:STAT {};*WAI;:BB:ARB:STAT?".format(state), state)
-
-    def getArbState(self):
-        if not self.arb: return 'ARB function not available'
-        '''Returns the state of the ARB''' 
-        return self.querySFU(":BB:ARB:STAT?")
-
-    def setArbFile(self, fileName):
+    def setArbFile(self, fileName, localFile=None):
         if not self.arb: return 'ARB function not available' 
         '''Sets the ARB file.
-        file    "filepath\filename'''
+        file    "filepath\filename
+        localFile    uploaded to file first, see uploadFile'''
+        if localFile:
+            uploaded = self.uploadFile(localFile, fileName)
+            if settingFailed(uploaded):  return uploaded
         saveTimeout = self.timeout
         self.timeout = 600
         if self.type == "SFU": 
@@ -1185,17 +2261,42 @@ class SfuClass:
                 return errorCheck
         elif self.type == "Dektec": 
             self.writeSFU(":BB:ARB:WAV:SEL \"{}\";*WAI".format(fileName.replace('/', '\\')))
-            time.sleep(2)
-            res = self.getArbFile()            
+            waveform = fileName.replace('\\', '/').split('/')[-1]
+            def loaded():
+                current = self.getArbFile(fresh=True)
+                return (None, current)[waveform in current]
+            try:
+                res = self.waiter.pollUntil(loaded, 10, 'ARB file', 2)
+            except scpi_completion.CompletionTimeout:
+                res = self.getArbFile(fresh=True)
         self.timeout = saveTimeout
         return res
     
-    def getArbFile(self):
+    def uploadFile(self, localFile, remoteFile, progress=None):
+        '''Copies a local file to the SFU mass memory in large MMEM:DATA
+        chunks sent straight from a memory mapped file, see scpi_upload.
+        A file the SFU already has (same size and hash) isn't sent again and
+        an upload cut short by a dropped connection carries on where it
+        stopped. progress is called with (bytes sent, total bytes).
+        Returns a summary, the full report is kept in lastUpload.'''
+        if self.id == 'Dummy':  return self.dummyMode(remoteFile)
+        if progress is None and self.debug:
+            def progress(sent, total):
+                print "__________            Uploaded {:.1f} of {:.1f} MB            __________".format(sent / 1e6, total / 1e6)
+        if self.deferErrors:
+            self.checkpoint()           # the upload reads *ESR?, so errors before it are collected first
+        try:
+            self.lastUpload = scpi_upload.upload(self.pool, localFile, remoteFile, progress=progress)
+        except (IOError, OSError, scpi_upload.UploadError) as e:
+            self.lastUpload = {'summary': "****    Upload Error - {} to {}: {}".format(localFile, remoteFile, e)}
+        return self.lastUpload['summary']
+
+    def getArbFile(self, fresh=False):
         if not self.arb: return 'ARB function not available' 
         '''Returns the ARB file'''
         if not self.arb:
             return 'N/A'
-        return self.querySFU(":BB:ARB:WAV:SEL?")
+        return self.querySFU(":BB:ARB:WAV:SEL?", fresh=fresh)
     
     def setArbClock(self, freq):
         if not self.arb: return 'ARB function not available' 
@@ -1203,149 +2304,61 @@ class SfuClass:
         freq = str(freq)
         return self.querySFU(":BB:ARB:CLOC {};*WAI;:BB:ARB:CLOC?".format(freq), Decimal(freq))
 
-    def getArbClock(self): 
-        if not self.arb: return 'ARB function not available'
-        '''Returns the ARB outout rate frequency'''  
-        return self.querySFU(":BB:ARB:CLOC?")
-
     def setArbInterpol(self, inter):
         if not self.arb: return 'ARB function not available' 
         '''This setting is only applicable to a Dektec IQ mode modulator
         Options are OFDM interpolation or QAM interpolation'''    
         return self.querySFU(":BB:ARB:INTE {};*WAI:;BB:ARB:INTE?".format(inter), inter)
 
-    def getArbInterpol(self):
-        if not self.arb: return 'ARB function not available' 
-        '''This setting is only applicable to a Dektec IQ mode modulator
-        Options are OFDM interpolation or QAM interpolation'''
-        return self.querySFU(":BB:ARB:INTE?")
-    
-    def setArbGain(self, gain):
-        if not self.arb: return 'ARB function not available' 
-        '''This setting is only applicable to a Dektec IQ mode modulator
-        Options are OFDM interpolation or QAM interpolation''' 
-        return self.querySFU(":BB:ARB:GAIN {};*WAI;:BB:ARB:GAIN?".format(gain), gain)
-    
-    def getArbGain(self):
-        if not self.arb: return 'ARB function not available' 
-        '''This setting is only applicable to a Dektec IQ mode modulator
-        Returns the gain set of the IQ playout'''  
-        return self.querySFU(":BB:ARB:GAIN?")
-
 #### DVB Commands #################################################################################
+    # the plain setters and getters of this section are made from COMMANDS
     def setDvbtBand(self, bandwidth):
         '''Sets the DVB bandwidth    Valid = bandwidth    5 to 8'''
         bandwidth = "BW_{}".format(bandwidth)
         return self.querySFU(":DVBT:CHAN:BAND {};*WAI;:DVBT:CHAN:BAND?".format(bandwidth), bandwidth)  
 
-    def getDvbtBand(self):
-        '''Returns the DVB bandwidth'''
-        return self.querySFU(":DVBT:CHAN:BAND?")    
-
     def setDvbtFft(self, mode):
         '''Sets the DVB FFT mode.        mode    2 | 4 | 8'''
         fft = "M{}K".format(mode)
         return self.querySFU(":DVBT:FFT:MODE {};*WAI;:DVBT:FFT:MODE?".format(fft), str(fft))
     
-    def getDvbtFft(self):
-        '''Returns the DVB FFT mode'''
-        return self.querySFU(":DVBT:FFT:MODE?")
-
     def setDvbtGuard(self, guard):
         '''Sets the DVB guard mode 
         guard    4 | 8 | 16 | 32'''
         gi = "G1_{}".format(guard)
         return self.querySFU(":DVBT:GUAR:INT {};*WAI;:DVBT:GUAR:INT?".format(gi), gi[:4])   # only returns 4 charaters
 
-    def getDvbtGuard(self):
-        '''Returns the DVB guard'''
-        return self.querySFU(":DVBT:GUAR:INT?")
-
     def setDvbtCons(self, const):
         '''Sets the DVB constellation  
         const    4 | 16 | 64'''
         con = "T{}".format(const)
         return self.querySFU(":DVBT:CONS {};*WAI;:DVBT:CONS?".format(con), str(con))
 
-    def getDvbtCons(self):
-        '''Returns the DVB constellation'''
-        return self.querySFU(":DVBT:CONS?")
-
     def setDvbtCoderate(self, codeRate):
         '''Sets the DVB code rate [
         codeRate    "1_2" | "2_3" | "3_4" | "5_6" | "7_8"'''
         cr = "R{}".format(codeRate)
         return self.querySFU(":DVBT:RATE {};*WAI;:DVBT:RATE?".format(cr), str(cr))
 
-    def getDvbtCoderate(self):
-        '''Returns the DVB code rate'''
-        return self.querySFU(":DVBT:RATE?")        
-        
     def setDvbtUsedBand(self, bandwidth):
         '''Sets the DVB-t used bandwidth.    bandwidth        1,000,000.0 to 10,000,000.0'''
         bandwidth = str(bandwidth)
         return self.querySFU(":DVBT:USED:BAND {};*WAI;:DVBT:USED:BAND?".format(bandwidth), Decimal(bandwidth))
 
-    def getDvbtUsedBand(self):
-        '''Returns the DVB used bandwidth'''
-        return self.querySFU(":DVBT:USED:BAND?")
-
     def setDvbtHierarchy(self, hMode):
         '''Sets the DVB-t DVBT hierarchical mode.
         Modes NONH, A1, A2 and A4'''
         hMode = (hMode, "NONH")[hMode == "NO"]
         return self.querySFU(":DVBT:HIER {};*WAI;:DVBT:HIER?".format(hMode), hMode)
 
-    def getDvbtHierarchy(self):
-        '''Returns the DVBT hierarchical mode'''
-        return self.querySFU(":DVBT:HIER?")
-
     def setDvbtLpCoderate(self, codeRate):
         '''Sets the DVB LP code rate [
         codeRate    "1_2" | "2_3" | "3_4" | "5_6" | "7_8"'''
         cr = "R{}".format(codeRate)
         return self.querySFU(":DVBT:RATE:LOW {};*WAI;:DVBT:RATE:LOW?".format(cr), cr)
         
-    def getDvbtLpCoderate(self):
-        '''Returns the DVB LP code rate'''
-        return self.querySFU(":DVBT:RATE:LOW?")        
-        
-    def setDvbtSource(self, source):
-        '''Set the DVB-T input signal source.
-        source      "EXT" | "TSPL" | "TEST"'''
-        return self.querySFU(":DVBT:SOUR {};*WAI;:DVBT:SOUR?".format(source), str(source))
-
-    def getDvbtSource(self):
-        '''Returns the DVB-T input signal source.'''
-        return self.querySFU(":DVBT:SOUR?")
- 
-    def setDvbtLpSource(self, source):
-        '''Set the DVB-T LP input signal source.
-        source      "EXT" | "TSPL" | "TEST"'''
-        return self.querySFU(":DVBT:SOUR:LOW {};*WAI;:DVBT:SOUR:LOW?".format(source), str(source))
-
-    def getDvbtLpSource(self):
-        '''Returns the DVB-T LP input signal source.'''
-        return self.querySFU(":DVBT:SOUR:LOW?")
-
 #### ISDBT Commands ###############################################################################
-    def setIsdbSystem(self, sys):
-        '''Set the ISDBT system.        sys    "T" | "TSB1" | "TSB"]'''
-        return self.querySFU(":ISDBt:SYSTem {};*WAI;:ISDBt:SYSTem?".format(sys), str(sys))
-
-    def getIsdbSystem(self):
-        '''Returns the ISDBT system.'''
-        return self.querySFU(":ISDBt:SYSTem?")
-
-    def setIsdbPortion(self, por):
-        '''Set the ISDBT portion .
-        por    "PDD" | "PDC" | "PCC" | "DDD" |"DDC" | "DCC" | "CCC"'''
-        return self.querySFU(":ISDBt:PORTION {};*WAI;:ISDBt:PORTION?".format(por), str(por))
-
-    def getIsdbPortion(self):
-        '''Returns the ISDBT portion.'''
-        return self.querySFU(":ISDBt:PORTION?")
-
+    # the plain setters and getters of this section are made from COMMANDS
     def setIsdbConst(self, layer, const):
         '''Set the ISDBT constellation for a selected layer.
         layer      "A" | "B" |"C"
@@ -1353,20 +2366,20 @@ class SfuClass:
         con = "C_{}".format(const)
         return self.querySFU(":ISDBt:CONStel:{0} {1};*WAI;:ISDBt:CONStel:{0}?".format(layer, con), con)
 
-    def getIsdbConst(self, layer):
+    def getIsdbConst(self, layer, fresh=False):
         '''Returns the ISDBT constellation for a selected layer.
         layer        "A" | "B" |"C"'''
-        return self.querySFU(":ISDBt:CONStel:{}?".format(layer))
+        return self.querySFU(":ISDBt:CONStel:{}?".format(layer), fresh=fresh)
 
     def setIsdbSegment(self, layer, segment):
         '''Set the number of ISDBT segments for a selected layer.
         layer        "A" | "B" |"C"        segment      1 to 13'''
         return self.querySFU(":ISDBt:SEGMents:{0} {1};*WAI;:ISDBt:SEGMents:{0}?".format(layer, segment), int(segment))
 
-    def getIsdbSegment(self, layer):
+    def getIsdbSegment(self, layer, fresh=False):
         '''Returns the number of ISDBT segments for a selected layer.
         layer        "A" | "B" |"C"'''
-        return self.querySFU(":ISDBt:SEGMents:{}?".format(layer))
+        return self.querySFU(":ISDBt:SEGMents:{}?".format(layer), fresh=fresh)
     
     def setIsdbCodeRate(self, layer, codeRate):
         '''Set the ISDBT code rate for a selected layer.
@@ -1375,66 +2388,42 @@ class SfuClass:
         rate = "R{}".format(codeRate)
         return self.querySFU(":ISDBt:RATE:{0} {1};*WAI;:ISDBt:RATE:{0}?".format(layer, rate), rate)
 
-    def getIsdbCodeRate(self, layer):
+    def getIsdbCodeRate(self, layer, fresh=False):
         '''Returns the ISDBT code rate for a selected layer.
         layer        "A" | "B" |"C"'''
-        return self.querySFU(":ISDBt:RATE:{}?".format(layer))
+        return self.querySFU(":ISDBt:RATE:{}?".format(layer), fresh=fresh)
 
     def setIsdbInter(self, layer, interleaver):
         '''Set the ISDBT interleaver for a selected layer.        layer        "A" | "B" |"C"    interlever    1 to 8'''
         return self.querySFU(":ISDBt:TIME:INT:{0} {1};*WAI;:ISDBt:TIME:INT:{0}?".format(layer, interleaver), interleaver)
 
-    def getIsdbInter(self, layer):
+    def getIsdbInter(self, layer, fresh=False):
         '''Returns the ISDBT interleaver for a selected layer.
         layer    "A" | "B" |"C"'''
-        return self.querySFU(":ISDBt:TIME:INT:{}?".format(layer))
+        return self.querySFU(":ISDBt:TIME:INT:{}?".format(layer), fresh=fresh)
 
     def setIsdbFft(self, mode):
         '''Set the ISDBT FFT mode.        mode    "1_2" | "2_4" | "3_8"'''
         fft = "M{}K".format(mode)
         return self.querySFU(":ISDBt:FFT:MODE {};*WAI;:ISDBt:FFT:MODE?".format(fft), fft)
 
-    def getIsdbFft(self):
-        '''Returns the ISDBT FFT mode.'''
-        return self.querySFU(":ISDBt:FFT:MODE?")
-
     def setIsdbGuard(self, guard):
         '''Set the ISDBT guard.
         guard    4 | 8 | 16 | 32'''
         gi = "G1_{}".format(guard)
         return self.querySFU(":ISDBt:GUARd {};*WAI;:ISDBt:GUARd?".format(gi), gi)
 
-    def getIsdbGuard(self):
-        '''Returns the ISDBT guard.'''
-        return self.querySFU(":ISDBt:GUARd?")
-
     def setIsdbBandwidthVar(self, var):
         '''Set the ISDB-T Channel bandwidth variation.        var      -1000 to +1000'''
         if var >1000 or var <-1000:
             return "****    Sweep Points Set Error - Invalid Value for SFU {}    ****".format(var)
         return self.querySFU(":ISDBt:BAND:VAR {};:ISDBt:BAND:VAR?".format(var), var)
 
-    def getIsdbBandwidthVar(self):
-        '''Returns the ISDB-T Channel bandwidth variation.'''
-        return self.querySFU(":ISDBt:BAND:VAR?")
-
     def setIsdbBandwidth(self, band):
         '''Set the ISDB-T Channel bandwidth.        band      6 | 7 | 8        valid = ["BW_8","BW_7","BW_6"]'''
         band = "BW_{}".format(band)
         return self.querySFU(":ISDBt:CHAN:BAND {};:ISDBt:CHAN:BAND?".format(band), band)
 
-    def getIsdbBandwidth(self):
-        '''Returns the ISDB-T Channel bandwidth.'''
-        return self.querySFU(":ISDBt:CHAN:BAND?")
-
-    def setIsdbSpecial(self, state):
-        '''Sets the state of special settings.        state    "ON" | "OFF"'''
-        return self.querySFU(":ISDBt:SPECial:SETTings:STAT {};*WAI;:ISDBt:SPECial:SETTings:STAT?".format(state), state)
-  
-    def getIsdbSpecial(self):
-        '''Returns the state of the ISDBT special settings.'''   
-        return self.querySFU(":ISDBt:SPECial:SETTings:STAT?")
-
     def setIsdbSpecSeg(self, segment, state):
         '''Sets the condition of the individual ISDBT segments.    Special settings must be on.
         segment    1 to 13        state      "ON" | "OFF" '''
@@ -1442,180 +2431,68 @@ class SfuClass:
         return self.querySFU(":ISDBt:SPECial:SEGM {},{};*WAI".format(segment, state))
   
 #### DVB-C Commands ###############################################################################
-    def setDvbcSource(self, source):
-        '''Set the DVB-C input signal source.
-        source      "EXT" | "TSPL" | "TEST"'''
-        return self.querySFU(":DVBC:SOUR {};*WAI;:DVBC:SOUR?".format(source), source)
-
-    def getDvbcSource(self):
-        '''Returns the DVB-C input signal source.'''
-        return self.querySFU(":DVBC:SOUR?")
-
+    # the plain setters and getters of this section are made from COMMANDS
     def setDvbcConst(self, const):
         '''Set the DVB-C constellation.
         const      16 | 32 | 64 | 128 | 256'''
         con = "C{}".format(const)
         return self.querySFU(":DVBC:CONS {};*WAI;:DVBC:CONS?".format(con), str(con))
 
-    def getDvbcConst(self):
-        '''Returns the DVB-C constellation.'''
-        return self.querySFU(":DVBC:CONS?")
-    
     def setDvbcSymbolRate(self, rate):
         '''Set the DVB-C symbol rate.        rate      0.1e6 to 8e6'''
         rate = str(rate)
         return self.querySFU(":DVBC:SYMB {};*WAI;:DVBC:SYMB?".format(rate), Decimal(rate))
 
-    def getDvbcSymbolRate(self):
-        '''Returns the DVB-C symbol rate.'''
-        return self.querySFU(":DVBC:SYMB?")            
-            
 #### J.83/B Commands ##############################################################################
-    def setJ83bSource(self, source):
-        '''Set the J.83/B input signal source.
-        source      "EXT" | "TSPL" | "TEST"'''
-        return self.querySFU(":J83B:SOUR {};*WAI;:J83B:SOUR?".format(source), str(source))
-
-    def getJ83bSource(self):
-        '''Returns the J.83/B input signal source.'''
-        return self.querySFU(":J83B:SOUR?")
-    
+    # the plain setters and getters of this section are made from COMMANDS
     def setJ83bConst(self, const):
         '''Set the J.83/B constellation.
         const      64 | 256 | 1024'''
         con = "J{}".format(const)
         return self.querySFU(":J83B:CONS {};*WAI;:J83B:CONS?".format(con), con)
 
-    def getJ83bConst(self):
-        '''Returns the J.83/B constellation.'''
-        return self.querySFU(":J83B:CONS?")
-            
     def setJ83bSymbolRate(self, rate):
         '''Set the J.83/B symbol rate.    rate      4.824483e6 to 5.896591e6'''
         rate = str(rate)
         return self.querySFU(":J83B:SYMB {};*WAI;:J83B:SYMB?".format(rate), Decimal(rate))
 
-    def getJ83bSymbolRate(self):
-        '''Returns the J.83/B symbol rate.'''
-        return self.querySFU(":J83B:SYMB?")
-    
-    def setJ83bInter(self, mode):
-        '''Set the J.83/B interleaver.
-        mode      0 to 12'''
-        return self.querySFU(":J83B:INT:MODE {};*WAI;:J83B:INT:MODE?".format(mode), mode)
-
-    def getJ83bInter(self):
-        '''Returns the J.83/B interleaver.'''
-        return self.querySFU(":J83B:INT:MODE?")
-
 #### ATSC Commands ################################################################################
-    def setAtscFreqRef(self, ref):
-        '''Set the ATSC frequency reference to either
-        pilot PIL or center CENT.'''
-        #FREQ:VSBF PIL | CENT
-        return self.querySFU(":FREQ:VSBF {};*WAI;:FREQ:VSBF?".format(ref), ref)
-
-    def getAtscFreqRef(self):
-        '''Returns tthe ATSC frequency reference.'''
-        return self.querySFU(":FREQ:VSBF?")
+    # the plain setters and getters of this section are made from COMMANDS
 
 #### DTMB / GB20600 Commands ######################################################################
+    # the plain setters and getters of this section are made from COMMANDS
 
     def setDtmbNetworkMode(self, mode):
         '''Set the DTMB network mode to either SFN or MFN.'''
         '''mode    "SFN" ("single frequency network)| "MFN (multi frequency network)"'''
         return self.querySFU(":DTMB:NETW {};:DTMB:NETW?".format(mode))
 
-    def getDtmbNetworkMode(self):
-        '''Returns the state of the DTMB network mode.'''
-        return self.querySFU(":DTMB:NETW?")
-
-    def setDtmbSingleMode(self, state):
-        '''Set the DTMB single carrier mode to either on or off.        state    "ON" | "OFF or  "1 | 0"'''        
-        return self.querySFU(":DTMB:SINGle {};*WAI;:DTMB:SINGle?".format(state), state)
-
-    def getDtmbSingleMode(self):
-        '''Returns the state of the DTMB single carrier mode.'''
-        return self.querySFU(":DTMB:SINGle?")
-    
-    def setDtmbDualPilot(self, state):
-        '''Set the DTMB Dual Pilot tone to either on or off.        state    "ON" | "OFF"'''
-        return self.querySFU(":DTMB:DUAL:PILot {};*WAI;:DTMB:DUAL:PILot?".format(state), state)
-
-    def getDtmbDualPilot(self):
-        '''Returns the state of the DTMB Dual Pilot tone.'''
-        return self.querySFU(":DTMB:DUAL:PILot?")
-
     def setDtmbConst(self, const):
         '''Set the DTMB constellation.        const      4 | 16 | 32 | 64 | 4NR        valid = ["D4","D16","D32","D32","D64","D4NR"]'''
         con = "D{}".format(const)
         return self.querySFU(":DTMB:CONS {};:DTMB:CONS?".format(con), con)
 
-    def getDtmbConst(self):
-        '''Returns the DTMB constellation.'''
-        return self.querySFU(":DTMB:CONS?")
-            
     def setDtmbCodeRate(self, rate):
         '''Set the DTMB code rate.        rate      0.4 | 0.6 | 0.8        valid = ["R04","R06","R08"]'''
         rate = "R0{}".format(rate.split('.')[1])
         return self.querySFU(":DTMB:RATE {};:DTMB:RATE?".format(rate), rate)
 
-    def getDtmbCodeRate(self):
-        '''Returns the DTMB Code rate.'''
-        return self.querySFU(":DTMB:RATE?")
-
     def setDtmbGuard(self, guard):
         '''Set the DTMB Guard intervel.        rate      420 | 595 | 945        valid = ["G420","G595","G945"]'''
         guard = "G".format(guard)
         return self.querySFU(":DTMB:GUARD {};:DTMB:GUARD?".format(guard), guard)
     
-    def getDtmbGuard(self):
-        '''Returns the DTMB Guard intervel.'''
-        return self.querySFU(":DTMB:GUARD?")
-
     def setDtmbInterleaver(self, inter):
         '''Set the DTMB time interleaver.        rate      OFF | 240 | 720        valid = ["OFF","I240","I720"]'''
         if inter != "OFF":
             inter = "I" + str(inter)
         return self.querySFU(":DTMB:TIME:INT {};*WAI;:DTMB:TIME:INT?".format(inter), inter)
 
-    def getDtmbInterleaver(self):
-        '''Returns the DTMB time interleaver.'''
-        return self.querySFU(":DTMB:TIME:INT?")
-
     def setDtmbBandwidth(self, band):
         '''Set the DTMB Channel bandwidth.        band      8 | 7 | 6        valid = ["BW_8","BW_7","BW_6"]'''
         band = "BW_{}".format(band)
         return self.querySFU(":DTMB:CHAN:BAND {};*WAI;:DTMB:CHAN:BAND?".format(band), band)
 
-    def getDtmbBandwidth(self):
-        '''Returns the DTMB Channel bandwidth.'''
-        return self.querySFU(":DTMB:CHAN:BAND?")
-
-    def setDtmbSpecial(self, state):
-        '''Set the DTMB special setting to on or off.        state    "ON" | "OFF"'''
-        return self.querySFU(":DTMB:SETT {};*WAI;:DTMB:SETT?".format(state), state)
-
-    def getDtmbSpecial(self):
-        '''Returns the state of the DTMB special setting.'''
-        return self.querySFU(":DTMB:SETT?")
-    
-    def setDtmbPowerBoost(self, state):
-        '''Set the DTMB GI Power boost special setting to on or off.        state    "ON" | "OFF"'''
-        return self.querySFU(":DTMB:SPEC:GIP {};*WAI;:DTMB:SPEC:GIP?".format(state), state)
-
-    def getDtmbPowerBoost(self):
-        '''Returns the state of the DTMB GI Power boost special setting.'''
-        return self.querySFU(":DTMB:SPEC:GIP?")
-        
-    def setDtmbSiPowerNorm(self, state):
-        '''Set the DTMB SI Power Normalization special setting to on or off.        state    "ON" | "OFF"'''
-        return self.querySFU(":DTMB:SPEC:SIPN {};*WAI;:DTMB:SPEC:SIPN?".format(state), state)
-
-    def getDtmbSiPowerNorm(self):
-        '''Returns the state of the DTMB SI Power Normalization special setting.'''
-        return self.querySFU(":DTMB:SPEC:SIPN?")
-     
 #READ COMMANDS DONT WORK        
 #    def setDtmbCoChannelInt(self, state):
 #        '''Set the DTMB Co-Channel Interferer special setting to on or off.'''
@@ -1645,17 +2522,8 @@ class SfuClass:
 #        res = self.readSFU(cmd1)
 #        return res
 
-    def setDtmbGiPn(self, state):
-        '''Set the DTMB Guard PN.
-        state      VAR | CONS        valid = ["VAR","CONS"]
-        XXXXXX Note: This remote command does not apear to be work within the SFU XXXXXX'''
-        return self.querySFU(":DTMB:GIC {};*WAI;:DTMB:GIC?".format(state), state)
-
-    def getDtmbGiPn(self):
-        '''Returns the DTMB Guard PN.'''
-        return self.querySFU(":DTMB:GIC?")
-
 #DVB-T2 Commands
+    # the plain setters and getters of this section are made from COMMANDS
     def setT2FECFrame(self, *args):
         '''Set the DVB-T2 FEC Frame size.
         frame      NORM | SHOR        valid = ["NORM","SHOR"]
@@ -1666,12 +2534,12 @@ class SfuClass:
         frame = args[0]
         return self.querySFU(":T2DV:PLP{0}:FECF {1};*WAI;:T2DV:PLP{0}:FECF?".format(plp, frame), str(frame))
 
-    def getT2FECFrame(self, *args):
+    def getT2FECFrame(self, *args, **kwargs):
         '''Returns tthe DVB-T2 FEC Frame size.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:FECF?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:FECF?".format(plp), fresh=kwargs.get('fresh', False))
 
     def setT2CodeRate(self, *args):
         '''Set the DVB-T2 code rate.
@@ -1683,12 +2551,12 @@ class SfuClass:
         rate = "R{}".format(args[0])
         return self.querySFU(":T2DV:PLP{0}:RATE {1};:T2DV:PLP{0}:RATE?".format(plp, rate), str(rate))
 
-    def getT2CodeRate(self, *args):
+    def getT2CodeRate(self, *args, **kwargs):
         '''Returns the DVB-T2 Code rate.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:RATE?".fomrat(plp))
+        return self.querySFU(":T2DV:PLP{}:RATE?".format(plp), fresh=kwargs.get('fresh', False))
 
     def setT2Const(self, *args):
         '''Set the DVB-T2 constellation.
@@ -1700,12 +2568,12 @@ class SfuClass:
         con = "T{}".format(args[0])
         return self.querySFU(":T2DV:PLP{0}:CONS {1};:T2DV:PLP{0}:CONS?".format(plp, con), con)
 
-    def getT2Const(self, *args):
+    def getT2Const(self, *args, **kwargs):
         '''Returns the DVB-T2 constellation.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:CONS?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:CONS?".format(plp), fresh=kwargs.get('fresh', False))
 
     def setT2ConstRot(self, *args):
         '''Set the DVB-T2 constellation rotation to on or off.
@@ -1717,12 +2585,12 @@ class SfuClass:
         state = str(args[0])
         return self.querySFU(":T2DV:PLP{0}:CROT {1};*WAI;:T2DV:PLP{0}:CROT?".format(plp, state), state)
 
-    def getT2ConstRot(self, *args):
+    def getT2ConstRot(self, *args, **kwargs):
         '''Returns the state of the DVB-T2 constellation rotation setting.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:CROT?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:CROT?".format(plp), fresh=kwargs.get('fresh', False))
     
     def setT2TimeIntType(self, *args):
         '''Set the state of the DVB-T2 time interval type setting.
@@ -1734,22 +2602,22 @@ class SfuClass:
         intervalType = str(args[0])
         return self.querySFU(":T2DV:PLP{0}:TIL:TYPE {1};:T2DV:PLP{0}:TIL:TYPE?".format(plp, intervalType), intervalType)
     
-    def getT2TimeIntType(self, *args):
+    def getT2TimeIntType(self, *args, **kwargs):
         '''Returns the state of the DVB-T2 time interval type setting.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:TIL:TYPE?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:TIL:TYPE?".format(plp), fresh=kwargs.get('fresh', False))
     
     def setT2TimeIntFrame(self, *args):
         return "setT2TimeIntFrame not implmented"
 
-    def getT2TimeIntFrame(self, *args):
+    def getT2TimeIntFrame(self, *args, **kwargs):
         '''Returns the state of the DVB-T2 time interval frame setting.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:TIL:FINT?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:TIL:FINT?".format(plp), fresh=kwargs.get('fresh', False))
 
     def setT2TimeIntLength(self, *args):
         '''Set the state of the DVB-T2 time interval length setting.
@@ -1762,12 +2630,12 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:PLP{0}:TIL:LENG {1};:T2DV:PLP{0}TIL:LENG?".format(plp. args[0]), int(args[0]))
 
-    def getT2TimeIntLength(self, *args):
+    def getT2TimeIntLength(self, *args, **kwargs):
         '''Returns the state of the DVB-T2 time interval length setting.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:TIL:LENG?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:TIL:LENG?".format(plp), fresh=kwargs.get('fresh', False))
         
     def setT2DateNumBlock(self, *args):
         '''Set the value of the DVB-T2 PLP NUM BLOCKS
@@ -1780,12 +2648,12 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:PLP{0}:BLOC {1};:T2DV:PLP{0}:BLOC?".format(plp, args[0]), int(args[0]))
 
-    def getT2DateNumBlock(self, *args):
+    def getT2DateNumBlock(self, *args, **kwargs):
         '''Returns the value of the DVB-T2 PLP NUM BLOCKS.'''
         plp = "1"
         if len(args) > 0:
             plp = str(args[0] +1)
-        return self.querySFU(":T2DV:PLP{}:BLOC?".format(plp))
+        return self.querySFU(":T2DV:PLP{}:BLOC?".format(plp), fresh=kwargs.get('fresh', False))
         
     def setT2Bandwidth(self, band):
         '''Set the DVB-T2 Channel bandwidth.
@@ -1794,14 +2662,6 @@ class SfuClass:
         band = "BW_{}".format((band, "2")[Decimal(band) == 1.7])
         return self.querySFU(":T2DV:CHAN {};:T2DV:CHAN?".format(band), str(band))
 
-    def getT2Bandwidth(self):
-        '''Returns the DVB-T2 Channel bandwidth.'''
-        return self.querySFU(":T2DV:CHAN?")
-    
-    def getT2UsedBandwidth(self):
-        '''Returns the DVB-T2 usabale channel bandwidth.'''
-        return self.querySFU(":T2DV:USED?")
-
     def setT2BandwidthVar(self, var):
         '''Set the DVB-T2 Channel bandwidth variation.
         var      -1000 to +1000'''
@@ -1809,40 +2669,24 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:BAND:VAR {};:T2DV:BAND:VAR?".format(var), str(var))
 
-    def getT2BandwidthVar(self):
-        '''Returns the DVB-T2 Channel bandwidth variation.'''
-        return self.querySFU(":T2DV:BAND:VAR?")    
-
     def setT2FFTSize(self, fft):
         '''Set the DVB-T2 FFT size.
         band      1K | 2K | 4K | 8K | 16K | 32K | 8E | 16E | 32E         valid = ["M1K","M2K","M4K","M8K","M16K","M32K","M8E","M16E","M32E"]'''
         fft = "M{}".format(fft)
         return self.querySFU(":T2DV:FFT:MODE {};:T2DV:FFT:MODE?".format(fft), fft)
 
-    def getT2FFTSize(self):
-        '''Returns the DVB-T2 FFT size.'''
-        return self.querySFU(":T2DV:FFT:MODE?")
-    
     def setT2Guard(self, guard):
         '''Set the DVB-T2 FFT size.
         band      1_4 | 1_8 | 1_16 | 1_32 | 1128 | 19128 | 19256         valid = ["G1_4","G1_8","G1_1","G1_3","G112","G191","G192"]'''
         guard = "G{:.3}".format(guard)
         return self.querySFU(":T2DV:GUAR:INT {};:T2DV:GUAR:INT?".format(guard), guard)
     
-    def getT2Guard(self):
-        '''Returns the guard interval.'''
-        return self.querySFU(":T2DV:GUAR:INT?")
-
     def setT2PilotPat(self, pattern):
         '''Set the DVB-T2 pilot pattern.
         pattern      1 to 8         valid = ["PP1","PP2","PP3","PP4","PP5","PP6","PP7","PP8"]'''
         pattern = "PP{}".format(pattern)
         return self.querySFU(":T2DV:PIL {};:T2DV:PIL?".format(pattern), pattern)
     
-    def getT2PilotPat(self):
-        '''Returns the gDVB-T2 pilot pattern.'''
-        return self.querySFU(":T2DV:PIL?")
-    
     def setT2FramesPerSuper(self, frames):
         '''Set the number of T2 frames per super frame (N_T2).
         frames      2 to 255 '''
@@ -1850,15 +2694,6 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:NT2F {};:T2DV:NT2F?".format(frames), str(frames))
 
-    def getT2FramesPerSuper(self):
-        '''Returns the number of T2 frames per super frame (N_T2).'''
-        return self.querySFU(":T2DV:NT2F?")
-    
-    def getT2OfdmPerFrame(self):
-        '''Returns the number of OFDM symbols per T2 frame (L_f).
-        Read only prameter'''
-        return self.querySFU(":T2DV:LF?")
-    
     def setT2DataPerFrame(self, symbols):
         '''Set the number of data symbols per T2 frame (L_DATA).
         symbols      3 to 2097 '''
@@ -1866,10 +2701,6 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:LDAT {};:T2DV:LDAT?".format(symbols), int(symbols))
     
-    def getT2DataPerFrame(self):
-        '''Returns the number of data symbols per T2 frame (L_DATA).'''
-        return self.querySFU(":T2DV:LDAT?")
-    
     def setT2SlicesPerFrame(self, slices):
         '''Set the number of subslices per T2 frame (N_SUB).
         Slices      currently only 1 allowed '''
@@ -1877,7 +2708,7 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:NSUB {};:T2DV:NSUB?".format(slices), str(slices))
     
-    def getT2SlicesPerFrame(self):
+    def getT2SlicesPerFrame(self, fresh=False):
         '''Returns the number of subslices per T2 frame (N_SUB).'''
         return self.readSFU(":T2DV:NSUB?")
 
@@ -1886,14 +2717,10 @@ class SfuClass:
         pattern      MFN, SFN (only MFN implented)         valid = ["MFN","SFN"]'''
         return self.querySFU(":T2DV:NETW {};:T2DV:NETW?".format(mode), mode)
     
-    def getT2NetworkMode(self):
+    def getT2NetworkMode(self, fresh=False):
         '''Returns the DVB-T2 newwotk mode.'''
         return self.readSFU(":T2DV:NETW?")
 
-    def getT2TxSystem(self):
-        '''Returns the DVB-T2 transmission system.'''
-        return self.querySFU(":T2DV:TXSY?")
-    
     def setT2TxSystem(self, system):
         return "setT2TxSystem not implmented"
 
@@ -1902,69 +2729,29 @@ class SfuClass:
         state    "OFF" | "TR"  also ACE" | "ACE_TR" on the Dektec        valid = ["OFF","TR","ACE","ACE_TR"]'''   
         return self.querySFU(":T2DV:PAPR {};:T2DV:PAPR?".format(state), str(state))
 
-    def getT2PAPR(self):
-        '''Returns the state of the DVB-T2 time PAPR setting.'''
-        return self.querySFU(":T2DV:PAPR?")
-
     def setT2FEF(self, state):
         return "getT2FEF not implmented"
 
-    def getT2FEF(self):
-        '''Returns the state of the DVB-T2 time FEF setting.'''
-        return self.querySFU(":T2DV:FEF?")
-    
     def setT2TFS(self, state):
         return "setT2TFS not implmented"
 
-    def getT2TFS(self):
-        '''Returns the state of the DVB-T2 time TFS setting.'''
-        return self.querySFU(":T2DV:TFS?")
-    
     def setT2L1T2Version(self, version):
         '''Set the state of the DVB-T2 L2T2 version.
         version    "V111" | "V121"        valid = ["V111","V121"]'''   
         return self.querySFU(":T2DV:L:T2V {};:T2DV:L:T2V?".format(version), version)
 
-    def getT2L1T2Version(self):
-        '''Returns the state of the DVB-T2 L1T2 version.'''
-        return self.querySFU(":T2DV:L:T2V?")    
-    
     def setT2L1PostMod(self, mod):
         '''Set the state of the DVB-T2 L1 post modulation.
         version    "2" | "4" | "16" | "64"        valid = ["T2","T4","T16","T64"]'''   
         mod = "T" + str(mod)
         return self.querySFU(":T2DV:L:CONS {};:T2DV:L:CONS?".format(mod), mod)
 
-    def getT2L1PostMod(self):
-        '''Returns the state of the DVB-T2 L1 post modulation.'''
-        return self.querySFU(":T2DV:L:CONS?")
-    
-    def setT2L1Repetition(self, state):
-        '''Set the state of the DVB-T2 L1 repetition setting.        state    "OFF" | "ON"        valid = ["OFF","ON"]'''   
-        return self.querySFU(":T2DV:L:REP {};*WAI;:T2DV:L:REP?".format(state), state)
-    
-    def getT2L1Repetition(self):
-        '''Returns the state of the DVB-T2 time PAPR setting.'''
-        return self.querySFU(":T2DV:L:REP?")
-
     def setT2L1PostExtension(self, state):
         return "setT2L1PostExtension not implmented"
 
-    def getT2L1PostExtension(self):
-        '''Returns the state of the DVB-T2 L1 post extension setting.'''
-        return self.querySFU(":T2DV:L:EXT?")
-    
     def setT2NumAuxStream(self, num):
         return "setT2NumAuxStream not implmented"
 
-    def getT2NumAuxStream(self):
-        '''Returns the state of the DVB-T2 time TFS setting.'''
-        return self.querySFU(":T2DV:NAUX?")
-    
-    def getT2L1RfSignalling(self):
-        '''Returns the state of the DVB-T2 L1 RF Signalling.'''
-        return self.querySFU(":T2DV:L:RFS?")    
-    
     def setT2CellId(self, cellId):
         '''Set the value of the cell id setting. Value set by remote commands is
         an integer but value displayed on SFU screen is a hex value.    id    0 to 65,535'''
@@ -1972,12 +2759,6 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:ID:CELL {};:T2DV:ID:CELL?".format(cellId), str(cellId))
     
-    def getT2CellId(self):
-        '''Returns the value of the cell id setting. Values returned by the
-        remote commands are integer values of hex numbers displayed on the
-         SFU screen.'''
-        return self.querySFU(":T2DV:ID:CELL?")
-    
     def setT2NetworkId(self, netId):
         '''Set the value of the network id setting. Value set by remote commands is
         an integer but value displayed on SFU screen is a hex value.    id    0 to 65,535'''
@@ -1985,11 +2766,6 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:ID:NETW {};:T2DV:ID:NETW?".format(netId), str(netId))
     
-    def getT2NetworkId(self):
-        '''Returns the value of the network id setting. Values returned by the
-        remote commands are integer values of hex numbers displayed on theb SFU screen.'''
-        return self.querySFU(":T2DV:ID:NETW?")
-    
     def setT2SystemId(self, sysId):
         '''Set the value of the system id setting. Value set by remote commands is
         an integer but value displayed on SFU screen is a hex value.    id    0 to 65,535'''
@@ -1997,76 +2773,19 @@ class SfuClass:
             return "Set Error - Invalid value"
         return self.querySFU(":T2DV:ID:T2SY {};:T2DV:ID:T2SY?".format(sysId), str(sysId))
     
-    def getT2SystemId(self):
-        '''Returns the value of the system id setting. Values returned by the
-        remote commands are integer values of hex numbers displayed on the SFU screen.'''
-        return self.querySFU(":T2DV:ID:T2SY?")
-
-    def setT2MIInterface(self, state):
-        '''Set the state of the DVB-T2 MI Modulator Interface.    state    "OFF" | "ON"        valid = ["OFF","ON"]'''   
-        return self.querySFU(":T2DV:INPUT:T2MI:INT {};*WAI;:T2DV:INPUT:T2MI:INT?".format(state), state)
-    
-    def getT2MIInterface(self):
-        '''Returns the state of the DVB-T2 MI Modulator Interface.'''
-        return self.querySFU(":T2DV:INPUT:T2MI:INT?")
-
     def setT2MISource(self, source):
         '''Set the source of the DVB-T2 MI Modulator Interface stream.
         state    "INTERNAL" | "EXTERNAL"        valid = ["INTERNAL","EXTERNAL"]'''   
         return self.querySFU(":T2DV:INPUT:T2MI:SOUR {};:T2DV:INPUT:T2MI:SOUR?".format(source), source)
     
-    def getT2MIsetT2MISource(self):
-        '''Returns the source of the DVB-T2 MI Modulator Interface stream.'''
-        return self.querySFU(":T2DV:INPUT:T2MI:SOUR?")
-        
-    def setT2EFEPayload(self, source):
-        '''Set the type of the DVB-T2 FEF Payload type.
-        state    "NULL" | "NOIS"        valid = ["NULL","NOIS"]'''
-        return self.querySFU(":T2DV:FEF:PAYL {};*WAI;:T2DV:FEF:PAYL?".format(source), source)
-
-    def getT2EFEPayload(self):
-        '''Returns the type of the DVB-T2 FEF Payload type.'''
-        return self.querySFU(":T2DV:FEF:PAYL?")
-
-    def setT2BBMode(self, bbmode):
-        '''Set the type of the DVB-T2 BB mode used per PLP.
-        state    "HEM High Effincy Mode" | "NOIS Normal Mode"
-        Note to set PLP 0 use PLP1, PLP 1 uese PLP2 etc        valid = ["HEM","NM"]'''   
-        return self.querySFU(":T2DV:PLP1:BB_M {};*WAI;:T2DV:PLP1:BB_M?".format(bbmode), str(bbmode))
-
-    def getT2BBMode(self):
-        '''Returns the type of the DVB-T2 BB Mode set.'''
-        return self.querySFU(":T2DV:PLP1:BB_M?")
-        
-    def setT2MIpidId(self, pid):
-        ''' Sets the PID of the stream to be played within the the T2MI stream'''
-        #pid = '#H' + pid
-        return self.querySFU(":T2DV:INP:T2MI:PID {};*WAI;:T2DV:INP:T2MI:PID?".format(pid), str(pid))
-    
-    def getT2MIpidId(self):
-        ''' Sets the PID of the stream to be played within the the T2MI stream'''
-        #pid = '#H' + pid
-        return self.querySFU(":T2DV:INP:T2MI:PID?")
-        
-    def setT2MIsidId(self, sid):
-        ''' Sets the SID of the stream to be played within the the T2MI stream'''
-        return self.querySFU(":T2DV:INP:T2MI:SID {};*WAI;:T2DV:INP:T2MI:SID?".format(sid), str(sid))  
-    
-    def getT2MIsidId(self):
-        ''' Sets the SID of the stream to be played within the the T2MI stream'''
-        return self.querySFU(":T2DV:INP:T2MI:SID?")  
     ### DVBS    
+    # the plain setters and getters of this section are made from COMMANDS
     
     def setDvbsSource(self, source):
         if not self.dvbs: return 'DVBS function not available'
         '''Set the DVB-S input signal source.    source      "EXT" | "TSPL" | "TEST"'''
         return self.querySFU(":DVBS:SOUR {};:DVBS:SOUR?".format(source), source)
     
-    def getDvbsSource(self):
-        if not self.dvbs: return 'DVBS function not available'
-        '''Returns the DVB-S input signal source.'''
-        return self.querySFU(":DVBS:SOUR?")
-    
     def setDvbsConst(self, const):
         if not self.dvbs: return 'DVBS function not available'
         '''Set the DVBS constellation.
@@ -2076,21 +2795,11 @@ class SfuClass:
             return con
         return self.querySFU(":DVBS:CONS {};:DVBS:CONS?".format(con), con)
 
-    def getDvbsConst(self):
-        if not self.dvbs: return 'DVBS function not available'
-        '''Returns the DVBS constellation.'''
-        return self.querySFU(":DVBS:CONS?")
-    
     def setDvbsSymbolRate(self, rate):
         if not self.dvbs: return 'DVBS function not available'
         '''Set the DVB-S symbol rate.    rate      0.100 to 100.000 MS/s'''
         return self.querySFU(":DVBS:SYMB {};:DVBS:SYMB?".format(rate), str(rate))
 
-    def getDvbsSymbolRate(self):
-        if not self.dvbs: return 'DVBS function not available'
-        '''Returns the DVB-S symbol rate.'''
-        return self.querySFU(":DVBS:SYMB?")
-
     def setDvbsCoderate(self, codeRate):
         if not self.dvbs: return 'DVBS function not available'
         '''Sets the DVB-S code rate [
@@ -2098,27 +2807,18 @@ class SfuClass:
         cr = "R" + codeRate
         return self.querySFU(":DVBS:RATE {};*WAI;:DVBS:RATE?".format(cr), cr)
 
-    def getDvbsCoderate(self):
-        if not self.dvbs: return 'DVBS function not available'
-        '''Returns the DVB-S code rate'''
-        return self.querySFU(":DVBS:RATE?")
-    
     def setDvbsRollOff(self, rollOff):
         if not self.dvbs: return 'DVBS function not available'
         '''Sets the DVB-S value of roll off        rollOff    "0.25" | "0.3" | "0.35" | "0.4" | "0.45"        valid = ["0.25", "0.3", "0.30", "0.35", "0.4", "0.40", "0.45"]'''
         return self.querySFU(":DVBS:ROLL {};:DVBS:ROLL?".format(rollOff), str(rollOff))
 
-    def getDvbsRollOff(self):
-        if not self.dvbs: return 'DVBS function not available'
-        '''Returns the DVB-S value of roll off'''
-        return self.querySFU(":DVBS:ROLL?")
-
     def setDvbsInputSignal(self, inputSig):
         if not self.dvbs: return 'DVBS function not available'
         '''Sets the DVB-S input signal source [
         codeRate    "EXT" | "TSP" | "TEST"        valid = ["EXT", "TSP", "TEST"]'''
         return self.querySFU(":DVBS:SOUR {};:DVBS:SOUR?".format(inputSig), inputSig)
     ### DVBS2
+    # the plain setters and getters of this section are made from COMMANDS
     
     def setDvbs2Source(self, source):
         if not self.dvbs2: return 'DVBS2 function not available'
@@ -2126,11 +2826,6 @@ class SfuClass:
         source      "EXT" | "TSPL" | "TEST"'''
         return self.querySFU(":DVBS2:SOUR {};:DVBS2:SOUR?".format(source), source)
 
-    def getDvbs2Source(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVB-S2 input signal source.'''
-        return self.querySFU(":DVBS2:SOUR?")    
-    
     def setDvbs2Const(self, const):
         if not self.dvbs2: return 'DVBS2 function not available'
         '''Set the DVBS2 constellation.
@@ -2142,22 +2837,12 @@ class SfuClass:
         con = {"4": "S4", "8": "S8", "16": "A16", "32": "A32"}.get(str(const), str(const))
         return self.querySFU(":DVBS2:CONS {};*WAI;:DVBS2:CONS?".format(con), str(con))
 
-    def getDvbs2Const(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVBS2 constellation.'''
-        return self.querySFU(":DVBS2:CONS?")
-    
     def setDvbs2SymbolRate(self, rate):
         if not self.dvbs2: return 'DVBS2 function not available'
         '''Set the DVB-S2 symbol rate.    rate      1.000 to 45.000 MS/s'''
         rate = str(rate)
         return self.querySFU(":DVBS2:SYMB {};*WAI;:DVBS2:SYMB?".format(rate), Decimal(rate))
 
-    def getDvbs2SymbolRate(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVB-S2 symbol rate.'''
-        return self.querySFU(":DVBS2:SYMB?")
-    
     def setDvbs2Coderate(self, codeRate):
         if not self.dvbs2: return 'DVBS2 function not available'
         '''Sets the DVB-S2 code rate [        
@@ -2176,33 +2861,12 @@ class SfuClass:
             cr = "R9_1"
         return self.querySFU(":DVBS2:RATE {};*WAI;:DVBS2:RATE?".format(cr), cr)
 
-    def getDvbs2Coderate(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVB-S2 code rate'''
-        return self.querySFU(":DVBS2:RATE?")
-    
     def setDvbs2FecFrame(self, state):
         if not self.dvbs2: return 'DVBS2 function not available'
         '''Sets the DVB-S2 FEC frame length condition        NORMAL for 64800 bit | SHORT for 16200 bit        valid = ["NORMAL", "SHORT"]'''
         state = ("SHOR", "NORM")[state == "NORMAL"]
         return self.querySFU(":DVBS2:FECF {};:DVBS2:FECF?".format(state), state)
 
-    def getDvbs2FecFrame(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVB-S2 FEC frame length condition
-        NORMAL for 64800 bit | SHORT for 16200 bit'''
-        return self.querySFU(":DVBS2:FECF?")
-    
-    def setDvbs2Pilots(self, state):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Sets the DVB-S2 Pilots state to ON or OFF.        valid = ["ON", "OFF"]'''
-        return self.querySFU(":DVBS2:PIL {};*WAI;:DVBS2:PIL?".format(state), state)
-        
-    def getDvbs2Pilots(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVB-S2 Pilots state        ON | OFF'''
-        return self.querySFU(":DVBS2:PIL?")
-    
     def setDvbs2RollOff(self, rollOff):
         if not self.dvbs2: return 'DVBS2 function not available'
         '''Sets the DVB-S2 value of roll off
@@ -2210,69 +2874,31 @@ class SfuClass:
         rollOff = str(rollOff)
         return self.querySFU(":DVBS2:ROLL {};*WAI;:DVBS2:ROLL?".format(rollOff), Decimal(rollOff))        
     
-    def getDvbs2RollOff(self):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Returns the DVB-S2 Rolloff value
-        0.05 | 0.1 | 0.15 | 0.2 | 0.25 | 0.35'''
-        return self.querySFU(":DVBS2:ROLL?")
-
-    def setDvbs2InputSignal(self, inputSig):
-        if not self.dvbs2: return 'DVBS2 function not available'
-        '''Sets the DVB-S2 input signal source [        codeRate    "EXT" | "TSP" | "TEST"'''
-        return self.querySFU(":DVBS2:SOUR {};*WAI;:DVBS2:SOUR?".format(inputSig), inputSig)
-
 ############################################################################################################
     #Analog TV    
-    def setAtvVideoSource(self, source):
-        ''' Sets the Video input signal source to either External or Video Generator    "EXT" | "VGEN" '''
-        return self.querySFU("RATV:VID:VINP {};*WAI;:RATV:VID:VINP?".format(source), source)
-    
-    def getAtvVideoSource(self):
-        ''' Gets the Video input signal source'''
-        return self.querySFU("RATV:VID:VINP?")
-    
     def setAtvVisionPicture(self, picture):
         '''Sets the vision picture of a gernerated video
         "C75P" | "C75N" | "C75S" | "FUBP" | "CPAM" | "CPAN" | "LIBRary"         valid = ["C75P", "C75N", "C75S", "FUBP", "CPAM", "CPAN", "LIBRary"]'''
         return self.querySFU("RATV:VIDG:VIS {};:RATV:VIDG:VIS?".format(picture), picture)
     
-    def getAtvVisionPicture(self):
-        '''Gets the vision picture beeing generated'''
-        return self.querySFU("RATV:VIDG:VIS?")
-    
-    def setAtvLoadVisionPicture(self, patternFile):
+    def setAtvLoadVisionPicture(self, patternFile, localFile=None):
         '''Loads additional test patten file from the ATV video libray.
-        Only valid if FROM ATV VIDEO LIB has been selected as the vision picture opton'''
-        cmd1 = "RATV:VIDG:LIBR:SEL  \"{}\";*WAI".format(patternFile)
+        Only valid if FROM ATV VIDEO LIB has been selected as the vision picture opton
+        localFile    uploaded to patternFile first (give the full path), see uploadFile'''
+        if localFile:
+            uploaded = self.uploadFile(localFile, patternFile)
+            if settingFailed(uploaded):  return uploaded
+        cmd1 = "RATV:VIDG:LIBR:SEL  \"{}\";*OPC?".format(patternFile)
         self.querySFU(cmd1)
-        time.sleep(5)  
         return "ATV test pattern loaded"   
         
-    def setAtvAudioSource(self, source):
-        ''' Sets the Audio input signal source to either External, Audio Generator
-        or Audio Player        "EXT" | "AGEN" | "APL"        valid = ["EXT", "AGEN", "APL"]'''
-        return self.querySFU("RATV:AUD:AINP {};*WAI;:RATV:AUD:AINP?".format(source), source)
-    
-    def getAtvAudioSource(self):
-        ''' Gets the Audio input signal source'''
-        return self.querySFU("RATV:AUD:AINP?")
-    
-    def setAtvAudioExtZ(self, impedance):
-        '''Selects the input impedance of the external audio input. 
-        50 ohms (Z50) or 600 ohms (Z600)        valid = ["Z50", "Z600"]'''
-        return self.querySFU("RATV:AUEX:IMP {};*WAI;:RATV:AUEX:IMP?".format(impedance), str(impedance))
-    
-    def getAtvAudioExtZ(self):
-        ''' Gets the value of the input impedance of the external audio input'''
-        return self.querySFU("RATV:AUEX:IMP?")
-    
     def setAtvAudioState(self, channel, state):
         '''Sets the state of the audio channel 1 or 2 on (ON) or off (OFF).    valid1 = ["ON", "OFF"]'''
         return self.querySFU("RATV:AUDG:AUD:AF{0} {1};*WAI;:RATV:AUDG:AUD:AF{0}?".format(channel, state), state)
     
-    def getAtvAudioState(self, channel):
+    def getAtvAudioState(self, channel, fresh=False):
         ''' Gets the state of the audio channel 1 or 2'''
-        return self.querySFU("RATV:AUDG:AUD:AF{}?".format(channel))
+        return self.querySFU("RATV:AUDG:AUD:AF{}?".format(channel), fresh=fresh)
     
     def setAtvAudioFrequency(self, channel, frequency):
         '''Sets the AF frequency of the MONO/CH1/LEFT* sound signal (Ch 1) or 
@@ -2283,10 +2909,10 @@ class SfuClass:
             return "****    Error: - Invalid value"
         return self.querySFU("RATV:AUDG:AUD:FRQ{0} {1};*WAI;;RATV:AUDG:AUD:FRQ{0}?".format(channel, frequency), Decimal(frequency))
     
-    def getAtvAudioFrequency(self, channel):
+    def getAtvAudioFrequency(self, channel, fresh=False):
         ''' Gets the value of the AF frequency of the MONO/CH1/LEFT* sound signal (Ch 1) or 
         AF frequency of the CH2/RIGHT* sound signal (Ch 2)'''
-        return self.querySFU("RATV:AUDG:AUD:FRQ{}?".format(channel))
+        return self.querySFU("RATV:AUDG:AUD:FRQ{}?".format(channel), fresh=fresh)
 
     def setAtvAudioLevel(self, channel, level):
         '''Sets the AF level of the MONO/CH1/LEFT* sound signal (Ch 1) or 
@@ -2296,19 +2922,23 @@ class SfuClass:
             return "****    Error - Invalid value"
         return self.readSFU("RATV:AUDG:AUD:LEV{0} {1};*WAI;:RATV:AUDG:AUD:LEV{0}?".format(channel, level), str(level))
     
-    def getAtvAudioLevel(self, channel):
+    def getAtvAudioLevel(self, channel, fresh=False):
         ''' Gets the value of the AF level of the MONO/CH1/LEFT* sound signal (Ch 1) or 
         AF frequency of the CH2/RIGHT* sound signal (Ch 2)'''
-        return self.querySFU("RATV:AUDG:AUD:LEV{}?".format(channel))
+        return self.querySFU("RATV:AUDG:AUD:LEV{}?".format(channel), fresh=fresh)
         
-    def setAtvLoadAudioPlayer(self, audioFile):
+    def setAtvLoadAudioPlayer(self, audioFile, localFile=None):
         '''Selects the audio player file. If the file is not in the default path, 
         the path must be specified at the same time. If no file of the specified name 
         exists, it is created. The file extension may be omitted. Only files with the 
-        file extension *.wv will be created or loaded'''
+        file extension *.wv will be created or loaded
+        localFile    uploaded to audioFile first (give the full path), see uploadFile'''
+        if localFile:
+            uploaded = self.uploadFile(localFile, audioFile)
+            if settingFailed(uploaded):  return uploaded
         cmd1 = "RATV:APL:LIBR:SEL  \"{}\";*OPC?".format(audioFile)
         self.querySFU(cmd1)
-        time.sleep(3)    
+        scpi_recorder.sleep(3, self.connection, cmd1)
         return "Audio player file loaded"   
     
     def setAtvSoundMode(self, mode):
@@ -2320,47 +2950,24 @@ class SfuClass:
             return "****    Error: Invalid value"
         return self.querySFU("RATV:SOUN:MODE {};*WAI;:RATV:SOUN:MODE?".format(mode), mode)
     
-    def getAtvSoundMode(self):
-        ''' Gets the Audio sound mode'''
-        return self.querySFU("RATV:SOUN:MODE?")
-    
     def setAtvSoundNicam(self, mode):
         '''Sets the NICAM modulation signal        Stereo 1 (STE1), Dual 1 (DUA1) or Mono 1 (MON1) etc'''
         if mode not in ["STE1", "STE2", "STE3", "STE4", "DUA1", "DUA2", "DUA3", "DUA4", "MON1", "MON2", "MON3", "MON4"]:
             return "****    Error: NICAM modulation signal Invalid value"
         return self.querySFU("RATV:SOUN:NICS {};*WAI;:RATV:SOUN:NICS?".format(mode), mode)
     
-    def getAtvSoundNicam(self):
-        ''' Gets the NICAM modulation signal'''
-        return self.querySFU("RATV:SOUN:NICS?")
-    
     def setAtvSpecialState(self, state):
         '''Sets the overall state of the special settings.        valid = ["ON", "OFF"]'''
         return self.querySFU("RATV:SPEC:SETT:STAT {};:RATV:SPEC:SETT:STAT?".format(state), state)
     
-    def getAtvSpecialState(self):
-        ''' Gets the overall state of the special settings'''
-        return self.querySFU("RATV:SPEC:SETT:STAT?")
-    
-    def setAtvSpecialAMDepth(self, depth):
-        '''If special settings is on, sets  the modulation depth of the L standard 
-        amplitude-modulated sound.
-        0 to 100%'''
-        return self.querySFU("RATV:SPEC:SOUN:AMD {};*WAI;:RATV:SPEC:SOUN:AMD?".format(depth), str(depth))
-    
-    def getAtvSpecialAMDepth(self):
-        ''' Gets the modulation depth of the L standard 
-        amplitude-modulated sound'''
-        return self.querySFU("RATV:SPEC:SOUN:AMD?")
-    
     def setAtvSpecialFrqDeviation(self, subcarrier, frequency):
         '''If special settings is on, sets the frequency deviation of sound subcarrier 1 or 2         20000 Hz to 75000 Hz.'''
         frequency = str(frequency)
         return self.querySFU("RATV:SPEC:SOUN:DEV{0} {1};*WAI;:RATV:SPEC:SOUN:DEV{0}?".format(subcarrier, frequency), Decimal(frequency))
     
-    def getAtvSpecialFrqDeviation(self, subcarrier):
+    def getAtvSpecialFrqDeviation(self, subcarrier, fresh=False):
         ''' Gets the the frequency deviation of sound subcarrier 1 or 2 amplitude-modulated sound'''
-        return self.querySFU("RATV:SPEC:SOUN:DEV{}?".format(subcarrier))
+        return self.querySFU("RATV:SPEC:SOUN:DEV{}?".format(subcarrier), fresh=fresh)
     
     def setAtvSpecialFrqDeviationPilot(self, frequency):
         '''If special settings is on, sets the frequency deviation of the pilot carrier on sound subcarrier 2
@@ -2368,21 +2975,16 @@ class SfuClass:
         frequency = str(frequency)
         return self.querySFU("RATV:SPEC:SOUN:DEVP {};*WAI;:RATV:SPEC:SOUN:DEVP?".format(frequency), Decimal(frequency))
     
-    def getAtvSpecialFrqDeviationPilot(self):
-        ''' Gets the the frequency deviation of the pilot carrier on sound subcarrier 2 
-        amplitude-modulated sound'''
-        return self.querySFU("RATV:SPEC:SOUN:DEVP?")
-    
     def setAtvSpecialSubFrequency(self, subcarrier, frequency):
         '''If special settings is on, sets the RF frequency of sound subcarrier 1 or 2.
         subcarrier = 1 | 2         frequency  = 4000000 Hz to 7000000 Hz.'''
         frequency = str(frequency)
         return self.querySFU("RATV:SPEC:SOUN:FRQ{0} {1};*WAI;:RATV:SPEC:SOUN:FRQ{0}?".format(subcarrier, frequency), Decimal(frequency))
     
-    def getAtvSpecialSubFrequency(self, subcarrier):
+    def getAtvSpecialSubFrequency(self, subcarrier, fresh=False):
         ''' Gets the RF frequency of sound subcarrier 1 or 2. 
         amplitude-modulated sound        subcarrier = 1 | 2 '''
-        return self.querySFU("RATV:SPEC:SOUN:FRQ{}?".format(subcarrier))
+        return self.querySFU("RATV:SPEC:SOUN:FRQ{}?".format(subcarrier), fresh=fresh)
     
     def setAtvSpecialSubLevel(self, subcarrier, level):
         '''If special settings is on, sets the level of sound subcarrier 1/of the MONO sound subcarrier 
@@ -2391,19 +2993,11 @@ class SfuClass:
         level = str(level)
         return self.querySFU("RATV:SPEC:SOUN:LEV{0} {1};*WAI;:RATV:SPEC:SOUN:LEV{0}?".format(subcarrier, level), Decimal(level))
     
-    def getAtvSpecialSubLevel(self, subcarrier):
+    def getAtvSpecialSubLevel(self, subcarrier, fresh=False):
         ''' Gets the level of sound subcarrier 1/of the MONO sound subcarrier 
         or sound subcarrier 2. The level is referenced to the vision carrier sync pulse (0 dB).
         subcarrier = 1 | 2 '''
-        return self.querySFU("RATV:SPEC:SOUN:LEV{}?".format(subcarrier))
-    
-    def setAtvSpecialPilotState(self, state):
-        '''Sets the state of the pilot carrier on sound subcarrier 2 ON or OFF.        valid = ["ON", "OFF"]'''
-        return self.querySFU("RATV:SPEC:SOUN:PIL {};*WAI;:RATV:SPEC:SOUN:PIL?".format(state), state)
-    
-    def getAtvSpecialPilotState(self):
-        ''' Gets the state of tpilot carrier on sound subcarrier 2 ON or OFF'''
-        return self.querySFU("RATV:SPEC:SOUN:PIL?")
+        return self.querySFU("RATV:SPEC:SOUN:LEV{}?".format(subcarrier), fresh=fresh)
     
     def setAtvSpecialPreemphasis(self, preemphasis):
         '''Sets the preemphasis for the AF sound channels.
@@ -2413,79 +3007,21 @@ class SfuClass:
             return '****    Error: Preemphasis Invalid value'
         return self.querySFU("RATV:SPEC:SOUN:PRE {};*WAI;:RATV:SPEC:SOUN:PRE?".format(preemphasis), preemphasis)
     
-    def getAtvSpecialPreemphasis(self):
-        ''' Gets the preemphasis for the AF sound channels.'''
-        return self.querySFU("RATV:SPEC:SOUN:PRE?")
-    
     def setAtvSpecialSubState(self, subcarrier, state):
         '''Sets the state of the  sound subcarrier 1/the MONO sound subcarrier or sound subcarrier 2 ON or OFF.        valid = ["ON", "OFF"]'''
         return self.querySFU("RATV:SPEC:SOUN:SUB{0} {1};*WAI;:RATV:SPEC:SOUN:SUB{0}?".format(subcarrier, state), state)
     
-    def getAtvSpecialSubState(self, subcarrier):
+    def getAtvSpecialSubState(self, subcarrier, fresh=False):
         ''' Gets the state of the  sound subcarrier 1/the MONO sound subcarrier or sound subcarrier 2 ON or OFF,'''
-        return self.querySFU("RATV:SPEC:SOUN:SUB {}?".format(subcarrier))
-    
-    def setAtvSpecialVisionCarrier(self, state):
-        '''Sets the state of the  vision carrier ON or OFF.        valid = ["ON", "OFF"]'''
-        return self.querySFU("RATV:SPEC:TRP:CARR {};*WAI;:RATV:SPEC:TRP:CARR?".format(state), state)
-    
-    def getAtvSpecialVisionCarrier(self):
-        ''' Gets the state of  vision carrier ON or OFF.'''
-        return self.querySFU("RATV:SPEC:TRP:CARR?")
-    
-    def setAtvSpecialGDPrecorrection(self, state):
-        '''Sets the state of the video group delay precorrection ON or OFF.        valid = ["ON", "OFF"]'''
-        return self.querySFU("RATV:SPEC:TRP:GDPR {};*WAI;:RATV:SPEC:TRP:GDPR?".format(state), state)
-    
-    def getAtvSpecialGDPrecorrection(self):
-        ''' Gets the state of the video group delay precorrection ON or OFF'''
-        return self.querySFU("RATV:SPEC:TRP:GDPR?")
+        return self.querySFU("RATV:SPEC:SOUN:SUB {}?".format(subcarrier), fresh=fresh)
     
     def setAtvSpecialResidualCarrier(self, percent):
         '''Sets the amount of residual carrier.        Residual carrier  = 0.0 % to 30.0 %'''
         percent = str(percent)
         return self.querySFU("RATV:SPEC:TRP:RES {};*WAI;:RATV:SPEC:TRP:RES?".format(percent), Decimal(percent))
     
-    def getAtvSpecialResidualCarrier(self):
-        ''' Gets the amount of residual carrier.'''
-        return self.querySFU("RATV:SPEC:TRP:RES?")
-    
-    def setAtvSpecialVideoSignal(self, state):
-        '''Sets the state of the video signal ON or OFF.        valid = ["ON", "OFF"]'''
-        return self.querySFU("RATV:SPEC:TRP:VID {};*WAI;:RATV:SPEC:TRP:VID?".format(state), state)
-    
-    def getAtvSpecialVideoSignal(self):
-        ''' Gets the state of the video signal ON or OFF.'''
-        return self.querySFU("RATV:SPEC:TRP:VID?")
-    
-    def setAtvSpecialVSBFilter(self, state):
-        '''Sets the state of the vestigial sideband filter ON or OFF.        valid = ["ON", "OFF"]'''
-        return self.querySFU("RATV:SPEC:TRP:VSBF {};*WAI;:RATV:SPEC:TRP:VSBF?".format(state), state)
-    
-    def getAtvSpecialVSBFilter(self):
-        ''' Gets the state of the vestigial sideband filter ON or OFF.'''
-        return self.querySFU("RATV:SPEC:TRP:VSBF?")
-    
-    def setAtvSpecialVSBCharact(self, char):
-        '''Sets the state of the vestigial sideband filter ON or OFF.
-        B/G standard (BG), I standard (I and I1), D/K standard (D/K NICAM, D/K FM and D/K), 
-        M/N standard (M and N) and L standard (L and L NIC)
-        char = BG|BGAustralia|I|I1|DKNicam|DKFM|DK|M|N|L|LNICam                valid = ["BG", "BGA", "I", "I1", "DKN", "DKFM", "DK", "M", "N", "L", "LNIC"]'''
-        return self.querySFU("RATV:SPEC:TRP:VSBC {};*WAI;:RATV:SPEC:TRP:VSBC?".format(char), str(char))
-    
-    def getAtvSpecialVSBCharact(self):
-        ''' Gets the state of the vestigial sideband filter ON or OFF.'''
-        return self.querySFU("RATV:SPEC:TRP:VSBC?")  
-
 ##### BER Tester Commands #############
-    def setBerMeasState(self, state):
-        '''Starts BER measurement or halts it.'''
-        return self.querySFU(":SENS:BER:MEAS {};*WAI;:SENS:BER:MEAS?".format(state), state)
-
-    def getBerMeasState(self):
-        '''Returns the status of BER measurement'''
-        return self.querySFU(":SENS:BER:MEAS?")
-
+    # the plain setters and getters of this section are made from COMMANDS
     def setBerMeasRestart(self):
         '''Restarts BER measurement.'''
         return self.querySFU(":SENSe:BER:REST;*OPC?")
@@ -2497,67 +3033,55 @@ class SfuClass:
             return '****    Error: - Invalid BER input value'
         return self.querySFU(":SENS:BER:INP:SEL {};*WAI;:SENS:BER:INP:SEL?".format(berInput), berInput)
 
-    def getBerInput(self):
-        '''Returns the current of BER input'''
-        return self.querySFU(":SENS:BER:INP:SEL?")
-
-    def setBerSignal(self, signal):
-        '''Selects the type of packeted data stream if using MPEG transport stream inputs.        valid = ["H184", "S187", "H200", "S203", "H204", "S207", "STUF"]'''
-        return self.querySFU(":SENSe:BER:SIGN {};*WAI;:SENSe:BER:SIGN?".format(signal), str(signal))
-
-    def getBerSignal(self):
-        '''Returns the type of packeted data stream if using MPEG transport stream inputs.'''
-        return self.querySFU("SENSe:BER:SIGN?")
-
-    def getBerRead(self):
-        '''Returns the instantaneously measured bit error rate.'''
-        return self.querySFU(":READ:BER?")
-
-    def getBerReadAll(self):
-        '''Queries the bit error rate and other parameters.'''
-        return self.querySFU(":READ:BER:ALL?")
-
-    def getBerEval(self):
-        '''Indicates the progress of BER measurement as two numeric values: the first is the currently evaluated number of bits, 
-        while the second specifies the number of bits needed to be evaluated to produce the required measurement accuracy.'''
-        return self.querySFU(":READ:BER:EVAL?")
-
-    def getBerState(self):
-        '''Displays the current status of the bit error rate meter.
-        A status message with a higher priority will cover a status message with a lower priority.'''
-        return self.querySFU(":READ:BER:STAT?")
-
-    def getBerErrorCount(self):
-        '''Returns the sum of bit errors to date as a numeric value.'''
-        return self.querySFU(":READ:BER:COUN?")
-
-    def setBerGateMode(self, mode):
-        '''Selects the gating mode.        valid = ["AUT", "INF", "UWIN", "USIN"]'''
-        return self.querySFU(":SENS:BER:GATE:MODE {};*WAI;:SENS:BER:GATE:MODE?".format(mode), str(mode))
-
-    def getBerGateMode(self):
-        '''Returns the gating mode.'''
-        return self.querySFU(":SENS:BER:GATE:MODE?")
-
-    def getBerGateTime(self):
-        ''' Returns the gating time'''
-        return self.querySFU(":READ:BER:GATE:TIME?")
-        
-    def setBerPayload(self, mode):
-        '''Selects the payload contents of the received packets.        valid = ["PRBS", "H00", "HFF"]'''
-        return self.querySFU(":SENS:BER:PAYL {};*WAI;:SENS:BER:PAYL?".format(mode), str(mode))
-
-    def getBerPayload(self):
-        '''Returns the payload contents of the received packets..'''
-        return self.querySFU(":SENS:BER:PAYL?")
-    
     def setBerPrbs(self, mode):
         '''Selects the PRBS sequency.    valid = ["P15_", "P23_"]'''
         return self.querySFU(":SENS:BER:PRBS:SEQ {}_;*WAI;:SENS:BER:PRBS:SEQ?".format(mode), "{}_".format(mode))
     
-    def getBerPrbs(self):
-        '''Returns the PRBS sequency.'''
-        return self.querySFU(":SENS:BER:PRBS:SEQ?")    
+    def measureBer(self, limit, confidence=0.95, timeout=60, restart=True, ratio=scpi_ber.DEFAULT_RATIO):
+        '''Restarts the BER meter and polls the error count and evaluated bits
+        until a sequential test decides the BER is below or above limit (see
+        scpi_ber), or the meter's own gate completes, whichever comes first.
+        A point well clear of the limit is decided long before the gate ends.
+        A BER below limit / ratio fails, and one above limit * ratio passes,
+        with a probability of at most 1 - confidence; one in between may be
+        judged either way.
+        Returns a report dictionary with the result ("PASS", "FAIL" or the
+        error), the errors and bits used, the bits the gate needs, the bits a
+        pass needs with the errors seen and the fixed sample BER bounds, which
+        are for information only once the count stops early.'''
+        start = time.time()
+        report = {'result': None, 'errors': 0, 'bitsUsed': 0, 'gateBits': 0, 'bounds': (0.0, 1.0)}
+        res = self.setBerMeasRestart() if restart else ''
+        if settingFailed(res):
+            report['result'] = res
+
+        def poll():
+            reply = splitScpi(self.querySFU(":READ:BER:COUN?;:READ:BER:EVAL?", fresh=True))
+            try:
+                errors = int(float(reply[0]))
+                evaluated = [int(float(bits)) for bits in reply[1].split(',')]
+            except (ValueError, IndexError):
+                report['result'] = ';'.join(reply)
+                return True
+            bits, gate = evaluated[0], evaluated[-1]
+            report.update(errors=errors, bitsUsed=bits, gateBits=gate,
+                          bounds=scpi_ber.berBounds(errors, bits, confidence))
+            report['result'] = scpi_ber.berDecision(errors, bits, limit, confidence, ratio)
+            if report['result'] is None and len(evaluated) > 1 and bits >= gate > 0:
+                # the gate is complete, judge the measured BER as a full measurement would
+                report['result'] = (scpi_ber.FAIL, scpi_ber.PASS)[errors <= limit * bits]
+            return report['result'] is not None
+        if report['result'] is None:
+            try:
+                self.waiter.pollUntil(poll, timeout, 'BER < {}'.format(limit))
+            except scpi_completion.CompletionTimeout:
+                report['result'] = 'Timeout - BER undecided'
+        report['bitsToPass'] = scpi_ber.bitsToPass(report['errors'], limit, confidence, ratio)
+        report['time'] = time.time() - start
+        report['summary'] = "BER {}: {} errors in {} bits, {:.1f}% of the {} bit gate, {:g}% risk outside BER {:.2E} to {:.2E}, {:.3f} s".format(
+            report['result'], report['errors'], report['bitsUsed'], 100.0 * report['bitsUsed'] / max(report['gateBits'], 1),
+            report['gateBits'], 100 * (1 - confidence), limit / ratio, limit * ratio, report['time'])
+        return report
     
     def setDektecT2Group(self, groupRef):
         '''Selects the group name and verifies the group reference.'''
@@ -2617,6 +3141,9 @@ class SfuClass:
 
         return self.readSFU(":DEKTEC:T2:GROUP {}/{};:DEKTEC:T2:GROUP?".format(groupName, groupRef), groupRef)
     
-    def getDektecT2Group(self):
+    def getDektecT2Group(self, fresh=False):
         '''Return the group reference '''
-        return self.readSFU(":DEKTEC:T2:GROUP?")
\ No newline at end of file
+        return self.readSFU(":DEKTEC:T2:GROUP?")
+
+
+addCommands(SfuClass, COMMANDS)
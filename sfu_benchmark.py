@@ -0,0 +1,160 @@
+# Python SfuClass call overhead benchmark
+# Measures the host side cost of SfuClass setter and getter calls: building
+# the command, range checks, the state cache and checking the readback. The
+# SFU is replaced by an in-process scpi_simulator instrument behind a
+# loopback pool, so neither the network nor a real instrument hides the
+# Python work, and the simulator's own time is taken off each call. The
+# memory held by one SfuClass object (not counting what all instances
+# share: the connection pool, profiles and dispatch tables) is counted too.
+# Results are saved as JSON so runs on different versions can be compared
+# with --baseline, as transport_benchmark does.
+# SfuClass is a Python 2 module, run under Python 2.
+#
+#   python sfu_benchmark.py --count 20000 --output calls.json
+#   python sfu_benchmark.py --baseline calls.json
+
+import gc
+import sys
+import json
+import time
+import types
+import argparse
+import platform
+import scpi_simulator
+from transport_benchmark import gitRevision
+
+# label, method, argument tuples used in turn
+CALLS = [
+    ('setFrequency',        'setFrequency',  [(474000000, ), (482000000, )]),
+    ('getFrequency cached', 'getFrequency',  [()]),
+    ('getFrequency fresh',  'getFrequency',  [(True, )]),
+    ('setRfLimit',          'setRfLimit',    [(-10, ), (-20, )]),
+    ('setRfState',          'setRfState',    [('ON', ), ('OFF', )]),
+    ('setPhaseNoise',       'setPhaseNoise', [(-80, ), (-90, )]),
+    ('getPhaseNoise fresh', 'getPhaseNoise', [(True, )]),
+    ('setBerGateMode',      'setBerGateMode', [('AUT', ), ('INF', )]),
+    ('getBerRead',          'getBerRead',    [()]),
+    ('setRfLimit range',    'setRfLimit',    [(50, )]),
+]
+METRICS = ('total_us', 'overhead_us')
+
+
+class LoopbackPool:
+    '''Stands in for an scpi_pool.ConnectionPool, handing every message
+    straight to a simulated instrument and timing how long it takes'''
+    def __init__(self, instrument):
+        self.instrument = instrument
+        self.addr = ('loopback', 5025)
+        self.spent = 0.0
+
+    def exchange(self, cmd):
+        start = time.time()
+        replies = self.instrument.handle(cmd)
+        self.spent += time.time() - start
+        return replies[0] + '\n' if replies else ''
+
+    def send(self, cmd, timeout=None):
+        self.exchange(cmd)
+
+    def query(self, cmd, timeout=None):
+        return self.exchange(cmd)
+
+    def pipeline(self, cmds, timeout=None):
+        return [self.exchange(cmd) for cmd in cmds]
+
+    def report(self):
+        return 'Loopback'
+
+
+def makeSfu(std):
+    import sfuClass2
+    sfu = sfuClass2.SfuClass({'STD': std, 'sfu': 'lh'}, 'lh', Debug=0)
+    instrument = scpi_simulator.SimulatedInstrument('sfu')
+    sfu.pool = LoopbackPool(instrument)
+    sfu.profile = {'idn': instrument.idn, 'options': instrument.options.split(',')}
+    return sfu
+
+
+def timeCall(sfu, method, arguments, count):
+    '''Returns the total and host side microseconds per call'''
+    call = getattr(sfu, method)
+    for args in arguments:
+        call(*args)             # warm up, and fill the cache for cached getters
+    sfu.pool.spent = 0.0
+    turns = len(arguments)
+    start = time.time()
+    for i in range(count):
+        call(*arguments[i % turns])
+    elapsed = time.time() - start
+    return {'total_us': 1e6 * elapsed / count, 'overhead_us': 1e6 * (elapsed - sfu.pool.spent) / count}
+
+
+def instanceBytes(obj, shared):
+    '''Bytes reachable from obj, leaving out code, classes, modules and the shared objects'''
+    seen = set(id(item) for item in shared)
+    skip = (types.ModuleType, type, types.ClassType, types.FunctionType, types.BuiltinFunctionType, types.CodeType)
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, skip):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        stack.extend(gc.get_referents(item))
+    return total
+
+
+def compare(results, baseline):
+    '''Prints the change of every call against an earlier run'''
+    old = baseline.get('results', {})
+    for label, metrics in sorted(results.items()):
+        for metric in METRICS + ('bytes', ):
+            if metric in metrics and old.get(label, {}).get(metric):
+                change = 100.0 * (metrics[metric] - old[label][metric]) / old[label][metric]
+                print('{:<22} {:<12} {:>10.2f} -> {:>10.2f} {:+7.1f}% {}'.format(
+                    label, metric, old[label][metric], metrics[metric], change, ('worse', 'better')[change < 0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SfuClass per call host overhead benchmark')
+    parser.add_argument('--count', type=int, default=10000, help='calls per method')
+    parser.add_argument('--std', default='DVBT', help='standard the SfuClass objects are made for')
+    parser.add_argument('--output', default='sfu_benchmark.json')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    sfu = makeSfu(args.std)
+    results = {}
+    for label, method, arguments in CALLS:
+        try:
+            results[label] = timeCall(sfu, method, arguments, args.count)
+        except AttributeError as e:
+            results[label] = {'skipped': str(e)}
+        print('{:<22} {}'.format(label, ', '.join('{}={:.2f}'.format(metric, results[label][metric])
+                                                   for metric in METRICS if metric in results[label])
+                                  or results[label]))
+    sfu = makeSfu(args.std)
+    sfu.getFrequency()
+    shared = [sfu.pool, sfu.profiles, sfu.SFUSetting.names, sfu.getSFUValue.names]
+    results['instance'] = {'bytes': instanceBytes(sfu, shared)}
+    print('{:<22} bytes={}'.format('instance', results['instance']['bytes']))
+
+    report = {
+        'revision': gitRevision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+    print('Results saved to {}'.format(args.output))
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare(results, json.load(baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# Python parallel set-up of several SFUs
+# Stations with a main SFU and an interferer SFU used to configure them one
+# after the other. ParallelSetup applies a configuration dictionary to every
+# instrument at the same time, one thread each, using SfuClass.applyConfig so
+# only changed settings are sent. RF is only switched on once every
+# instrument has finished its set-up, and not at all if any of them failed,
+# so the interferer never radiates on its own. RF is switched off first,
+# before anything is retuned or releveled, whatever else then fails. During
+# sweeps each step is applied in phases (frequencies, then levels, then
+# anything else) with all instruments finishing a phase before the next
+# starts, so the carriers are never measured at a mix of old and new
+# frequencies or levels.
+# Works with both Python 2 (sfuClass2) and Python 3 callers.
+#
+#   setup = ParallelSetup({'main': sfu1, 'interferer': sfu2})
+#   report = setup.apply({'main': mainConfig, 'interferer': interfererConfig})
+#   print report['summary']
+#   for freq, step in setup.sweep(freqs, lambda f: {'main': {'freq': f}, 'interferer': {'freq': f + 8000000}}):
+#       measure()
+
+import time
+import threading
+
+RF_SETTINGS = ('rfState', )
+RF_OFF = ('OFF', '0')
+SWEEP_PHASES = (('freq', 'freqOff'),
+                ('pwrLimit', 'Attenuator', 'power', 'snr'))
+
+
+class ParallelSetup:
+    '''Configures several SfuClass instruments concurrently.
+    instruments    {name: SfuClass}'''
+    def __init__(self, instruments, batch=True):
+        self.instruments = instruments
+        self.batch = batch
+        self.stats = {'setups': 0, 'serial': 0.0, 'wall': 0.0}
+
+    def run(self, work):
+        '''Runs work(name, sfu) for every instrument on its own thread and
+        waits for all of them. Returns {name: result}, {name: exception} and
+        {name: seconds taken}.'''
+        results = {}
+        errors = {}
+        times = {}
+
+        def worker(name, sfu):
+            start = time.time()
+            try:
+                results[name] = work(name, sfu)
+            except Exception as e:
+                errors[name] = e
+            times[name] = time.time() - start
+        threads = [threading.Thread(target=worker, args=(name, sfu), name='setup-{}'.format(name))
+                   for name, sfu in self.instruments.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()       # every instrument is done before the caller goes on
+        return results, errors, times
+
+    def applyPhase(self, configs):
+        '''Applies {name: config} concurrently, returning {name: report},
+        {name: failures} and the serial time the phase would have taken'''
+        def work(name, sfu):
+            config = configs.get(name)
+            return sfu.applyConfig(config, self.batch) if config else None
+        reports, errors, times = self.run(work)
+        failures = dict((name, ['{}: {}'.format(type(e).__name__, e)]) for name, e in errors.items())
+        for name, report in reports.items():
+            if report is not None and report['failed']:
+                failures[name] = ['{} = {}'.format(setting, report['results'][setting]) for setting in report['failed']]
+        return reports, failures, sum(times.values())
+
+    def merge(self, reports, phaseReports):
+        '''Adds the applyConfig reports of a phase to {name: report}'''
+        for name, report in phaseReports.items():
+            if report is None:
+                continue
+            merged = reports.setdefault(name, {'sent': [], 'skipped': [], 'failed': [], 'results': {}})
+            for key in ('sent', 'skipped', 'failed'):
+                merged[key].extend(report[key])
+            merged['results'].update(report['results'])
+
+    def apply(self, configs):
+        '''Switches RF off where asked, applies a configuration to every
+        instrument at once, then switches RF on only after all of them have
+        finished without errors. RF off goes first, so an instrument being
+        switched off doesn't radiate while it is retuned and releveled.
+        Returns a report dictionary with each instrument's applyConfig report,
+        the failures per instrument, whether all the RF states asked for were
+        set, and the time saved over configuring the instruments one after
+        the other.'''
+        start = time.time()
+        setups = dict((name, dict((setting, value) for setting, value in config.items() if setting not in RF_SETTINGS))
+                      for name, config in configs.items())
+        rf = dict((name, dict((setting, value) for setting, value in config.items() if setting in RF_SETTINGS))
+                  for name, config in configs.items())
+        rfOff = dict((name, dict((setting, value) for setting, value in config.items() if str(value).upper() in RF_OFF))
+                     for name, config in rf.items())
+        rfOn = dict((name, dict((setting, value) for setting, value in config.items() if str(value).upper() not in RF_OFF))
+                    for name, config in rf.items())
+        reports = {}
+        failures = {}
+        serial = 0.0
+        if [config for config in rfOff.values() if config]:
+            phaseReports, failures, serial = self.applyPhase(rfOff)
+            self.merge(reports, phaseReports)
+        phaseReports, setupFailures, setupSerial = self.applyPhase(setups)
+        self.merge(reports, phaseReports)
+        serial += setupSerial
+        for name, failed in setupFailures.items():
+            failures.setdefault(name, []).extend(failed)
+        if [config for config in rfOn.values() if config] and not failures:
+            phaseReports, failures, onSerial = self.applyPhase(rfOn)
+            self.merge(reports, phaseReports)
+            serial += onSerial
+        rfSet = bool([config for config in rf.values() if config]) and not failures
+        return self.finish(reports, failures, rfSet, serial, time.time() - start)
+
+    def step(self, configs):
+        '''Applies one sweep step, {name: settings}, in phases: frequencies
+        on every instrument, then levels, then the remaining settings. Each
+        phase starts only when all instruments have finished the one before.'''
+        start = time.time()
+        phases = [dict((name, dict((setting, value) for setting, value in config.items() if setting in phase))
+                       for name, config in configs.items()) for phase in SWEEP_PHASES]
+        phased = [setting for phase in SWEEP_PHASES for setting in phase]
+        phases.append(dict((name, dict((setting, value) for setting, value in config.items() if setting not in phased))
+                           for name, config in configs.items()))
+        reports = dict((name, {'sent': [], 'skipped': [], 'failed': [], 'results': {}}) for name in configs)
+        failures = {}
+        serial = 0.0
+        for phase in phases:
+            if not [config for config in phase.values() if config]:
+                continue
+            phaseReports, failures, phaseSerial = self.applyPhase(phase)
+            serial += phaseSerial
+            self.merge(reports, phaseReports)
+            if failures:
+                break           # don't go on with the instruments out of step
+        return self.finish(reports, failures, False, serial, time.time() - start)
+
+    def sweep(self, points, configsFor):
+        '''Yields (point, step report) after every instrument has been set
+        for the point. configsFor(point) returns {name: settings}.'''
+        for point in points:
+            yield point, self.step(configsFor(point))
+
+    def finish(self, reports, failures, rfSet, serial, wall):
+        self.stats['setups'] += 1
+        self.stats['serial'] += serial
+        self.stats['wall'] += wall
+        summary = "Parallel set-up of {} instruments: {:.3f} s, {:.3f} s one after the other, {:.3f} s saved".format(
+            len(self.instruments), wall, serial, max(serial - wall, 0))
+        if failures:
+            summary += ", failed: {}".format(', '.join(sorted(failures)))
+        return {'results': reports, 'failures': failures, 'rfSet': rfSet,
+                'wall': wall, 'serial': serial, 'saved': max(serial - wall, 0), 'summary': summary}
+
+    def report(self):
+        '''Returns the totals over every set-up and sweep step'''
+        return "Set-ups = {setups}, Wall time = {wall:.3f} s, Serial time = {serial:.3f} s, Saved = {saved:.3f} s".format(
+            saved=max(self.stats['serial'] - self.stats['wall'], 0), **self.stats)
+
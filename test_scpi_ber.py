@@ -0,0 +1,74 @@
+# Python BER decision checks
+# Known Poisson bounds, the SPRT thresholds and the error rate of decisions
+# made after every poll. Runs under Python 2 and 3.
+#
+#   python -m unittest test_scpi_ber
+
+import math
+import random
+import unittest
+import scpi_ber
+
+
+def pollUntilDecided(rng, ber, limit, step):
+    '''Counts errors at ber in blocks of step bits, judging after every
+    block as measureBer does, until the test decides'''
+    errors = bits = 0
+    while True:
+        # Poisson errors in one block, by counting exponential gaps
+        mean = ber * step
+        total = rng.expovariate(1.0)
+        while total < mean:
+            errors += 1
+            total += rng.expovariate(1.0)
+        bits += step
+        decision = scpi_ber.berDecision(errors, bits, limit)
+        if decision is not None:
+            return decision
+
+
+class BoundsTest(unittest.TestCase):
+    def testKnownBounds(self):
+        self.assertAlmostEqual(scpi_ber.lowerMean(10, 0.95), 5.425, places=3)
+        self.assertAlmostEqual(scpi_ber.upperMean(10, 0.95), 16.962, places=3)
+        self.assertAlmostEqual(scpi_ber.upperMean(0, 0.95), math.log(20), places=6)
+        self.assertEqual(scpi_ber.lowerMean(0, 0.95), 0.0)
+
+    def testBerBounds(self):
+        lower, upper = scpi_ber.berBounds(10, 1e6)
+        self.assertAlmostEqual(lower, 5.425e-6, places=9)
+        self.assertAlmostEqual(upper, 16.962e-6, places=9)
+
+
+class DecisionTest(unittest.TestCase):
+    def testThresholds(self):
+        low, high = scpi_ber.sprtThresholds(0.95)
+        self.assertAlmostEqual(high, math.log(20), places=9)
+        self.assertAlmostEqual(low, -math.log(20), places=9)
+
+    def testErrorFreePass(self):
+        bits = scpi_ber.bitsToPass(0, 1e-7)
+        self.assertAlmostEqual(bits, math.log(20) / 1.5e-7, delta=1)
+        self.assertIsNone(scpi_ber.berDecision(0, bits * 0.99, 1e-7))
+        self.assertEqual(scpi_ber.berDecision(0, bits * 1.01, 1e-7), scpi_ber.PASS)
+
+    def testFail(self):
+        self.assertEqual(scpi_ber.berDecision(20, 1e7, 1e-7), scpi_ber.FAIL)
+        self.assertIsNone(scpi_ber.berDecision(2, 1e7, 1e-7))
+        self.assertIsNone(scpi_ber.berDecision(0, 0, 1e-7))
+
+    def testRepeatedLooksKeepTheRisk(self):
+        # judged after every poll, as measureBer does, the wrong decision
+        # rate at the edges of the indifference zone stays below 5%
+        rng = random.Random(1)
+        limit = 1e-4
+        good, bad = scpi_ber.sprtRates(limit)
+        trials = 400
+        falseFails = sum(pollUntilDecided(rng, good, limit, 500) == scpi_ber.FAIL for _ in range(trials))
+        falsePasses = sum(pollUntilDecided(rng, bad, limit, 500) == scpi_ber.PASS for _ in range(trials))
+        self.assertLess(falseFails, 0.05 * trials)
+        self.assertLess(falsePasses, 0.05 * trials)
+
+
+if __name__ == '__main__':
+    unittest.main()
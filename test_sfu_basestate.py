@@ -0,0 +1,66 @@
+# Python base configuration skip checks against the SCPI simulator
+# SfuClass is a Python 2 module, run under Python 2.
+#
+#   python -m unittest test_sfu_basestate
+
+import os
+import shutil
+import tempfile
+import unittest
+import scpi_pool
+import scpi_cache
+import scpi_basestate
+import scpi_simulator
+import sfuClass2
+
+BASE_FILE = 'D:\\base.savrl'
+
+
+class BaseStateTest(unittest.TestCase):
+    def setUp(self):
+        self.server = scpi_simulator.startSimulator('sfu')
+        self.folder = tempfile.mkdtemp()
+        self.states = scpi_basestate.BaseStates(os.path.join(self.folder, 'base_states.json'))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder)
+
+    def makeSfu(self):
+        '''A new SfuClass on the simulator, sharing the base state file'''
+        sfu = sfuClass2.SfuClass({'STD': 'DVBT', 'sfu': 'lh'}, 'lh', Debug=0)
+        sfu.ADDR = self.server.server_address
+        sfu.pool = scpi_pool.getPool(sfu.ADDR)
+        sfu.cache = scpi_cache.getCache(sfu.ADDR)
+        sfu.cache.listen(sfu.cacheSet)
+        sfu.baseStates = self.states
+        return sfu
+
+    def offset(self, sfu):
+        return sfu.pool.query(':POW:OFFS?').decode().strip()
+
+    def testSameFileSkipped(self):
+        first = self.makeSfu()
+        self.assertTrue(first.base(BASE_FILE).startswith('Base config loaded'))
+        self.assertTrue(self.makeSfu().base(BASE_FILE).startswith('Base config already loaded'))
+
+    def testSetThroughOtherObjectReloads(self):
+        # :POW:OFFS is not in the settings snapshot, only the set drops the fingerprint
+        first = self.makeSfu()
+        first.base(BASE_FILE)
+        first.setRfLevelOffs(7)
+        self.assertEqual(self.offset(first), '7')
+        second = self.makeSfu()
+        self.assertTrue(second.base(BASE_FILE).startswith('Base config loaded'))
+        self.assertEqual(self.offset(second), '0')
+
+    def testSetThroughSameObjectReloads(self):
+        sfu = self.makeSfu()
+        sfu.base(BASE_FILE)
+        sfu.setRfLevelOffs(7)
+        self.assertTrue(sfu.base(BASE_FILE).startswith('Base config loaded'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+# Python SCPI transport benchmark
+# Measures what a command costs through each of the instrument clients in
+# this repo, run against the local scpi_simulator so no instrument has to be
+# booked. For every transport it reports the connection set-up cost, p50, p95
+# and p99 round trip latency, commands per second and bytes per second for a
+# large response, and saves the results as JSON so runs on different versions
+# can be compared with --baseline.
+# SCPI_socket and SfuClass are Python 2 modules, run under Python 2 to include
+# them; under Python 3 they are reported as skipped.
+#
+#   python transport_benchmark.py --count 2000 --output bench.json
+#   python transport_benchmark.py --latency 0.0005 --baseline bench.json
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import scpi_simulator
+import scpi_pool
+
+SFU_PORT = 5025             # SfuClass always connects to port 5025
+SMALL_QUERY = ':FREQ?'
+LARGE_QUERY = ':TRAC:DATA?'
+METRICS = ('connect_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'commands_per_s', 'bytes_per_s')
+HIGHER_IS_BETTER = ('commands_per_s', 'bytes_per_s')
+
+
+class Client:
+    '''A connected transport under test'''
+    def __init__(self, query, close):
+        self.query = query
+        self.close = close
+
+
+def connectEthernetControl(addr):
+    import EthernetController
+    eCon = EthernetController.EthernetControl(addr[0], addr[1], None)
+    return Client(eCon.ask, eCon.sockClose)
+
+
+def connectEthernetController2(addr):
+    import EthernetController2
+    eCon = EthernetController2.EthernetControl(addr[0], addr[1], None)
+    return Client(eCon.ask, eCon.sockClose)
+
+
+def connectPrologixControl(addr):
+    import PrologixGpibEthernetController
+    prol = PrologixGpibEthernetController.PrologixControl(addr[0], addr[1], 5)
+    return Client(prol.ask, prol.sockClose)
+
+
+def connectScpiSocket(addr):
+    import SCPI_socket
+    session = SCPI_socket.SCPI_sock_connect(addr[0], addr[1])
+    return Client(lambda cmd: SCPI_socket.SCPI_sock_query(session, cmd),
+                  lambda: SCPI_socket.SCPI_sock_close(session))
+
+
+_sfu = []
+
+
+def connectSfuClass(addr):
+    '''SfuClass shares pooled connections per host, closing the pools makes
+    the next query pay for a fresh connect'''
+    import sfuClass2
+    if not _sfu:
+        _sfu.append(sfuClass2.SfuClass({'STD': 'DVBT', 'sfu': 'lh'}, 'lh', Debug=0))
+    scpi_pool.closeAllPools()
+    return Client(_sfu[0].readSFU, scpi_pool.closeAllPools)
+
+
+# name, connect function, simulator kind
+TRANSPORTS = [
+    ('EthernetControl', connectEthernetControl, 'sfu'),
+    ('EthernetController2', connectEthernetController2, 'sfu'),
+    ('PrologixControl', connectPrologixControl, 'prologix'),
+    ('SCPI_socket', connectScpiSocket, 'sfu'),
+    ('SfuClass', connectSfuClass, 'sfu'),
+]
+
+
+def percentile(ordered, fraction):
+    '''Nearest rank percentile of an already sorted list'''
+    if not ordered:
+        return 0.0
+    index = min(int(fraction * len(ordered) + 0.5), len(ordered)) - 1
+    return ordered[max(index, 0)]
+
+
+def largePayload(size):
+    '''An ASCII trace of roughly size bytes, the shape of a real R? or TRAC? reply'''
+    reading = '+4.997561926E-01'
+    return ','.join([reading] * max(size // (len(reading) + 1), 1))
+
+
+def runTransport(connect, addr, count, connects, largeSize, largeCount):
+    '''Times one transport, returns its metrics'''
+    setup = []
+    for _ in range(connects):
+        start = time.time()
+        client = connect(addr)
+        client.query('*IDN?')
+        setup.append(time.time() - start)
+        client.close()
+    client = connect(addr)
+    try:
+        client.query(SMALL_QUERY)       # warm up
+        latencies = []
+        started = time.time()
+        for _ in range(count):
+            start = time.time()
+            client.query(SMALL_QUERY)
+            latencies.append(time.time() - start)
+        elapsed = time.time() - started
+        latencies.sort()
+        result = {
+            'connect_ms': 1000 * percentile(sorted(setup), 0.5),
+            'p50_ms': 1000 * percentile(latencies, 0.50),
+            'p95_ms': 1000 * percentile(latencies, 0.95),
+            'p99_ms': 1000 * percentile(latencies, 0.99),
+            'commands_per_s': count / elapsed,
+        }
+        received = 0
+        start = time.time()
+        for _ in range(largeCount):
+            reply = client.query(LARGE_QUERY)
+            if len(reply.strip()) < largeSize:
+                result['large_error'] = 'reply truncated to {} of {} bytes'.format(len(reply.strip()), largeSize)
+                break
+            received += len(reply)
+        else:
+            result['bytes_per_s'] = received / (time.time() - start)
+    finally:
+        client.close()
+    return result
+
+
+def gitRevision():
+    '''Revision of this checkout, so results can be matched to a version'''
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=devnull,
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline):
+    '''Prints the change of every metric against an earlier run'''
+    for name, metrics in sorted(results.items()):
+        old = baseline.get('results', {}).get(name, {})
+        for metric in METRICS:
+            if metric in metrics and old.get(metric):
+                change = 100.0 * (metrics[metric] - old[metric]) / old[metric]
+                better = (change < 0, change > 0)[metric in HIGHER_IS_BETTER]
+                print('{:<20} {:<15} {:>12.3f} -> {:>12.3f} {:+7.1f}% {}'.format(
+                    name, metric, old[metric], metrics[metric], change, ('worse', 'better')[better]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SCPI transport latency and throughput benchmark')
+    parser.add_argument('--count', type=int, default=1000, help='small queries per transport')
+    parser.add_argument('--connects', type=int, default=20, help='connections opened to time set-up')
+    parser.add_argument('--large-size', type=int, default=262144, help='bytes in each large response')
+    parser.add_argument('--large-count', type=int, default=20, help='large responses per transport')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated instrument latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='simulated instrument jitter in seconds')
+    parser.add_argument('--only', help='comma separated transports to run')
+    parser.add_argument('--output', default='transport_benchmark.json')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    simulator = {'latency': args.latency, 'jitter': args.jitter, 'seed': 0}
+    servers = {
+        'sfu': scpi_simulator.startSimulator('sfu', **simulator),
+        'prologix': scpi_simulator.startSimulator('prologix', gpib=(5, ), **simulator),
+    }
+    try:
+        servers['sfuClass'] = scpi_simulator.startSimulator('sfu', SFU_PORT, **simulator)
+    except IOError as e:
+        servers['sfuClass'] = None
+        sfuClassError = 'port {} unavailable: {}'.format(SFU_PORT, e)
+    payload = largePayload(args.large_size)
+    for server in servers.values():
+        if server is not None:
+            instruments = getattr(server.target, 'instruments', {0: server.target})
+            for instrument in instruments.values():
+                instrument.state[scpi_simulator.nodeKey(LARGE_QUERY)] = payload
+
+    only = args.only.split(',') if args.only else None
+    results = {}
+    for name, connect, kind in TRANSPORTS:
+        if only and name not in only:
+            continue
+        server = servers[('sfuClass', kind)[name != 'SfuClass']]
+        if server is None:
+            results[name] = {'skipped': sfuClassError}
+            continue
+        try:
+            results[name] = runTransport(connect, server.server_address, args.count, args.connects,
+                                         len(payload), args.large_count)
+        except SyntaxError as e:
+            results[name] = {'skipped': 'needs Python 2 ({})'.format(e.filename)}
+        except Exception as e:
+            results[name] = {'error': '{}: {}'.format(type(e).__name__, e)}
+        print('{:<20} {}'.format(name, ', '.join('{}={:.3f}'.format(metric, results[name][metric])
+                                                   for metric in METRICS if metric in results[name])
+                                  or results[name]))
+    for server in servers.values():
+        if server is not None:
+            server.stop()
+    scpi_pool.closeAllPools()
+
+    report = {
+        'revision': gitRevision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+    print('Results saved to {}'.format(args.output))
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare(results, json.load(baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())